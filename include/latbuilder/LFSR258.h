@@ -39,9 +39,25 @@ public:
    /**
     * Constructor.
     *
-    * \tparam s   Optional seed.
+    * \tparam s   Optional seed. By default, the first seed of the stream selected
+    *             with selectStream().
     */
-   LFSR258(seed_type s = default_seed) { seed(std::move(s)); }
+   LFSR258(seed_type s = streamSeed()) { seed(std::move(s)); }
+
+   /**
+    * Selects the stream of the default-constructed generators.
+    * Stream \f$k\f$ starts \f$k \times 2^{100}\f$ iterations past the default seed,
+    * so that the random searches run with different streams (for instance,
+    * in different processes) explore non-overlapping random samples.
+    * Stream 0 corresponds to the default seed.
+    */
+   static void selectStream(unsigned int stream);
+
+   /**
+    * Returns the first seed of the selected stream.
+    */
+   static const seed_type& streamSeed()
+   { return s_streamSeed; }
 
    /**
     * Returns the current seed.
@@ -95,6 +111,8 @@ public:
    { return not (e1 == e2); }
 
 private:
+   static seed_type s_streamSeed;
+
    seed_type m_s;
    void check_seed(const seed_type& s);
 };
@@ -96,6 +96,32 @@ struct Weights {
    static std::unique_ptr<LatticeTester::Weights>
    parsePOD(const std::string& arg, Real powerScale);
 
+   /**
+    * Parses a string specifying a file which contains a weights string.
+    *
+    * \param arg            Input string to be parsed as weights.
+    * \param powerScale     Power to which each number parsed from input will
+    *                       be raised before being assigned to a weight.
+    *
+    * The file contains a string in one of the formats of #parseProjectionDependent(),
+    * #parseOrderDependent(), #parseProduct() and #parsePOD(), in which whitespace
+    * (including newlines) is ignored and \c # starts a comment which extends to the
+    * end of the line.  This allows passing the weights of a large number of coordinates
+    * or projections without exceeding the length limits of the command line.
+    *
+    * Example string: <code>from-file:weights.txt</code>, where <code>weights.txt</code> contains:
+    * \verbatim
+      # product weights of coordinates 1 to 4
+      product:0:
+      1.0, 0.9,
+      0.8, 0.7
+      \endverbatim
+    *
+    * \return A pointer to a newly created object or \c nullptr on failure.
+    */
+   static std::unique_ptr<LatticeTester::Weights>
+   parseFromFile(const std::string& arg, Real powerScale);
+
    /**
     * Parses a string specifying weights.
     *
@@ -109,7 +135,7 @@ struct Weights {
     *                       constructor, the weights are assumed to be already
     *                       raised to the power \f$q\f$.
     *
-    * For example strings, see #parseProjectionDependent(),
+    * For example strings, see #parseFromFile(), #parseProjectionDependent(),
     * #parseOrderDependent() and #parseProduct().
     *
     * \return A pointer to a newly created object or \c nullptr on failure.
@@ -0,0 +1,6 @@
+"""Benchmarks of the hot paths of the Python interface, in the format of airspeed velocity (asv).
+
+Run them from the python-wrapper folder with `asv run` (see asv.conf.json), or a single file with e.g.
+`asv run --bench bench_points`. The C++ executable is not needed: the searches are run against the stub
+stub_latnetbuilder.py, which replays a recorded output.
+"""
@@ -0,0 +1,9 @@
+"""Benchmarks of the import time of the package."""
+
+
+def timeraw_import_latnetbuilder():
+    return "import latnetbuilder"
+
+
+def timeraw_import_generate_points():
+    return "import latnetbuilder.generate_points"
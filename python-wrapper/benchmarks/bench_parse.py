@@ -0,0 +1,21 @@
+"""Benchmarks of the parsing of the outputs of LatNet Builder."""
+
+from latnetbuilder.parse_output import parse_output
+
+from .fixtures import output_machine
+
+
+class TimeParseOutput:
+    params = (['ordinary', 'polynomial', 'sobol', 'explicit'], [10, 20], [8, 256], [1, 3])
+    param_names = ['construction', 'm', 's', 'interlacing']
+
+    def setup(self, construction, m, s, interlacing):
+        if construction == 'ordinary' and interlacing > 1:
+            raise NotImplementedError()
+        self.text = output_machine(construction, m, s, interlacing)
+
+    def time_parse_output(self, construction, m, s, interlacing):
+        parse_output(self.text)
+
+    def peakmem_parse_output(self, construction, m, s, interlacing):
+        parse_output(self.text)
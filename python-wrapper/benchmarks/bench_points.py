@@ -0,0 +1,62 @@
+"""Benchmarks of the point generation."""
+
+import numpy as np
+
+from latnetbuilder.parse_output import parse_output
+from latnetbuilder.generate_points import generate_points_digital_net, generate_points_ordinary_lattice
+
+from .fixtures import output_machine
+
+MAX_NB_VALUES = 2**24   # larger point sets are skipped to keep the memory footprint reasonable
+
+
+class TimeDigitalNet:
+    params = (['sobol', 'polynomial', 'explicit'], [10, 16, 20], [8, 64], [1, 3])
+    param_names = ['construction', 'm', 's', 'interlacing']
+
+    def setup(self, construction, m, s, interlacing):
+        if 2**m * s > MAX_NB_VALUES:
+            raise NotImplementedError()
+        self.result = parse_output(output_machine(construction, m, s, interlacing))
+        self.out = np.empty((2**m, s), dtype=np.float32)
+
+    def time_points(self, construction, m, s, interlacing):
+        generate_points_digital_net(self.result.matrices, interlacing)
+
+    def time_points_exact(self, construction, m, s, interlacing):
+        generate_points_digital_net(self.result.matrices, interlacing, exact=True)
+
+    def time_points_float32_out(self, construction, m, s, interlacing):
+        generate_points_digital_net(self.result.matrices, interlacing, out=self.out)
+
+    def time_points_threads(self, construction, m, s, interlacing):
+        generate_points_digital_net(self.result.matrices, interlacing, workers=0)
+
+    def time_one_coordinate(self, construction, m, s, interlacing):
+        generate_points_digital_net(self.result.matrices, interlacing, coordinate=s - 1)
+
+    def peakmem_points(self, construction, m, s, interlacing):
+        generate_points_digital_net(self.result.matrices, interlacing)
+
+
+class TimeOrdinaryLattice:
+    params = ([10, 16, 20], [8, 64])
+    param_names = ['m', 's']
+
+    def setup(self, m, s):
+        if 2**m * s > MAX_NB_VALUES:
+            raise NotImplementedError()
+        self.result = parse_output(output_machine('ordinary', m, s))
+        self.out = np.empty((2**m, s), dtype=np.float32)
+
+    def time_points(self, m, s):
+        generate_points_ordinary_lattice(self.result.gen_vector, self.result.nb_points)
+
+    def time_points_exact(self, m, s):
+        generate_points_ordinary_lattice(self.result.gen_vector, self.result.nb_points, exact=True)
+
+    def time_points_float32_out(self, m, s):
+        generate_points_ordinary_lattice(self.result.gen_vector, self.result.nb_points, out=self.out)
+
+    def peakmem_points(self, m, s):
+        generate_points_ordinary_lattice(self.result.gen_vector, self.result.nb_points)
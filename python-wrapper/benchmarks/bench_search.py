@@ -0,0 +1,78 @@
+"""Benchmarks of the orchestration of a search (launch, monitoring, parsing), run against the stub executable."""
+
+import os
+import sys
+import shutil
+import tempfile
+
+import latnetbuilder
+from latnetbuilder.search import SearchLattice, SearchNet
+
+STUB = os.path.join(os.path.dirname(os.path.realpath(__file__)), 'stub_latnetbuilder.py')
+
+
+def _search(set_type):
+    if set_type == 'lattice':
+        search = SearchLattice()
+        search.construction = 'ordinary'
+        search.exploration_method = 'random:1000'
+        search.figure_of_merit = 'CU:P2'
+    else:
+        search = SearchNet()
+        search.construction = 'sobol'
+        search.exploration_method = 'full-CBC'
+        search.figure_of_merit = 'CU:P2'
+    search.modulus = '2^16'
+    search.dimension = 8
+    search.weights = ['product:1']
+    return search
+
+
+class TimeSearchOrchestration:
+    '''Wall time of Search.execute against the stub: launch, monitoring loop, parsing of the progress and of the result.'''
+    params = (['lattice', 'net'], [1, 4])
+    param_names = ['set_type', 'shards']
+    timeout = 120
+
+    def setup(self, set_type, shards):
+        if set_type == 'net' and shards > 1:
+            raise NotImplementedError()     # full-CBC cannot be sharded
+        self.path = latnetbuilder.PATH_TO_LATNETBUILDER
+        latnetbuilder.PATH_TO_LATNETBUILDER = STUB
+        self.folder = tempfile.mkdtemp()
+        self.search = _search(set_type)
+        self.stdout = sys.stdout
+        sys.stdout = open(os.devnull, 'w')     # the result is printed by execute
+
+    def teardown(self, set_type, shards):
+        sys.stdout.close()
+        sys.stdout = self.stdout
+        latnetbuilder.PATH_TO_LATNETBUILDER = self.path
+        shutil.rmtree(self.folder, ignore_errors=True)
+
+    def time_execute(self, set_type, shards):
+        self.search.execute(output_folder=self.folder, shards=shards)
+
+
+class TimeBatchEvaluation:
+    '''Overhead of a batch evaluation: formatting of the candidates, launch and collection of the processes.'''
+    params = ([100, 10000], [1, 4])
+    param_names = ['nb_candidates', 'workers']
+
+    def setup(self, nb_candidates, workers):
+        self.path = latnetbuilder.PATH_TO_LATNETBUILDER
+        latnetbuilder.PATH_TO_LATNETBUILDER = STUB
+        self.folder = tempfile.mkdtemp()
+        self.search = _search('lattice')
+        self.candidates = [[1] + [2 * k + 1 for k in range(i, i + 7)] for i in range(nb_candidates)]
+
+    def teardown(self, nb_candidates, workers):
+        latnetbuilder.PATH_TO_LATNETBUILDER = self.path
+        shutil.rmtree(self.folder, ignore_errors=True)
+
+    def time_evaluate_batch(self, nb_candidates, workers):
+        self.search.evaluate_batch(self.candidates, workers=workers, output_folder=self.folder)
+
+
+def time_construct_command_line():
+    _search('net').construct_command_line()
@@ -0,0 +1,57 @@
+"""Synthetic outputs of LatNet Builder, in the format of the outputMachine.txt files parsed by latnetbuilder.parse_output.
+
+The generating vectors and matrices are random (with a fixed seed): they are not good point sets, but they have the
+size and the structure of real results, which is all the benchmarks need.
+"""
+
+import numpy as np
+
+CONSTRUCTIONS = ['ordinary', 'polynomial', 'sobol', 'explicit']
+
+
+def _matrices_lines(matrices):
+    lines = []
+    for c, matrix in enumerate(matrices):
+        lines.append('// Coordinate %i' % (c + 1))
+        lines += [' '.join([str(bit) for bit in row]) for row in matrix]
+    return lines
+
+
+def output_machine(construction, m, s, interlacing=1, seed=0):
+    '''Return the content of an outputMachine.txt file for a point set with 2^m points in dimension s.
+
+    Arguments:
+        + construction: 'ordinary' (ordinary lattice), 'polynomial' (polynomial lattice rule), 'sobol' or 'explicit' (digital nets)
+        + interlacing: interlacing factor (digital nets only)'''
+    rng = np.random.RandomState(seed)
+    if construction == 'ordinary':
+        gen_vector = 2 * rng.randint(0, 2**(m - 1), size=s) + 1
+        lines = ['Ordinary  // Construction method', '%i  // Number of points' % 2**m, '%i  // Dimension of points' % s,
+                 '2  // Base', '%i  // Maximum level' % m]
+        lines += [str(a) for a in gen_vector]
+        lines += ['0.123456789  // Merit', '0.5  // Time']
+        return '\n'.join(lines) + '\n'
+
+    nb_components = s * interlacing
+    nb_rows = m
+    lines = ['%i  // Number of columns' % m, '%i  // Number of rows' % nb_rows, '%i  // Number of points' % 2**m,
+             '%i  // Number of components' % nb_components, '%i  // Interlacing factor' % interlacing]
+    if construction == 'polynomial':
+        lines.append('Polynomial  // Construction method')
+        modulus = [1] + [int(x) for x in rng.randint(0, 2, size=m - 1)] + [1]
+        lines.append(' '.join([str(x) for x in modulus]) + '  // Modulus')
+        lines += [' '.join([str(x) for x in rng.randint(0, 2, size=m)]) for _ in range(nb_components)]
+        matrices = rng.randint(0, 2, size=(nb_components, nb_rows, m))
+    elif construction == 'sobol':
+        lines.append('Sobol  // Construction method')
+        lines += [' '.join([str(2 * k + 1) for k in range(1 + c % 5)]) for c in range(nb_components)]
+        matrices = np.triu(rng.randint(0, 2, size=(nb_components, nb_rows, m)))
+        matrices[:, np.arange(min(nb_rows, m)), np.arange(min(nb_rows, m))] = 1
+    elif construction == 'explicit':
+        lines.append('Explicit  // Construction method')
+        matrices = rng.randint(0, 2, size=(nb_components, nb_rows, m))
+    else:
+        raise ValueError('unknown construction %s' % construction)
+    lines += _matrices_lines(matrices)
+    lines += ['0.123456789  // Merit', '0.5  // Time']
+    return '\n'.join(lines) + '\n'
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""Stub of the latnetbuilder executable, used to measure the orchestration overhead of the Python wrapper.
+
+It accepts the command line built by Search.construct_command_line, replays a recorded standard output of
+LatNet Builder line by line, and writes a synthetic outputMachine.txt (see fixtures.py) in the output folder.
+
+Environment variables:
+    + LATNETBUILDER_STUB_PROGRESS: path to the recorded output to replay (default: data/progress_net_cbc.txt for nets,
+    data/progress_lattice_random.txt for lattices)
+    + LATNETBUILDER_STUB_DELAY: delay in seconds between two replayed lines (default: 0)
+
+With --evaluation-file, the candidates are not evaluated: a synthetic merit is written for each of them in merits.txt.
+"""
+
+import os
+import sys
+import time
+
+STUB_DIR = os.path.dirname(os.path.realpath(__file__))
+sys.path.insert(0, STUB_DIR)
+
+from fixtures import output_machine
+
+
+def _option(args, name, default=None):
+    if name in args:
+        return args[args.index(name) + 1]
+    return default
+
+
+def main(args):
+    set_type = _option(args, '--set-type', 'net')
+    construction = _option(args, '--construction', 'sobol')
+    if set_type == 'lattice' and construction != 'polynomial':
+        construction = 'ordinary'
+    size = _option(args, '--size-parameter', '2^10')
+    m = int(size.split('^')[1]) if '^' in size else max(1, int(size).bit_length() - 1)
+    s = int(_option(args, '--dimension', '3'))
+    interlacing = int(_option(args, '--interlacing', '1'))
+    output_folder = _option(args, '--output-folder')
+
+    default_progress = 'progress_net_cbc.txt' if set_type == 'net' else 'progress_lattice_random.txt'
+    progress_path = os.environ.get('LATNETBUILDER_STUB_PROGRESS', os.path.join(STUB_DIR, 'data', default_progress))
+    delay = float(os.environ.get('LATNETBUILDER_STUB_DELAY', '0'))
+
+    if output_folder is not None:
+        print('Writing in output folder: ' + output_folder)
+        os.makedirs(output_folder, exist_ok=True)
+
+    evaluation_file = _option(args, '--evaluation-file')
+    if evaluation_file is not None:
+        with open(evaluation_file) as f:
+            candidates = f.read().split()
+        with open(os.path.join(output_folder, 'merits.txt'), 'w') as f:
+            for i, candidate in enumerate(candidates):
+                f.write('%r\n' % (1. / (1 + len(candidate))))
+                print('Lattice %i/%i' % (i + 1, len(candidates)))
+        return
+    with open(progress_path) as f:
+        for line in f:
+            sys.stdout.write(line)
+            sys.stdout.flush()
+            if delay > 0:
+                time.sleep(delay)
+
+    if output_folder is not None:
+        with open(os.path.join(output_folder, 'outputMachine.txt'), 'w') as f:
+            f.write(output_machine(construction, m, s, interlacing if construction != 'ordinary' else 1))
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -18,12 +18,13 @@ import atexit
 import os
 import shutil
 def _delete_archive():
-    try:
-        os.remove('latnetbuilder-results.tar.gz')
-        os.remove('latnetbuilder-results.zip')
-        shutil.rmtree('latnetbuilder_results', ignore_errors=True)
-    except:
-        pass
+    for folder in ['latnetbuilder_jobs', 'latnetbuilder_results', 'latnetbuilder_code', 'latnetbuilder_portfolio']:
+        shutil.rmtree(folder, ignore_errors=True)
+    for archive in ['latnetbuilder-results.tar.gz', 'latnetbuilder-results.zip']:
+        try:
+            os.remove(archive)
+        except OSError:     # the archive was not created
+            pass
 atexit.register(_delete_archive)
 
 from .gui import gui
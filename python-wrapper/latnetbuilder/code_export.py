@@ -0,0 +1,226 @@
+"""Export of the code which generates the points of a Result, in C, C++, Python, Matlab and R.
+
+The code is rendered from the jinja templates of the folder code_output with Template.generate, and written to a file
+chunk by chunk: the generating matrices and vectors are formatted element by element, so that the code of a point set
+in thousands of dimensions is never held in memory as a single string. Only a truncated preview is returned.
+
+Example:
+    from latnetbuilder.code_export import export_code
+    path, preview, truncated = export_code(search.my_output.result_obj, 'cpp', 'points.cpp')
+"""
+
+import os
+import shutil
+import subprocess
+import tempfile
+
+import numpy as np
+from jinja2 import Environment, PackageLoader
+
+from .sobol_tables import primitive_polynomials
+from .generate_points import generate_points_digital_net, _pack_columns
+
+env = Environment(
+    loader=PackageLoader(__name__.split('.')[0], 'code_output'),    # first argument is package name
+    autoescape=True
+)
+
+PREVIEW_CHARS = 20000
+'''int: number of characters of the exported code kept as a preview'''
+
+ORDINARY_LANGUAGES = [('C code', 'c', 'points.c'), ('Python code', 'python', 'points.py'),
+                      ('Matlab code', 'matlab', 'points.m'), ('R code', 'r', 'points_Rcpp.cpp')]
+NET_LANGUAGES = [('C++11 code', 'cpp', 'points.cpp'), ('C++11 code (fast)', 'cpp-performance', 'points_fast.cpp'),
+                 ('Python code', 'python', 'points.py'), ('R code', 'r', 'points_Rcpp.cpp')]
+
+
+def code_languages(result_obj):
+    '''Return the languages in which the code of the result can be exported, as (title, language, file name) tuples.'''
+    if 'Ordinary' in result_obj.set_type:
+        return ORDINARY_LANGUAGES
+    return NET_LANGUAGES
+
+
+def transform_to_c(List):
+    return str(List).replace('[', ' { ').replace(']', ' } ')
+
+
+def _c_initializer(nested):
+    '''Yield the C++ initializer list of a list (as transform_to_c), in chunks: one chunk per element of the list.'''
+    yield ' { '
+    for k, element in enumerate(nested):
+        if k > 0:
+            yield ', '
+        yield transform_to_c(np.asarray(element).tolist())
+    yield ' } '
+
+
+def _python_matrices(matrices):
+    '''Yield the Python list of the numpy arrays of the generating matrices, in chunks: one chunk per matrix.'''
+    yield '['
+    for k, matrix in enumerate(matrices):
+        if k > 0:
+            yield ', '
+        yield '\n np.array(%s)' % str(np.asarray(matrix).tolist())
+    yield ']'
+
+
+def _until(chunks, marker):
+    '''Yield the chunks up to (excluding) the first occurrence of marker, which can straddle two chunks.'''
+    pending = ''
+    for chunk in chunks:
+        pending = ''.join([pending, chunk])     # not +, which would escape pending if chunk is a Markup string
+        index = pending.find(marker)
+        if index >= 0:
+            yield pending[:index]
+            return
+        keep = len(marker) - 1
+        if len(pending) > keep:
+            yield pending[:len(pending) - keep]
+            pending = pending[len(pending) - keep:]
+    yield pending
+
+
+def _chain(*generators):
+    for generator in generators:
+        for chunk in generator:
+            yield chunk
+
+
+def _packed_columns(columns, word_suffix):
+    '''Yield the C++ initializer of the packed columns of the generating matrices, one chunk per coordinate.'''
+    for j, coordinate_columns in enumerate(columns):
+        yield '    { ' + ', '.join(['0x%x%s' % (int(word), word_suffix) for word in coordinate_columns]) + ' }' + (',\n' if j < len(columns) - 1 else '\n')
+
+
+def _performance_context(result_obj):
+    '''Return the context of the template net_performance_Cpp.txt: the generating matrices packed into words.'''
+    columns, nb_digits = _pack_columns(np.asarray(result_obj.matrices), result_obj.interlacing)
+    if nb_digits <= 32:
+        word_type, word_bits, word_suffix = 'uint32_t', 32, 'u'
+    else:
+        word_type, word_bits, word_suffix = 'uint64_t', 64, 'ull'
+    return {'dim': len(columns), 'm': columns.shape[1], 'nb_points': 2**columns.shape[1], 'nb_digits': nb_digits,
+            'word_type': word_type, 'word_bits': word_bits, 'columns': _packed_columns(columns, word_suffix)}
+
+
+def _net_context(result_obj):
+    '''Return the name of the templates of the net and a function returning their context (with fresh chunk generators).'''
+    if result_obj.set_type == 'Polynomial':
+        return 'polynomial', lambda language: {
+            'mod': result_obj.modulus if language == 'python' else transform_to_c(result_obj.modulus),
+            'genvec': result_obj.gen_vector if language == 'python' else _c_initializer(result_obj.gen_vector),
+            'interlacing': result_obj.interlacing}
+
+    elif result_obj.set_type == 'Sobol':
+        prim_polys = primitive_polynomials(0, result_obj.dim * result_obj.interlacing)
+
+        def context(language):
+            if language == 'python':
+                return {'s': result_obj.dim, 'm': result_obj.nb_cols, 'init_numbers': result_obj.gen_vector,
+                        'prim_polys': prim_polys.tolist(), 'interlacing': result_obj.interlacing}
+            return {'s': result_obj.dim * result_obj.interlacing, 'm': result_obj.nb_cols,
+                    'genvec': _c_initializer(result_obj.gen_vector),
+                    'degrees': str(prim_polys[:, 0].tolist()).strip('[]'),
+                    'representations': str(prim_polys[:, 1].tolist()).strip('[]'),
+                    'interlacing': result_obj.interlacing}
+        return 'sobol', context
+
+    return 'explicit', lambda language: {
+        'matrices': _python_matrices(result_obj.matrices) if language == 'python' else _c_initializer(result_obj.matrices),
+        'interlacing': result_obj.interlacing}
+
+
+def generate_code(result_obj, language):
+    '''Return a generator of the chunks of the code generating the points of the result in the given language
+    (one of the languages of code_languages).'''
+    if 'Ordinary' in result_obj.set_type:
+        context = {'n': result_obj.nb_points, 's': result_obj.dim, 'a': result_obj.gen_vector}
+        if language == 'c':
+            context['a'] = transform_to_c(result_obj.gen_vector)
+            return env.get_template('ordinary_C.txt').generate(context)
+        elif language == 'python':
+            return env.get_template('ordinary_py.txt').generate(context)
+        elif language == 'matlab':
+            return env.get_template('ordinary_matlab.txt').generate(context)
+        elif language == 'r':
+            return _chain(env.get_template('Rcpp_header.txt').generate(), env.get_template('ordinary_Rcpp.txt').generate(context))
+
+    else:
+        name, context = _net_context(result_obj)
+        if language == 'cpp':
+            return env.get_template('%s_Cpp.txt' % name).generate(context('cpp'))
+        elif language == 'cpp-performance':
+            return env.get_template('net_performance_Cpp.txt').generate(_performance_context(result_obj))
+        elif language == 'python':
+            return _chain(env.get_template('%s_py.txt' % name).generate(context('python')),
+                          env.get_template('python_net_suffix.txt').generate())
+        elif language == 'r':
+            # the R code is the C++ code without its main function, followed by an Rcpp function
+            return _chain(env.get_template('Rcpp_header.txt').generate(),
+                          _until(env.get_template('%s_Cpp.txt' % name).generate(context('cpp')), 'int main()'),
+                          env.get_template('%s_Rcpp.txt' % name).generate(context('r')))
+    raise ValueError('the code of a %s point set cannot be exported in %s' % (result_obj.set_type, language))
+
+
+def export_code(result_obj, language, path, preview_chars=PREVIEW_CHARS):
+    '''Write the code generating the points of the result in the given language to the file path, chunk by chunk.
+
+    Returns the path, a preview containing the first preview_chars characters of the code, and True if the preview
+    is truncated.'''
+    folder = os.path.dirname(path)
+    if folder != '' and not os.path.exists(folder):
+        os.makedirs(folder)
+    preview = []
+    preview_length = 0
+    truncated = False
+    with open(path, 'w') as f:
+        for chunk in generate_code(result_obj, language):
+            f.write(chunk)
+            if preview_length < preview_chars:
+                preview.append(chunk[:preview_chars - preview_length])
+                preview_length += len(preview[-1])
+                truncated = truncated or len(chunk) > len(preview[-1])
+            elif len(chunk) > 0:
+                truncated = True
+    return path, ''.join(preview), truncated
+
+
+def check_performance_code(result_obj, start=0, count=None, seed=None, compiler='c++', folder=None):
+    '''Compile and run the fast C++ code of a digital net, and check that its output is bit-exact.
+
+    The points printed by the program (as integers) are compared with the ones of generate_points_digital_net(exact=True):
+    the point at position n in Gray code order must be the point of index n ^ (n >> 1), XORed with the random digital shift
+    printed by the program if seed is not None.
+
+    Arguments:
+        + result_obj: Result instance of a digital net (with at most 64 digits per coordinate)
+        + start, count: positions of the points which are checked (default: all the points)
+        + seed: if not None, seed of the random digital shift
+        + compiler: C++ compiler, called as compiler -O2 -std=c++11 source -o executable
+        + folder: folder of the source and of the executable (default: a temporary folder, deleted afterwards)
+
+    Returns True if all the points are equal, and False otherwise. Raises subprocess.CalledProcessError if the code
+    cannot be compiled or run.'''
+    delete_folder = folder is None
+    if folder is None:
+        folder = tempfile.mkdtemp(prefix='latnetbuilder_')
+    try:
+        source, _, _ = export_code(result_obj, 'cpp-performance', os.path.join(folder, 'points_fast.cpp'))
+        executable = os.path.join(folder, 'points_fast')
+        subprocess.run([compiler, '-O2', '-std=c++11', source, '-o', executable], check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        expected = generate_points_digital_net(result_obj.matrices, result_obj.interlacing, exact=True)
+        if count is None:
+            count = len(expected) - start
+        command = [executable, str(start), str(count), '1'] + ([str(seed)] if seed is not None else [])
+        lines = subprocess.run(command, check=True, stdout=subprocess.PIPE, universal_newlines=True).stdout.splitlines()
+    finally:
+        if delete_folder:
+            shutil.rmtree(folder, ignore_errors=True)
+
+    if seed is not None:
+        shift = np.array([int(word) for word in lines.pop(0).split()[2:]], dtype=np.uint64)
+        expected = expected ^ shift
+    positions = np.arange(start, start + count, dtype=np.uint64)
+    points = np.array([[int(word) for word in line.split()] for line in lines], dtype=np.uint64).reshape(count, -1)
+    return np.array_equal(points, expected[positions ^ (positions >> np.uint64(1))])
@@ -1,40 +1,250 @@
+import os
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from multiprocessing import shared_memory
+
 import numpy as np
 
-def generate_points_ordinary_lattice(gen_vector, nb_points, coordinate=None):
+BLOCK_SIZE = 2**16
+'''int: number of points computed at once by a single task of the point generation'''
+
+def _output_dtype(exact, dtype, out):
+    '''Return the dtype of the points: float64 by default, and an unsigned integer type (uint64 by default) for exact output.
+
+    If an output buffer is given, its dtype is used.'''
+    if out is not None:
+        if dtype is not None and np.dtype(dtype) != out.dtype:
+            raise ValueError('dtype %s does not match the dtype %s of out' % (str(np.dtype(dtype)), str(out.dtype)))
+        dtype = out.dtype
+    if dtype is None:
+        return np.dtype(np.uint64) if exact else np.dtype(np.float64)
+    dtype = np.dtype(dtype)
+    if dtype.kind == 'u' or (dtype.kind == 'f' and not exact):
+        return dtype
+    raise ValueError('dtype must be an unsigned integer type for exact output, or a float type, not %s' % str(dtype))
+
+def _check_exact_fits(nb_bits, dtype):
+    if nb_bits > 8 * dtype.itemsize:
+        raise ValueError('exact output requires %i bits, which do not fit in %s' % (nb_bits, str(dtype)))
+
+def _output_array(out, nb_points, nb_coords, coordinate, dtype):
+    '''Return the output array as a 2-dimensional array of shape (nb_points, nb_coords), and the array to return.
+
+    If out is None, a new array is allocated. Else, out must have the shape of the returned points.'''
+    shape = (nb_points,) if coordinate is not None else (nb_points, nb_coords)
+    if out is None:
+        out = np.empty(shape, dtype=dtype)
+    elif out.shape != shape:
+        raise ValueError('out has shape %s, but the points have shape %s' % (str(out.shape), str(shape)))
     if coordinate is not None:
-        return np.mod(gen_vector[coordinate] * np.arange(nb_points) / nb_points, 1)
-    else:
-        return np.mod(np.outer(np.arange(nb_points), gen_vector) / nb_points, 1)
+        return out[:, np.newaxis], out
+    return out, out
+
+def _lattice_words(a, nb_points, start, out, scratch):
+    '''Compute in out the numerators (i * a) mod nb_points of the points of indices start, ..., start+len(out)-1.
+
+    The products i * a, which overflow 64-bit integers for more than 2^32 points, are never computed: as in the exported
+    Python code, the numerators are obtained by doubling, (i + k) * a mod n being the sum of i * a mod n and k * a mod n
+    minus n if needed, which never overflows for n <= 2^63. scratch is a buffer of the size of out.'''
+    n = np.uint64(nb_points)
+    out[0] = (start * a) % nb_points
+    step, filled = a, 1
+    while filled < len(out):
+        count = min(filled, len(out) - filled)
+        block = out[filled:filled+count]
+        np.add(out[:count], np.uint64(step), out=block)
+        np.subtract(block, n, out=scratch[:count])
+        np.minimum(block, scratch[:count], out=block)    # block - n wraps around to a larger value if block < n
+        filled += count
+        step = 2 * step % nb_points
+
+def generate_points_ordinary_lattice(gen_vector, nb_points, coordinate=None, exact=False, dtype=None, out=None):
+    '''Compute the points of an ordinary lattice from its generating vector.
+
+    Arguments:
+        + gen_vector: generating vector of the lattice
+        + nb_points: number of points of the lattice
+        + coordinate: if not None, only this coordinate is computed and a 1-dimensional array is returned
+        + exact: if True, the points are returned as unsigned integers scaled by nb_points, that is (i * a_j) mod nb_points
+        + dtype: dtype of the output, e.g. np.float32; an unsigned integer type implies exact output (default: float64, or uint64 if exact)
+        + out: if not None, array in which the points are written (and which is returned). Apart from fixed-size
+        scratch buffers, no memory is allocated, so that the points can be regenerated repeatedly in the same buffer.'''
+    dtype = _output_dtype(exact, dtype, out)
+    if nb_points > 2**63:
+        raise ValueError('lattices of more than 2^63 points are not supported')
+    gen_vector = np.asarray(gen_vector, dtype=np.uint64) % np.uint64(nb_points)
+    if coordinate is not None:
+        gen_vector = gen_vector[coordinate:coordinate+1]
+    if dtype.kind == 'u':
+        _check_exact_fits(int(nb_points - 1).bit_length(), dtype)
+    points, result = _output_array(out, nb_points, len(gen_vector), coordinate, dtype)
+
+    # the computation is done with integers, so that the coordinates are exact before the final division
+    n = np.uint64(nb_points)
+    words = np.empty(min(BLOCK_SIZE, nb_points), dtype=np.uint64)
+    scratch = np.empty_like(words)
+    for start in range(0, nb_points, BLOCK_SIZE):
+        size = min(BLOCK_SIZE, nb_points - start)
+        for j, a in enumerate(gen_vector):
+            _lattice_words(int(a), nb_points, start, words[:size], scratch[:size])
+            if dtype.kind == 'u':
+                points[start:start+size, j] = words[:size]
+            else:
+                np.divide(words[:size], n, out=points[start:start+size, j])
+    return result
+
+
+def _pack_columns(matrices, interlacing):
+    '''Pack the generating matrices of each coordinate into unsigned integer words, one word per column.
+
+    The digits of the interlaced components are interleaved: the bit number r * interlacing + c, counted from the
+    most significant bit, of the word of column k of coordinate j is the entry (r, k) of the generating matrix
+    of the component c of coordinate j. Only the 64 most significant digits are kept.
+
+    Returns a numpy array of shape (dim, nb_cols) and dtype uint64, and the number of digits kept.'''
+    nb_components, nb_rows, nb_cols = matrices.shape
+    dim = nb_components // interlacing
+    nb_digits = min(nb_rows * interlacing, 64)
+    digits = np.mod(matrices, 2).reshape(dim, interlacing, nb_rows, nb_cols).transpose(0, 2, 1, 3).reshape(dim, nb_rows * interlacing, nb_cols)[:, :nb_digits, :]
+    weights = np.left_shift(np.uint64(1), np.arange(nb_digits - 1, -1, -1, dtype=np.uint64))
+    columns = np.zeros((dim, nb_cols), dtype=np.uint64)
+    for d in range(nb_digits):
+        columns[digits[:, d, :] == 1] |= weights[d]
+    return columns, nb_digits
 
+def _digital_net_words(columns, start, stop, out):
+    '''Compute in out the output words of the points of indices start, ..., stop-1 of one coordinate.
 
-def all_binary_vectors(m):
-    arrays = [np.array([0, 1]) for i in range(m)]
-    la = len(arrays)
-    dtype = np.result_type(*arrays)
-    arr = np.empty([len(a) for a in arrays] + [la], dtype=dtype)
-    for i, a in enumerate(np.ix_(*arrays)):
-        arr[...,i] = a
-    return np.transpose(arr.reshape(-1, la))
+    The word of the point i is the XOR of the columns k such that the bit k of i is set.
+    The size stop-start of the block must be a power of 2 and start must be a multiple of this size:
+    the word of the first point is computed from the high bits of start, and the others by successive doublings.'''
+    base = np.uint64(0)
+    for k in range(len(columns)):
+        if (start >> k) & 1:
+            base ^= columns[k]
+    out[0] = base
+    filled, k = 1, 0
+    while filled < stop - start:
+        np.bitwise_xor(out[:filled], columns[k], out=out[filled:2*filled])
+        filled *= 2
+        k += 1
 
-def generate_points_digital_net(matrices, interlacing, coordinate=None, level=None):
-    dim = len(matrices) // interlacing
-    m = len(matrices[0])
-    mult = np.logspace(-1, -(m-1)*interlacing - 1, num=m, endpoint=True, base=2)
-    mult2 = np.logspace(0, -interlacing+1, num=interlacing, base=2)
-    powers_of_2 = np.outer(mult2, mult)
+def _digital_net_block(columns, scale, coords, start, stop, out, words=None):
+    '''Compute the points of indices start, ..., stop-1 for the coordinates in coords.
 
+    The coordinate coords[j] of these points is written in out[start:stop, j]: the output words are multiplied
+    by scale, or copied as they are if scale is None (exact output).
+    Only one word per point of the block is kept in memory, in the scratch buffer words if it is given.'''
+    if words is None:
+        words = np.empty(stop - start, dtype=np.uint64)
+    words = words[:stop - start]
+    for j, coord in enumerate(coords):
+        _digital_net_words(columns[coord], start, stop, words)
+        if scale is None:
+            out[start:stop, j] = words
+        else:
+            np.multiply(words, scale, out=out[start:stop, j])
+
+def _split_tasks(coords, nb_points, workers):
+    '''Split the work into blocks of coordinates and blocks of point indices.
+
+    There are about four tasks per worker, so that the load is balanced between workers.'''
+    nb_coord_blocks = max(1, min(len(coords), 4 * workers))
+    coord_blocks = [block for block in np.array_split(np.arange(len(coords)), nb_coord_blocks) if len(block) > 0]
+    # the blocks of indices must be aligned on a power of 2 (see _digital_net_words)
+    index_block_size = min(BLOCK_SIZE, nb_points, max(1, (nb_points * len(coord_blocks)) // (4 * workers)))
+    index_block_size = 2**(index_block_size.bit_length() - 1)
+    return [(coord_block, start, min(start + index_block_size, nb_points))
+            for coord_block in coord_blocks for start in range(0, nb_points, index_block_size)]
+
+_worker_state = {}
+
+def _init_process_worker(columns, scale, coords, shm_name, shape, dtype):
+    shm = shared_memory.SharedMemory(name=shm_name)
+    _worker_state['shm'] = shm     # keep a reference, otherwise the shared memory is unmapped
+    _worker_state['args'] = (columns, scale, coords)
+    _worker_state['out'] = np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+
+def _process_task(coord_block, start, stop):
+    columns, scale, coords = _worker_state['args']
+    out = _worker_state['out'][:, coord_block[0]:coord_block[-1]+1]
+    _digital_net_block(columns, scale, coords[coord_block], start, stop, out)
+
+def _generate_in_parallel(columns, scale, coords, out, workers, pool):
+    shape = out.shape
+    dtype = out.dtype
+    nb_points = shape[0]
+    tasks = _split_tasks(coords, nb_points, workers)
+
+    if pool == 'thread':
+        def thread_task(coord_block, start, stop):
+            _digital_net_block(columns, scale, coords[coord_block], start, stop,
+                               out[:, coord_block[0]:coord_block[-1]+1])
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            for future in [executor.submit(thread_task, *task) for task in tasks]:
+                future.result()
+
+    elif pool == 'process':
+        shm = shared_memory.SharedMemory(create=True, size=max(1, nb_points * len(coords) * dtype.itemsize))
+        try:
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_process_worker,
+                                     initargs=(columns, scale, coords, shm.name, shape, dtype)) as executor:
+                for future in [executor.submit(_process_task, *task) for task in tasks]:
+                    future.result()
+            out[...] = np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+        finally:
+            shm.close()
+            shm.unlink()
+
+    else:
+        raise ValueError("pool must be 'thread' or 'process', not %s" % str(pool))
+
+def generate_points_digital_net(matrices, interlacing, coordinate=None, level=None, exact=False, dtype=None, out=None, workers=None, pool='thread'):
+    '''Compute the points of a digital net from its generating matrices.
+
+    The generating matrices of each (possibly interlaced) coordinate are packed into 64-bit words, and the
+    interleaved output word of each point is obtained directly by XORing these words: no binary expansion of the
+    points is stored, and the memory footprint is the one of the output array.
+
+    Arguments:
+        + matrices: numpy array of shape (dim * interlacing, nb_rows, nb_cols) containing the generating matrices
+        + interlacing: interlacing factor of the net
+        + coordinate: if not None, only this coordinate is computed and a 1-dimensional array is returned
+        + level: if not None, only the first 2^level points are computed (for embedded nets)
+        + exact: if True, the points are returned as unsigned integers scaled by 2^(nb_rows * interlacing), that is
+        the digits of the points (at most 64 digits)
+        + dtype: dtype of the output, e.g. np.float32; an unsigned integer type implies exact output (default: float64, or uint64 if exact)
+        + out: if not None, array in which the points are written (and which is returned). Apart from fixed-size
+        scratch buffers, no memory is allocated, so that the points can be regenerated repeatedly in the same buffer.
+        + workers: number of workers used to compute the points. If None or 1, the computation is done in the calling thread.
+        A value of 0 means one worker per CPU.
+        + pool: 'thread' or 'process'. The work is split by blocks of coordinates and blocks of point indices between
+        the workers of a thread pool, or of a process pool writing into a shared memory array.'''
+    dtype = _output_dtype(exact, dtype, out)
+    matrices = np.asarray(matrices)
+    m = matrices.shape[2]
     if level is not None:
         m = level
-    
+    columns, nb_digits = _pack_columns(matrices[:, :, :m], interlacing)
+    if dtype.kind == 'u':
+        _check_exact_fits(matrices.shape[1] * interlacing, dtype)
+        scale = None
+    else:
+        scale = 2.0**(-nb_digits)
+    dim = len(columns)
+    nb_points = 2**m
+
     if coordinate is None:
-        binary_decomp_points = np.mod(np.dot(matrices[:,:,:m], all_binary_vectors(m)[::-1,:]), 2)
-        points = np.zeros(shape=(2**m, dim))
-        for coord in range(0, dim):
-            projected_binary_decomp_points = binary_decomp_points[coord*interlacing : (coord+1)*interlacing]
-            points[:, coord] = np.einsum('ijk,ij->k', projected_binary_decomp_points, powers_of_2)
-        return points
-    
+        coords = np.arange(dim)
     else:
-        binary_decomp_points = np.mod(np.dot(matrices[coordinate*interlacing : (coordinate+1)*interlacing,:,:m], all_binary_vectors(m)[::-1,:]), 2)
-        return np.einsum('ijk,ij->k', binary_decomp_points, powers_of_2)
+        coords = np.array([coordinate])
 
+    points, result = _output_array(out, nb_points, len(coords), coordinate, dtype)
+    if workers == 0:
+        workers = os.cpu_count() or 1
+    if workers is None or workers == 1:
+        words = np.empty(min(BLOCK_SIZE, nb_points), dtype=np.uint64)
+        for start in range(0, nb_points, BLOCK_SIZE):
+            _digital_net_block(columns, scale, coords, start, min(start + BLOCK_SIZE, nb_points), points, words)
+    else:
+        _generate_in_parallel(columns, scale, coords, points, workers, pool)
+    return result
@@ -13,6 +13,7 @@ from .progress_bars import progress_bars
 from .main_tab import change_maintab
 from .common import BaseGUIElement
 from .lattice_type import lattice_type
+from .jobs import jobs
 
 
 class GUI():
@@ -32,7 +33,8 @@ class GUI():
                  exploration_method,
                  button_box,
                  output,
-                 progress_bars):
+                 progress_bars,
+                 jobs):
         self.lattice_type = lattice_type
         self.properties = properties
         self.figure_of_merit = figure_of_merit
@@ -42,6 +44,7 @@ class GUI():
         self.button_box = button_box
         self.output = output
         self.progress_bars = progress_bars
+        self.jobs = jobs
         self.search = None
 
         self.link_all_callbacks()
@@ -57,6 +60,8 @@ class GUI():
         self.exploration_method.link_on_click_callbacks(self)
         self.button_box.link_callbacks(self)
         self.button_box.link_on_click_callbacks(self)
+        self.jobs.link_callbacks(self)
+        self.jobs.link_on_click_callbacks(self)
 
     def _ipython_display_(self):
         """For proper display in the Jupyter notebook.
@@ -65,7 +70,7 @@ class GUI():
         display(self.main_tab)
 
 gui = GUI(lattice_type(), properties(), figure_of_merit(), weights(),
-          construction_method(), exploration_method(), button_box(), output(), progress_bars())
+          construction_method(), exploration_method(), button_box(), output(), progress_bars(), jobs())
 
 # add default order-dependent weights in the interface at start up.
 func_add_weights({'name':'label', 'new':'Order-Dependent'}, gui)
@@ -78,9 +83,12 @@ inside_tab = widgets.VBox([gui.lattice_type.main,
                 gui.figure_of_merit.main, 
                 gui.weights.main,
                 gui.button_box.main,
+                gui.jobs.main,
                 gui.output.command_line_out,
                 gui.progress_bars.progress_bar_dim,
                 gui.progress_bars.progress_bar_nets,
+                gui.progress_bars.eta,
+                gui.progress_bars.merit_chart.main,
                 gui.output.result_html, 
                 gui.output.file_link,
                 gui.output.output
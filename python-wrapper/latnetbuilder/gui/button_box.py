@@ -3,6 +3,7 @@ import threading
 import os
 import shutil
 import signal
+import shlex
 
 from .parse_input import parse_input
 from .common import ParsingException, BaseGUIElement
@@ -11,19 +12,20 @@ def build_command_line(change, gui):
     try:
         s = parse_input(gui)
         command = s.construct_command_line()
-        gui.output.command_line_out.value = ' '.join([s if s is not None else '' for s in command])
+        gui.output.command_line_out.value = ' '.join([shlex.quote(s) if s is not None else '' for s in command])
     except ParsingException as e:
         gui.output.command_line_out.value = '<span style="color:red"> PARSING ERROR: ' + str(e) + '</span>'
     except Exception as e:
         gui.output.command_line_out.value = '<span style="color:red"> ERROR: ' + str(e) + '<br>Please contact the developers to report this error.</span>'
 
-def abort_process(change, process):
+def abort_process(change, search, process):
     '''Callback fired when the user clicks the Abort button.
     
-    The second argument is the subprocess instance which is terminated if the Abort toggle button is set to True.'''
+    The last argument is the subprocess instance launched by search, which is terminated with its process group
+    if the Abort toggle button is set to True.'''
 
     if change['name'] == 'value' and change['new'] == True:
-        process.kill()
+        search._kill_process(process)
 
 def on_click_search(change, gui):
     '''Callback fired when the user clicks the Search button.'''
@@ -48,6 +50,8 @@ def on_click_search(change, gui):
     if 'evaluation' not in s.exploration_method:
         gui.progress_bars.progress_bar_nets.value = 0
         gui.progress_bars.progress_bar_nets.layout.display = 'flex'
+    gui.progress_bars.eta.value = ''
+    gui.progress_bars.eta.layout.display = 'flex'
 
     # reset output and button box to sensible values
     gui.output.command_line_out.value = ''
@@ -74,7 +78,7 @@ def on_click_search(change, gui):
     gui.process = process
 
     # register the callback to abort the process
-    gui.button_box.abort.observe(lambda change: abort_process(change, process))
+    gui.button_box.abort.observe(lambda change: abort_process(change, s, process))
 
     # launch the thread that will monitor the process, and update the GUI accordingly
     thread = threading.Thread(target=s._monitor_process, args=(process, stdout_filepath, stderr_filepath, gui, False, True))
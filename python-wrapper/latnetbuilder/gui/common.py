@@ -1,28 +1,9 @@
 """Tools used by different elements of the GUI."""
 
-from pkg_resources import resource_string
-
 import numpy as np
 
-MAX_DIM_JOE_KUO = 300   # max dim of Joe and Kuo nets loaded in memory
 INITIAL_DIM = 3     # default dimension for the GUI
 
-# primitive polynomials - necessary for sobol net output
-_primPolyRaw = resource_string(__name__, '../data/primitive_polynomials.csv').decode("utf-8")
-
-# joe and kuo sobol nets - necessary for sobol net interface
-JoeKuoSobolNetsRaw = resource_string(__name__, '../data/JoeKuoSobolNets.csv').decode("utf-8")
-
-JoeKuoSobolNets = []
-lines = JoeKuoSobolNetsRaw.split('\r\n')
-i=0
-for line in lines:
-    if len(line) > 0 and line[0].isdigit():
-        i+=1
-        JoeKuoSobolNets.append(line)
-        if i == MAX_DIM_JOE_KUO:
-            break
-
 style_default = {'description_width': 'initial'}
 
 def parse_polynomial(s):
@@ -0,0 +1,66 @@
+"""Worker threads for the heavy work of the GUI callbacks.
+
+The callbacks of the widgets run on the thread which handles the messages of the notebook: a callback which generates
+points, draws a figure or renders code templates freezes the notebook until it returns. The callbacks submit this work
+to a CoalescingExecutor instead, and return at once.
+
+Requests are coalesced by key: when several requests with the same key are submitted before the first one starts
+(e.g. when a coordinate is changed quickly several times), only the latest one is computed, and the result of a
+request is only applied if no newer request with the same key was submitted in the meantime.
+"""
+
+import threading
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+
+MAX_WORKERS = 2
+'''int: number of worker threads of the executor of the GUI'''
+
+
+class CoalescingExecutor():
+    '''Pool of worker threads which runs the latest request of each key.
+
+    Arguments:
+        + max_workers: number of worker threads'''
+
+    def __init__(self, max_workers=MAX_WORKERS):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='latnetbuilder-gui')
+        self._latest = {}
+        self._lock = threading.Lock()
+
+    def submit(self, key, compute, apply=None, error=None):
+        '''Submit a request and return its future.
+
+        Arguments:
+            + key: hashable identifying what the request updates, e.g. (id(widget), 'plot')
+            + compute: function without arguments doing the heavy work, called in a worker thread
+            + apply: if not None, function called in the worker thread with the result of compute, unless a newer request
+            with the same key was submitted in the meantime (typically it sets the value of widgets)
+            + error: if not None, function called with the exception and the formatted traceback if compute or apply
+            raises an exception'''
+        with self._lock:
+            generation = self._latest.get(key, 0) + 1
+            self._latest[key] = generation
+        return self._executor.submit(self._run, key, generation, compute, apply, error)
+
+    def is_latest(self, key, generation):
+        with self._lock:
+            return self._latest.get(key) == generation
+
+    def _run(self, key, generation, compute, apply, error):
+        if not self.is_latest(key, generation):     # superseded before it started
+            return None
+        try:
+            result = compute()
+            if apply is not None and self.is_latest(key, generation):
+                apply(result)
+            return result
+        except Exception as e:
+            if error is not None:
+                error(e, traceback.format_exc())
+            else:
+                raise
+
+
+executor = CoalescingExecutor()
+'''CoalescingExecutor: executor shared by the outputs of the GUI'''
@@ -1,9 +1,11 @@
 import ipywidgets as widgets
 
-from .common import style_default, INITIAL_DIM, JoeKuoSobolNets, BaseGUIElement
+from .common import style_default, INITIAL_DIM, BaseGUIElement
+from .vector_input import VectorInput
+from ..sobol_tables import joe_kuo_direction_numbers, nb_joe_kuo_coordinates
 
 explr_data = {
-    'lat-eval': '<p> A given generating vector \\(a = (a_1, ..., a_s)\\) is specified in the boxes below. </p>\
+    'lat-eval': '<p> A given generating vector \\(a = (a_1, ..., a_s)\\) is specified in the box below, as a comma-separated list. </p>\
     <p> Two possibilities are given: </p> \
     <ul>\
     <li> simply evaluate the figure of merit for the lattice defined by this generating vector </li>\
@@ -86,7 +88,13 @@ def trigger_is_random(change, gui):
         gui.exploration_method.number_samples.layout.display = 'none'
 
 def automatic_generating_numbers_sobol(change, gui):
-    gui.exploration_method.generating_numbers_sobol.value = '\n'.join(JoeKuoSobolNets[:(gui.properties.dimension.value * gui.properties.interlacing.value)])
+    nb_coords = min(gui.properties.dimension.value * gui.properties.interlacing.value, nb_joe_kuo_coordinates())
+    direction_numbers = joe_kuo_direction_numbers(0, nb_coords)
+    gui.exploration_method.generating_numbers_sobol.value = '\n'.join([','.join(map(str, numbers)) for numbers in direction_numbers])
+
+def fill_vector(form, values):
+    '''Replace the first values of a VectorInput, and keep the following ones.'''
+    form.set_values(values + form.values[len(values):])
 
 def fill_from_previous_search(change, gui):
     done = False
@@ -95,8 +103,7 @@ def fill_from_previous_search(change, gui):
         if 'digital' in gui.search.search_type() and gui.main_tab.selected_index == 1:
             if gui.search.search_type() == 'digital-polynomial' and gui.construction_method.construction_choice.value == 'polynomial':
                 done = True
-                for k in range(int(gui.search.dimension)):
-                    gui.exploration_method.generating_vector_simple.children[k].value = "".join(list(map(str, result.gen_vector[k])))
+                fill_vector(gui.exploration_method.generating_vector_simple, ["".join(list(map(str, result.gen_vector[k]))) for k in range(int(gui.search.dimension))])
 
             elif gui.search.search_type() == 'digital-sobol' and gui.construction_method.construction_choice.value == 'sobol':
                 done = True
@@ -109,12 +116,10 @@ def fill_from_previous_search(change, gui):
         if gui.main_tab.selected_index == 0 and gui.lattice_type.type_choice.value == gui.search.search_type():
             if gui.lattice_type.type_choice.value == 'ordinary':
                 done = True
-                for k in range(int(gui.search.dimension)):
-                    gui.exploration_method.generating_vector.children[0].children[k].value = str(result.gen_vector[k])
+                fill_vector(gui.exploration_method.generating_vector.children[0], [str(result.gen_vector[k]) for k in range(int(gui.search.dimension))])
             else:
                 done = True
-                for k in range(int(gui.search.dimension)):
-                    gui.exploration_method.generating_vector.children[0].children[k].value = "".join(list(map(str, result.gen_vector[k])))
+                fill_vector(gui.exploration_method.generating_vector.children[0], ["".join(list(map(str, result.gen_vector[k]))) for k in range(int(gui.search.dimension))])
     if done:
         gui.exploration_method.from_previous_search_warning.layout.display = 'none'
     else:
@@ -148,15 +153,13 @@ def exploration_method():
     from_previous_search = widgets.Button(description='Evaluate from previous search', style=style_default, layout=widgets.Layout(width='200px', display='none', margin='40px 0px 0px 0px'))
     from_previous_search_warning = widgets.HTML(value='<span style="color:red"> The search result and the current point set type /<br> construction method do not match. </span>', layout=widgets.Layout(display='none'))
 
-    generating_vector_simple = widgets.HBox(
-            [widgets.Text(value='1', description='', 
-            layout=widgets.Layout(width='100px'), style=style_default) for k in range(INITIAL_DIM)],
-            layout=widgets.Layout(display='none'))
+    generating_vector_simple = VectorInput(['1'] * INITIAL_DIM, width='inherit',
+            placeholder='One component per coordinate, separated by commas, e.g. 1, 101, 1101')
+    generating_vector_simple.layout.display = 'none'
 
     generating_vector = widgets.VBox([
-        widgets.HBox(
-            [widgets.Text(value='1', description='', 
-            layout=widgets.Layout(width='100px'), style=style_default) for k in range(INITIAL_DIM)]),
+        VectorInput(['1'] * INITIAL_DIM, width='inherit',
+            placeholder='One component per coordinate, separated by commas, e.g. 1, 7, 13'),
         widgets.Text(placeholder='e.g. 2^8 or 256', description='If you want to extend, please specify the former modulus:',
                     layout=widgets.Layout(width='600px'), style=style_default)
     ],
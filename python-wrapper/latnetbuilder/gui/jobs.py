@@ -0,0 +1,313 @@
+"""Panel of the GUI which runs several searches concurrently.
+
+The searches queued from the panel are jobs of a JobManager, which runs at most max_workers of them at the same time
+(the other ones wait in a FIFO queue). Each job writes in its own output folder latnetbuilder_jobs/job-<id>, archived
+as latnetbuilder_jobs/job-<id>.tar.gz when the job is done, so that concurrent searches never overwrite each other's
+files. The panel shows a table which compares the jobs side by side: parameters, status, progress, merit and wall time.
+"""
+
+import html
+import os
+import shutil
+import tarfile
+import threading
+import time
+import traceback
+from collections import deque
+
+import ipywidgets as widgets
+from IPython.display import FileLink
+
+from .common import style_default, BaseGUIElement, ParsingException
+from .parse_input import parse_input
+from .output import create_output
+from ..progress import format_duration
+
+JOBS_FOLDER = 'latnetbuilder_jobs'
+'''str: folder containing the output folders and the archives of the jobs'''
+
+MAX_WORKERS = 2
+'''int: default number of jobs running at the same time'''
+
+REFRESH_INTERVAL = 0.5
+'''float: minimum time in seconds between two notifications of the progress of a job'''
+
+QUEUED = 'queued'
+RUNNING = 'running'
+FINISHED = 'finished'
+FAILED = 'failed'
+ABORTED = 'aborted'
+
+
+class SearchJob():
+    '''A search run by a JobManager.
+
+    Attributes:
+        + job_id: index of the job in its JobManager
+        + search: Search instance, whose output folder is the folder of the job
+        + status: QUEUED, RUNNING, FINISHED, FAILED or ABORTED
+        + tracker: ProgressTracker of the search, once it has started
+        + result: Result instance of a finished job
+        + error: error output of a failed job
+        + archive: path of the archive of the output folder, once the job is done
+        + start_time, end_time: times at which the search started and ended'''
+
+    def __init__(self, job_id, search, folder):
+        self.job_id = job_id
+        self.search = search
+        self.search._output_folder = os.path.join(folder, 'job-%i' % job_id)
+        self.status = QUEUED
+        self.tracker = None
+        self.result = None
+        self.error = ''
+        self.archive = None
+        self.start_time = None
+        self.end_time = None
+        self.process = None
+        self._abort = False
+        self._last_notification = 0.
+
+    def wall_time(self):
+        '''Return the wall time of the job in seconds (so far if it is running), or None if it has not started.'''
+        if self.start_time is None:
+            return None
+        return (self.end_time if self.end_time is not None else time.time()) - self.start_time
+
+    def merit(self):
+        '''Return the merit of the result, or the best merit found so far if the job is running.'''
+        if self.result is not None:
+            return self.result.merit
+        if self.tracker is not None:
+            return self.tracker.best_merit
+        return None
+
+
+class JobManager():
+    '''Run searches in separate threads, with at most max_workers C++ processes at the same time.
+
+    Arguments:
+        + max_workers: maximum number of jobs running at the same time
+        + folder: folder containing the output folders and the archives of the jobs
+        + on_change: if not None, function called with the job when a job changes status, and when it makes progress
+        (at most once per REFRESH_INTERVAL for each job)'''
+
+    def __init__(self, max_workers=MAX_WORKERS, folder=JOBS_FOLDER, on_change=None):
+        self.max_workers = max_workers
+        self.folder = folder
+        self.on_change = on_change
+        self.jobs = []
+        self._queue = deque()
+        self._running = 0
+        self._lock = threading.Lock()
+
+    def submit(self, search):
+        '''Queue a search and return its SearchJob. The search starts as soon as a worker is available.'''
+        with self._lock:
+            job = SearchJob(len(self.jobs), search, self.folder)
+            self.jobs.append(job)
+            self._queue.append(job)
+        self._notify(job)
+        self._dispatch()
+        return job
+
+    def set_max_workers(self, max_workers):
+        '''Change the maximum number of jobs running at the same time; running jobs are never interrupted.'''
+        self.max_workers = max_workers
+        self._dispatch()
+
+    def abort(self, job):
+        '''Abort a queued or running job.'''
+        process = None
+        with self._lock:
+            if job.status == QUEUED:
+                self._queue.remove(job)
+                job.status = ABORTED
+            elif job.status == RUNNING:
+                job._abort = True
+                process = job.process
+        if process is not None:
+            job.search._kill_process(process)
+        self._notify(job)
+
+    def _notify(self, job, force=True):
+        if self.on_change is None:
+            return
+        now = time.time()
+        if force or now - job._last_notification >= REFRESH_INTERVAL:
+            job._last_notification = now
+            self.on_change(job)
+
+    def _dispatch(self):
+        '''Start queued jobs while fewer than max_workers jobs are running.'''
+        started = []
+        with self._lock:
+            while len(self._queue) > 0 and self._running < self.max_workers:
+                job = self._queue.popleft()
+                job.status = RUNNING
+                job.start_time = time.time()
+                self._running += 1
+                started.append(job)
+        for job in started:
+            self._notify(job)
+            threading.Thread(target=self._run, args=(job,), daemon=True).start()
+
+    def _on_progress(self, job, tracker):
+        job.tracker = tracker
+        self._notify(job, force=False)
+
+    def _run(self, job):
+        '''Run the search of a job, and archive its output folder.'''
+        search = job.search
+        try:
+            if os.path.exists(search._output_folder):
+                shutil.rmtree(search._output_folder, ignore_errors=True)
+            os.makedirs(search._output_folder)
+            stdout_filepath = os.path.join(search._output_folder, 'cpp_outfile.txt')
+            stderr_filepath = os.path.join(search._output_folder, 'cpp_errfile.txt')
+            with open(stdout_filepath, 'w') as stdout_file, open(stderr_filepath, 'w') as stderr_file:
+                process = search._launch_subprocess(stdout_file, stderr_file)
+            with self._lock:
+                job.process = process
+                aborted = job._abort
+            if aborted:     # aborted while the process was launched
+                search._kill_process(process)
+            search._monitor_process(process, stdout_filepath, stderr_filepath, delete_files=False,
+                                    progress_callbacks=[lambda event, tracker: self._on_progress(job, tracker)], verbose=False)
+            job.tracker = search.progress
+            if search.my_output is not None and search.my_output.result_obj is not None:
+                job.result = search.my_output.result_obj
+                job.status = FINISHED
+            else:
+                with open(stderr_filepath) as f:
+                    job.error = f.read()
+                job.status = ABORTED if job._abort else FAILED
+            job.archive = search._output_folder + '.tar.gz'
+            with tarfile.open(job.archive, 'w:gz') as tar:
+                tar.add(search._output_folder, arcname=os.path.basename(search._output_folder))
+        except Exception:
+            job.error += traceback.format_exc()
+            job.status = FAILED
+        finally:
+            job.end_time = time.time()
+            with self._lock:
+                self._running -= 1
+            self._notify(job)
+            self._dispatch()
+
+
+_status_colors = {QUEUED: 'gray', RUNNING: 'blue', FINISHED: 'green', FAILED: 'red', ABORTED: 'orange'}
+
+
+def _job_row(job):
+    '''Return the row of the job in the comparison table, as a list of HTML cells.'''
+    search = job.search
+    if job.status == RUNNING and job.tracker is not None:
+        progress = job.tracker.summary()
+    elif job.status == FAILED:
+        progress = job.error.strip().split('\n')[-1] if job.error.strip() != '' else ''
+    else:
+        progress = ''
+    merit = job.merit()
+    wall_time = job.wall_time()
+    # FileLink prefixes the path with files/, which the notebook server serves (as for the exported code)
+    archive = FileLink(job.archive, result_html_suffix='')._repr_html_() \
+        if job.archive is not None and os.path.exists(job.archive) else ''
+    return [str(job.job_id),
+            html.escape('%s %s' % (search.set_type_name, search.construction)),
+            html.escape(search.modulus if search.modulus != '' else 'default'),
+            str(search.dimension),
+            html.escape(search.exploration_method),
+            html.escape(search.figure_of_merit),
+            '<span style="color:%s">%s</span>' % (_status_colors[job.status], job.status),
+            html.escape(progress),
+            str(merit) if merit is not None else '',
+            format_duration(wall_time) if wall_time is not None else '',
+            archive]
+
+
+def jobs_table(jobs):
+    '''Return the HTML table comparing the jobs side by side.'''
+    header = ['Job', 'Point set', 'Modulus', 'Dimension', 'Exploration', 'Figure of merit', 'Status', 'Progress',
+              'Merit', 'Wall time', 'Archive']
+    rows = ['<tr>%s</tr>' % ''.join(['<th style="text-align:left">%s</th>' % cell for cell in header])]
+    for job in jobs:
+        rows.append('<tr>%s</tr>' % ''.join(['<td style="text-align:left">%s</td>' % cell for cell in _job_row(job)]))
+    return '<table>%s</table>' % ''.join(rows)
+
+
+def queue_search(change, gui):
+    '''Callback fired when the user clicks the Queue search button.'''
+    try:
+        s = parse_input(gui)
+    except ParsingException as e:
+        gui.jobs.message.value = '<span style="color:red"> PARSING ERROR: ' + str(e) + '</span>'
+        return
+    except Exception as e:
+        gui.jobs.message.value = '<span style="color:red"> ERROR: ' + str(e) + '<br>Please contact the developers to report this error.</span>'
+        return
+    gui.jobs.message.value = ''
+    job = gui.jobs.manager.submit(s)
+    gui.jobs.job_choice.options = [('Job %i' % other.job_id, other.job_id) for other in gui.jobs.manager.jobs]
+    gui.jobs.job_choice.value = job.job_id
+
+def change_max_workers(change, gui):
+    if change['name'] != 'value':
+        return
+    gui.jobs.manager.set_max_workers(change['new'])
+
+def abort_job(change, gui):
+    if gui.jobs.job_choice.value is None:
+        return
+    gui.jobs.manager.abort(gui.jobs.manager.jobs[gui.jobs.job_choice.value])
+
+def show_job_result(change, gui):
+    '''Display the result of the selected job in the output of the GUI (plots, projections and code).'''
+    if gui.jobs.job_choice.value is None:
+        return
+    job = gui.jobs.manager.jobs[gui.jobs.job_choice.value]
+    if job.result is None:
+        gui.jobs.message.value = 'Job %i has no result (status: %s).' % (job.job_id, job.status)
+        return
+    gui.jobs.message.value = ''
+    gui.search = job.search
+    gui.output.result_html.value = job.result._repr_html_()
+    gui.output.result_obj = job.result
+    create_output(gui.output)
+
+
+def jobs():
+    queue = widgets.Button(description='Queue search', tooltip='Run the search in the background, next to the other jobs')
+    max_workers = widgets.BoundedIntText(value=MAX_WORKERS, min=1, max=max(os.cpu_count() or 1, MAX_WORKERS),
+                                         description='Concurrent searches:', style=style_default,
+                                         layout=widgets.Layout(width='200px'))
+    message = widgets.HTML('')
+    table = widgets.HTML('')
+    job_choice = widgets.Dropdown(options=[], description='Job:', layout=widgets.Layout(width='200px'))
+    abort = widgets.Button(description='Abort job', button_style='warning')
+    show_result = widgets.Button(description='Show result')
+
+    lock = threading.Lock()
+
+    def refresh(job):
+        with lock:
+            table.value = jobs_table(manager.jobs)
+    manager = JobManager(max_workers.value, on_change=refresh)
+
+    jobs_wrapper = widgets.Accordion([widgets.VBox([widgets.HBox([queue, max_workers]), message, table,
+                                                    widgets.HBox([job_choice, abort, show_result])])])
+    jobs_wrapper.set_title(0, 'Jobs (concurrent searches)')
+    jobs_wrapper.selected_index = None
+
+    return BaseGUIElement(queue=queue,
+                          max_workers=max_workers,
+                          message=message,
+                          table=table,
+                          job_choice=job_choice,
+                          abort=abort,
+                          show_result=show_result,
+                          manager=manager,
+                          main=jobs_wrapper,
+                          _callbacks={'max_workers': change_max_workers},
+                          _on_click_callbacks={'queue': queue_search,
+                                               'abort': abort_job,
+                                               'show_result': show_job_result})
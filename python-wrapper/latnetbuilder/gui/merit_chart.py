@@ -0,0 +1,132 @@
+"""Live chart of the best merit of a running search.
+
+The chart is fed by the progress events of the search: MeritChart.record is a callback of the ProgressTracker (see the
+module progress). Each change of the best merit is recorded, with the elapsed time and the number of nets explored,
+in a ring buffer of bounded size, so that long searches use a constant amount of memory. The chart is redrawn at most
+once per frame interval, in a worker thread of the executor of the GUI, so that the monitoring of the search is never
+slowed down by the drawing.
+"""
+
+import io
+import threading
+import time
+from collections import deque
+
+import ipywidgets as widgets
+import numpy as np
+from matplotlib.figure import Figure
+
+from .executor import executor
+
+HISTORY_SIZE = 4096
+'''int: number of changes of the best merit kept by a MeritHistory (the oldest ones are dropped first)'''
+
+FRAME_INTERVAL = 1.
+'''float: minimum time in seconds between two redraws of a MeritChart'''
+
+
+class MeritHistory():
+    '''Ring buffer of the changes of the best merit of a search.
+
+    Each change is recorded as the elapsed time in seconds, the number of nets explored and the new best merit.
+
+    Arguments:
+        + size: maximum number of changes kept
+
+    Attributes:
+        + last_time, last_explored: elapsed time and number of nets explored at the last progress event'''
+
+    def __init__(self, size=HISTORY_SIZE):
+        self._changes = deque(maxlen=size)
+        self._lock = threading.Lock()
+        self.last_time = 0.
+        self.last_explored = 0
+
+    def record(self, event, tracker):
+        '''Record a progress event of the tracker; this is a callback of ProgressTracker.'''
+        elapsed = event.time - tracker.start_time if event.time is not None else 0.
+        with self._lock:
+            self.last_time = elapsed
+            self.last_explored = tracker.explored()
+            merit = tracker.best_merit
+            if merit is not None and (len(self._changes) == 0 or self._changes[-1][2] != merit):
+                self._changes.append((elapsed, self.last_explored, merit))
+
+    def snapshot(self):
+        '''Return the arrays times, explored and merits of the changes, followed by the last event (with the last merit),
+        so that the step curve extends to the current time.'''
+        with self._lock:
+            changes = list(self._changes)
+            if len(changes) > 0:
+                changes.append((self.last_time, self.last_explored, changes[-1][2]))
+        if len(changes) == 0:
+            return np.zeros(0), np.zeros(0), np.zeros(0)
+        times, explored, merits = np.array(changes, dtype=np.float64).T
+        return times, explored, merits
+
+    def __len__(self):
+        return len(self._changes)
+
+
+def render_history(history):
+    '''Draw the best merit against the elapsed time and against the number of nets explored, and return a PNG image.'''
+    times, explored, merits = history.snapshot()
+    fig = Figure(figsize=(10, 3.5))
+    for k, (x, label) in enumerate([(times, 'Elapsed time (s)'), (explored, 'Nets explored')]):
+        ax = fig.add_subplot(1, 2, k + 1)
+        if len(merits) > 0:
+            ax.step(x, merits, where='post')
+            ax.plot(x[:-1], merits[:-1], 'o', markersize=3)
+            if np.all(merits > 0):
+                ax.set_yscale('log')
+        ax.set_xlabel(label)
+        ax.set_ylabel('Best merit')
+        ax.grid(True, alpha=0.3)
+    fig.tight_layout()
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format='png')
+    return buffer.getvalue()
+
+
+class MeritChart():
+    '''Widget showing the live chart of a MeritHistory.
+
+    Arguments:
+        + frame_interval: minimum time in seconds between two redraws
+        + history_size: size of the ring buffer of the history'''
+
+    def __init__(self, frame_interval=FRAME_INTERVAL, history_size=HISTORY_SIZE):
+        self.frame_interval = frame_interval
+        self.history_size = history_size
+        self.history = MeritHistory(history_size)
+        self.image = widgets.Image(format='png')
+        self.label = widgets.Label(value='')
+        self.main = widgets.VBox([self.label, self.image], layout=widgets.Layout(display='none'))
+        self._last_draw = 0.
+
+    def reset(self):
+        '''Start a new history (at the launch of a search).'''
+        self.history = MeritHistory(self.history_size)
+        self._last_draw = 0.
+        self.label.value = 'Waiting for the first merit...'
+
+    def record(self, event, tracker):
+        '''Record a progress event and redraw the chart if the last redraw is older than the frame interval;
+        this is a callback of ProgressTracker.'''
+        self.history.record(event, tracker)
+        now = time.time()
+        if now - self._last_draw >= self.frame_interval:
+            self._last_draw = now
+            self.draw(tracker)
+
+    def draw(self, tracker=None):
+        '''Redraw the chart in a worker thread; redraws requested while one is pending are coalesced.'''
+        if len(self.history) == 0:
+            return
+        if tracker is not None:
+            self.label.value = tracker.summary()
+        history = self.history
+
+        def apply(image):
+            self.image.value = image
+        executor.submit((id(self), 'merit_chart'), lambda: render_history(history), apply)
@@ -1,207 +1,183 @@
 import csv
+import io
+import os
 import time
 import ipywidgets as widgets
-from matplotlib import pyplot as plt
-import numpy as np
-from jinja2 import Environment, PackageLoader
+from IPython.display import FileLink
+from matplotlib.figure import Figure
 
-from .common import style_default, _primPolyRaw, BaseGUIElement
+from .common import style_default, BaseGUIElement
+from .plotting import PlotEngine
+from .executor import executor
 from ..parse_output import Result
+from ..projections import projection_quality
+from ..code_export import code_languages, export_code
+
+CODE_FOLDER = 'latnetbuilder_code'
+'''str: default folder of the files of the exported code'''
+
+def _render_heatmap(quality, name):
+    '''Render the (dim, dim) array of the quality of the projections as a PNG heatmap.
+
+    A Figure is used instead of pyplot, which is not thread-safe.'''
+    dim = quality.shape[0]
+    fig = Figure(figsize=(8, 7))
+    ax = fig.add_subplot(1, 1, 1)
+    image = ax.imshow(quality, origin='lower', extent=[0.5, dim + 0.5, 0.5, dim + 0.5], interpolation='nearest', cmap='viridis_r')
+    fig.colorbar(image, ax=ax, label=name)
+    ax.set_xlabel('Coordinate')
+    ax.set_ylabel('Coordinate')
+    ax.set_title('%s of the 2-dimensional projections' % name)
+    if dim <= 20:
+        ax.set_xticks(range(1, dim + 1))
+        ax.set_yticks(range(1, dim + 1))
+        if quality.dtype.kind == 'i':
+            for j in range(dim):
+                for k in range(dim):
+                    ax.text(k + 1, j + 1, str(quality[j, k]), ha='center', va='center', color='w', fontsize=8)
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format='png')
+    return buffer.getvalue()
+
+def projections_tab(output):
+    '''Return the Projections tab: a heatmap of the quality of all the 2-dimensional projections.
+
+    The quality (t-value for nets, P_alpha projection term for lattices) is computed by the executor of the GUI,
+    so that the notebook stays responsive; a message is displayed until the heatmap is ready.'''
+    result_obj = output.result_obj
+    status = widgets.HTML('Computing the quality of the %i 2-dimensional projections...' % (result_obj.dim * (result_obj.dim - 1) // 2))
+    heatmap = widgets.Image(format='png', layout=widgets.Layout(display='none'))
 
-env = Environment(
-    loader=PackageLoader(__name__.split('.')[0], 'code_output'),    # first argument is package name
-    autoescape=True
-)
+    def compute():
+        quality, name = projection_quality(result_obj)
+        return _render_heatmap(quality, name), name
 
-def transform_to_c(List):
-    return str(List).replace('[', ' { ').replace(']', ' } ')
+    def apply(rendered):
+        heatmap.value = rendered[0]
+        heatmap.layout.display = 'flex'
+        status.value = 'Diagonal: %s of the 1-dimensional projections.' % rendered[1]
 
-def create_output(output, create_graph=True):
-    output.output.layout.display = 'flex'
+    def error(e, formatted_traceback):
+        status.value = '<span style="color:red"> The quality of the projections could not be computed: %s </span>' % str(e)
+
+    executor.submit((id(output), 'projections'), compute, apply, error)
+    return widgets.VBox([status, heatmap])
+
+def plot_tab(output):
+    '''Return the Plot tab: a projection of the points on two coordinates chosen by the user.
+
+    The points are generated and drawn by the executor of the GUI. Rapid changes of the coordinates are coalesced,
+    so that only the latest projection is drawn; the previous figure stays displayed until the new one is ready.'''
     result_obj = output.result_obj
+    b1 = widgets.BoundedIntText(max=result_obj.dim, min=1, value=1, layout=widgets.Layout(width='180px'), description='Coordinate on x-axis', style=style_default)
+    b2 = widgets.BoundedIntText(max=result_obj.dim, min=1, value=2, layout=widgets.Layout(width='180px'), description='Coordinate on y-axis', style=style_default)
     
-    if create_graph and not (result_obj.nb_points > 2**15):
-
-        b1 = widgets.BoundedIntText(max=result_obj.dim, min=1, value=1, layout=widgets.Layout(width='180px'), description='Coordinate on x-axis', style=style_default)
-        b2 = widgets.BoundedIntText(max=result_obj.dim, min=1, value=2, layout=widgets.Layout(width='180px'), description='Coordinate on y-axis', style=style_default)
-        
-        if result_obj.max_level > 0:
-            b3 = widgets.BoundedIntText(max=result_obj.max_level, min=1, value=result_obj.max_level, layout=widgets.Layout(width='150px'), description='Level')
-            button_list = [b1, b2, b3]
-        else:
-            class detail:
-                value = None
-                def observe(self, x):
-                    return
-            b3 = detail()
-            button_list = [b1, b2]
-            
-
-        if result_obj.set_type == 'Polynomial':
-            b3.disabled = True
-
-        pt_x = result_obj.getPoints(0, b3.value)
-        pt_y = result_obj.getPoints(1, b3.value)
-        fig = widgets.Output(layout=widgets.Layout(width='600px', height='500px'))
-
-        with fig:
-            plt.figure(figsize=(8,8))
-            plt.xlim(0, 1)
-            plt.ylim(0, 1)
-            plt.scatter(pt_x, pt_y, s=0.8)
-            plt.show()
-
-        plot = widgets.HBox([fig, widgets.VBox(button_list)], layout=widgets.Layout(align_items='center'))
-
-        def change_graph(change):
-            if change['name'] == 'value':
-                if change['owner'] == b1:
-                    pt_x = result_obj.getPoints(change['new']-1, b3.value)
-                    pt_y = result_obj.getPoints(b2.value-1, b3.value)
-                if change['owner'] == b2:
-                    pt_x = result_obj.getPoints(b1.value-1, b3.value)
-                    pt_y = result_obj.getPoints(change['new']-1, b3.value)
-                if change['owner'] == b3:
-                    pt_x = result_obj.getPoints(b1.value-1, change['new'])
-                    pt_y = result_obj.getPoints(b2.value-1, change['new'])
-                fig.clear_output()
-                with fig:
-                    plt.figure(figsize=(8,8))
-                    plt.xlim(0, 1)
-                    plt.ylim(0, 1)
-                    plt.scatter(pt_x, pt_y, s=0.8)
-                    plt.show()
-        b1.observe(change_graph)
-        b2.observe(change_graph)
-        b3.observe(change_graph)
-        
+    if result_obj.max_level > 0:
+        b3 = widgets.BoundedIntText(max=result_obj.max_level, min=1, value=result_obj.max_level, layout=widgets.Layout(width='150px'), description='Level')
+        button_list = [b1, b2, b3]
     else:
-        plot = widgets.HTML('Too many points to display graph.')
+        class detail:
+            value = None
+            def observe(self, x):
+                return
+        b3 = detail()
+        button_list = [b1, b2]
+        
+
+    if result_obj.set_type == 'Polynomial':
+        b3.disabled = True
+
+    # the coordinates are cached, and large point sets are drawn as density images
+    output.plot_engine = PlotEngine(result_obj)
+    status = widgets.HTML('Generating the points...')
+    fig = widgets.Image(format='png', layout=widgets.Layout(width='600px', display='none'))
+
+    def draw():
+        status.value = 'Generating the points...'
+        coord_x, coord_y, level = b1.value-1, b2.value-1, b3.value
+
+        def apply(rendered):
+            fig.value = rendered
+            fig.layout.display = 'flex'
+            status.value = ''
+
+        def error(e, formatted_traceback):
+            status.value = '<span style="color:red"> The points could not be drawn: %s </span>' % str(e)
+
+        executor.submit((id(output), 'plot'), lambda: output.plot_engine.render(coord_x, coord_y, level), apply, error)
+
+    def change_graph(change):
+        if change['name'] == 'value':
+            draw()
+    b1.observe(change_graph)
+    b2.observe(change_graph)
+    b3.observe(change_graph)
+    draw()
+
+    return widgets.HBox([widgets.VBox([status, fig]), widgets.VBox(button_list)], layout=widgets.Layout(align_items='center'))
+
+def code_tab(output, language, filename, height='700px'):
+    '''Return a code tab, whose code is exported to a file when the tab is opened for the first time (see render_code_tab).'''
+    link = widgets.HTML('')
+    preview = widgets.Textarea(value='', placeholder='The code is rendered when the tab is opened.', layout=widgets.Layout(width='600px', height=height))
+    tab = widgets.VBox([link, preview])
+    tab.code_export = {'language': language, 'path': os.path.join(output.code_folder, filename), 'rendered': False}
+    return tab
+
+def render_code_tab(output, tab):
+    '''Export the code of a code tab to its file with the executor of the GUI, and display a truncated preview.'''
+    export = tab.code_export
+    if export['rendered']:
+        return
+    export['rendered'] = True
+    link, preview = tab.children
+    link.value = 'Rendering the code...'
+    result_obj = output.result_obj
 
-    Rcpp_header = env.get_template('Rcpp_header.txt').render()
+    def apply(exported):
+        path, code, truncated = exported
+        link.value = '<b>Download the code:</b> ' + FileLink(path)._repr_html_()
+        if truncated:
+            code += '\n\n[...] The code is truncated: see the file %s for the complete code.' % path
+        preview.value = code
 
-    if 'Ordinary' in result_obj.set_type:
-        template = env.get_template('ordinary_C.txt')
-        code_C = widgets.Textarea(value= 
-            template.render(n=result_obj.nb_points, s=result_obj.dim, a=transform_to_c(result_obj.gen_vector)),
-            layout=widgets.Layout(width='600px', height='200px'))
+    def error(e, formatted_traceback):
+        export['rendered'] = False
+        link.value = '<span style="color:red"> The code could not be rendered: %s </span>' % str(e)
 
-        template = env.get_template('ordinary_py.txt')
-        code_python = widgets.Textarea(value= 
-            template.render(n=result_obj.nb_points, a=result_obj.gen_vector),
-            layout=widgets.Layout(width='600px', height='100px'))
+    executor.submit((id(output), export['path']), lambda: export_code(result_obj, export['language'], export['path']), apply, error)
 
-        template = env.get_template('ordinary_matlab.txt')
-        code_matlab = widgets.Textarea(value= 
-            template.render(n=result_obj.nb_points, a=result_obj.gen_vector),
-            layout=widgets.Layout(width='600px', height='130px'))
+def _on_tab_selected(change, output):
+    index = change['new']
+    if index is not None and index < len(output.output.children) and hasattr(output.output.children[index], 'code_export'):
+        render_code_tab(output, output.output.children[index])
 
-        template = env.get_template('ordinary_Rcpp.txt')
-        code_Rcpp = widgets.Textarea(value= 
-            Rcpp_header + template.render(n=result_obj.nb_points, a=result_obj.gen_vector),
-            layout=widgets.Layout(width='600px', height='130px'))
+def create_output(output, create_graph=True):
+    '''Fill the tabs of the output with the plot, the projections and the code of the result.
 
+    The tabs are displayed at once with placeholders; the heavy work (point generation, figures) is done by the
+    executor of the GUI, and each tab is filled when its content is ready. The code of each language is exported
+    to a file of output.code_folder when its tab is opened, and only a preview is displayed.'''
+    output.output.layout.display = 'flex'
+    result_obj = output.result_obj
     
-        output.output.children = [plot, code_C, code_python, code_matlab, code_Rcpp]
-        output.output.set_title(0, 'Plot')
-        output.output.set_title(1, 'C code')
-        output.output.set_title(2, 'Python code')
-        output.output.set_title(3, 'Matlab code')
-        output.output.set_title(4, 'R code')
-        return
+    if create_graph:
+        plot = plot_tab(output)
+        projections = projections_tab(output)
+    else:
+        plot = widgets.HTML('The graph is not displayed.')
+        projections = widgets.HTML('The projections are not displayed.')
 
-    
-    elif result_obj.set_type == 'Polynomial':
-        modulus = result_obj.modulus
-
-        template = env.get_template('polynomial_py.txt')
-        code_python = widgets.Textarea(value= 
-            template.render(mod=modulus, genvec=result_obj.gen_vector, interlacing = result_obj.interlacing) +
-            env.get_template('python_net_suffix.txt').render(),
-            layout=widgets.Layout(width='600px', height='700px'))
-
-        template = env.get_template('polynomial_Cpp.txt')
-        str_cpp = template.render(mod=transform_to_c(modulus), genvec=transform_to_c(result_obj.gen_vector), interlacing = result_obj.interlacing)
-        code_cpp = widgets.Textarea(value= 
-            str_cpp,
-            layout=widgets.Layout(width='600px', height='700px'))
-            
-        Rcpp_suffix = env.get_template('polynomial_Rcpp.txt').render(mod=transform_to_c(modulus), genvec=transform_to_c(result_obj.gen_vector), interlacing = result_obj.interlacing)
-        code_Rcpp = widgets.Textarea(value= 
-            Rcpp_header + 
-            str_cpp.split('int main()')[0] + 
-            Rcpp_suffix,
-            layout=widgets.Layout(width='600px', height='700px'))
-
-    elif result_obj.set_type == 'Sobol':
-        
-        prim_polys = np.zeros((result_obj.dim * result_obj.interlacing, 2),dtype=np.int)
-        polys_list = _primPolyRaw.split('\r\n')
-        for i in range(result_obj.dim * result_obj.interlacing):
-            prim_polys[i,0] = int(polys_list[i].split(',')[0])
-            prim_polys[i,1] = int(polys_list[i].split(',')[1])
-
-        template = env.get_template('sobol_py.txt')
-        code_python = widgets.Textarea(value= 
-            template.render(s=result_obj.dim, 
-                            m=result_obj.nb_cols, 
-                            init_numbers=result_obj.gen_vector,
-                            prim_polys=prim_polys.tolist(),
-                            interlacing = result_obj.interlacing) +
-            env.get_template('python_net_suffix.txt').render(),
-            layout=widgets.Layout(width='600px', height='700px'))
-
-        template = env.get_template('sobol_Cpp.txt')
-        str_cpp = template.render(s=result_obj.dim * result_obj.interlacing, 
-                            m=result_obj.nb_cols,
-                            genvec=transform_to_c(result_obj.gen_vector),
-                            degrees=str(prim_polys[:, 0].tolist()).strip('[]'),
-                            representations=str(prim_polys[:, 1].tolist()).strip('[]'),
-                            interlacing = result_obj.interlacing)
-        code_cpp = widgets.Textarea(value= 
-            str_cpp,
-            layout=widgets.Layout(width='600px', height='700px'))
-
-        Rcpp_suffix = env.get_template('sobol_Rcpp.txt').render(
-                            s=result_obj.dim * result_obj.interlacing, 
-                            m=result_obj.nb_cols,
-                            genvec=transform_to_c(result_obj.gen_vector),
-                            degrees=str(prim_polys[:, 0].tolist()).strip('[]'),
-                            representations=str(prim_polys[:, 1].tolist()).strip('[]'),
-                            interlacing = result_obj.interlacing)
-        code_Rcpp = widgets.Textarea(value= 
-            Rcpp_header + 
-            str_cpp.split('int main()')[0] +
-            Rcpp_suffix,
-            layout=widgets.Layout(width='600px', height='700px'))
-
-    elif 'Explicit' in result_obj.set_type:
-
-        template = env.get_template('explicit_py.txt')
-        code_python = widgets.Textarea(value= 
-            template.render(matrices = str(list(result_obj.matrices)).replace('array', '\n np.array'), interlacing = result_obj.interlacing) +
-            env.get_template('python_net_suffix.txt').render(),   
-            layout=widgets.Layout(width='600px', height='700px'))
-
-        template = env.get_template('explicit_Cpp.txt')
-        str_cpp = template.render(matrices = transform_to_c([m.tolist() for m in result_obj.matrices]), interlacing = result_obj.interlacing)
-        code_cpp = widgets.Textarea(value= 
-            str_cpp,   
-            layout=widgets.Layout(width='600px', height='700px'))
-
-        Rcpp_suffix = env.get_template('explicit_Rcpp.txt').render(matrices = transform_to_c([m.tolist() for m in result_obj.matrices]), interlacing = result_obj.interlacing)
-        code_Rcpp = widgets.Textarea(value= 
-            Rcpp_header + 
-            str_cpp.split('int main()')[0] +
-            Rcpp_suffix,
-            layout=widgets.Layout(width='600px', height='700px'))
-
-    output.output.children = [plot, code_cpp, code_python, code_Rcpp]
+    languages = code_languages(result_obj)
+    height = '200px' if 'Ordinary' in result_obj.set_type else '700px'
+    code_tabs = [code_tab(output, language, filename, height) for title, language, filename in languages]
+
+    output.output.children = [plot, projections] + code_tabs
     output.output.set_title(0, 'Plot')
-    output.output.set_title(1, 'C++11 code')
-    output.output.set_title(2, 'Python code')
-    output.output.set_title(3, 'R code')
-    
+    output.output.set_title(1, 'Projections')
+    for k, (title, language, filename) in enumerate(languages):
+        output.output.set_title(k + 2, title)
+    _on_tab_selected({'new': output.output.selected_index}, output)
 
 
 def output():
@@ -212,8 +188,14 @@ def output():
     command_line_out = widgets.HTML(description='<b> Command line: </b>', layout=widgets.Layout(width='900px'), disabled=False, style=style_default)
     result_obj = None
     output = widgets.Tab(layout=widgets.Layout(display='none'))
-    return BaseGUIElement(result_html=result_html,
-                          file_link=file_link,
-                          result_obj=result_obj,
-                          output=output,
-                          command_line_out=command_line_out)
+    plot_engine = None
+    code_folder = CODE_FOLDER
+    element = BaseGUIElement(result_html=result_html,
+                             file_link=file_link,
+                             result_obj=result_obj,
+                             plot_engine=plot_engine,
+                             code_folder=code_folder,
+                             output=output,
+                             command_line_out=command_line_out)
+    output.observe(lambda change: _on_tab_selected(change, element), names='selected_index')
+    return element
@@ -1,4 +1,7 @@
+import numpy as np
+
 from ..search import SearchLattice, SearchNet
+from ..weights import ProductWeights, OrderDependentWeights, PODWeights
 from .common import ParsingException
 
 weights_corr = {
@@ -8,13 +11,23 @@ weights_corr = {
     'Projection-Dependent' :'projection-dependent:'
 }
 
-def update(string, form, s):
-    string += '0:'
-    for i in range(int(s.dimension)):
-        string += form.children[i].value
-        if i != int(s.dimension)-1:
-            string += ','
-    return string
+def vector_values(form, size, name):
+    '''Return the values of a VectorInput, after checking that there are size of them.'''
+    values = form.values
+    if len(values) != size:
+        raise ParsingException('%i %s are given instead of %i.' % (len(values), name, size))
+    return values
+
+def weights_values(form, s):
+    '''Return the weights of a VectorInput as a numpy array.'''
+    values = vector_values(form, int(s.dimension), 'weights')
+    try:
+        values = np.array(values, dtype=np.float64)
+    except ValueError:
+        raise ParsingException('The weights must be numbers.')
+    if not np.all(np.isfinite(values)) or np.any(values < 0):
+        raise ParsingException('The weights must be finite and non-negative.')
+    return values
 
 def parse_input(gui):
     if gui.main_tab.selected_index == 1:
@@ -23,7 +36,7 @@ def parse_input(gui):
         return parse_input_lattice(gui)
 
 def parse_input_common(s, gui):
-    s.modulus = '"' + gui.properties.modulus.value + '"'
+    s.modulus = gui.properties.modulus.value
 
     s.dimension = gui.properties.dimension.value
     s.interlacing = gui.properties.interlacing.value
@@ -79,24 +92,19 @@ def parse_input_common(s, gui):
     if len(VBOX_of_weights.children) == 0:
         raise ParsingException('You must specify at least one type of weight.')
     for k in range(len(VBOX_of_weights.children)):
-        string = ''
         weight = VBOX_of_weights.children[k]
         weight_type = weights_corr[weight.children[0].children[0].value.split(' ')[1]]
-        string += weight_type
-        if weight_type == 'order-dependent:' or weight_type == 'product:':
-            form = weight.children[1].children[0].children[1]
-            string = update(string, form, s)
+        # the weights are Weights instances, written to a file by the search when they are large
+        if weight_type == 'product:':
+            s.weights.append(ProductWeights(weights_values(weight.children[1].children[0].children[1], s)))
+        elif weight_type == 'order-dependent:':
+            s.weights.append(OrderDependentWeights(weights_values(weight.children[1].children[0].children[1], s)))
         elif weight_type == 'POD:':
-            # Warning: inverse order in the GUI and in the CLI
-            form = weight.children[2].children[0].children[1]
-            string = update(string, form, s)
-            form = weight.children[1].children[0].children[1]
-            string += ':'
-            string = update(string, form, s)
+            s.weights.append(PODWeights(ProductWeights(weights_values(weight.children[1].children[0].children[1], s)),
+                                        OrderDependentWeights(weights_values(weight.children[2].children[0].children[1], s))))
         else:
             proj_dep_string = weight.children[1].value
-            string += proj_dep_string.replace('\n', ':')
-        s.weights.append(string)
+            s.weights.append(weight_type + proj_dep_string.replace('\n', ':'))
 
 def parse_input_net(gui):
     s = SearchNet()
@@ -113,10 +121,7 @@ def parse_input_net(gui):
         elif 'polynomial' in s.construction:
             s.exploration_method += ':'
             effective_dim = int(s.dimension) * int(s.interlacing)
-            for k in range(effective_dim):
-                s.exploration_method += gui.exploration_method.generating_vector_simple.children[k].value
-                if k != effective_dim-1:
-                    s.exploration_method += '-'
+            s.exploration_method += '-'.join(vector_values(gui.exploration_method.generating_vector_simple, effective_dim, 'components of the generating vector'))
 
         elif s.construction == 'explicit':
             s_matrices = gui.exploration_method.generating_matrices.value
@@ -141,9 +146,6 @@ def parse_input_lattice(gui):
         else:
             s.exploration_method += ':'
         effective_dim = int(s.dimension) * int(s.interlacing)
-        for k in range(effective_dim):
-            s.exploration_method += gui.exploration_method.generating_vector.children[0].children[k].value
-            if k != int(effective_dim)-1:
-                s.exploration_method += '-'
+        s.exploration_method += '-'.join(vector_values(gui.exploration_method.generating_vector.children[0], effective_dim, 'components of the generating vector'))
 
     return s
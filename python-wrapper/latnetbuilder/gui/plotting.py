@@ -0,0 +1,123 @@
+"""Plotting engine of the Plot tab of the output.
+
+The coordinates of the points are generated once per (coordinate, level) and kept in a least-recently-used cache,
+so that changing the coordinate on one axis only generates the new coordinate. Small point sets are drawn as
+scatter plots; large point sets are drawn as density images (2-dimensional histograms accumulated in chunks), so that
+projections of point sets with millions of points can be inspected interactively.
+"""
+
+import io
+import threading
+from collections import OrderedDict
+
+import numpy as np
+from matplotlib.figure import Figure
+
+SCATTER_MAX_POINTS = 2**15
+'''int: maximum number of points drawn as a scatter plot; larger point sets are drawn as density images'''
+
+DENSITY_BINS = 512
+'''int: number of bins of the density images along each axis'''
+
+HISTOGRAM_CHUNK_SIZE = 2**20
+'''int: number of points binned at once by density'''
+
+CACHE_MAX_BYTES = 2**28
+'''int: maximum size in bytes of the coordinates kept by a CoordinateCache'''
+
+
+class CoordinateCache():
+    '''Least-recently-used cache of the coordinates of the points of a Result.
+
+    The coordinates are generated in single precision, which is enough for plotting and halves the memory used.
+
+    Arguments:
+        + result_obj: Result instance
+        + max_bytes: maximum size of the cached coordinates; the least recently used coordinates are evicted first
+        (the last coordinate is always kept, even if it is larger)'''
+
+    def __init__(self, result_obj, max_bytes=CACHE_MAX_BYTES):
+        self.result_obj = result_obj
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._nbytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, coord, level=None):
+        '''Return the coordinate coord (0-based) of the points of the given level, as a float32 array.'''
+        key = (coord, level)
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return self._entries[key]
+        points = self.result_obj.getPoints(coord, level, dtype=np.float32)
+        with self._lock:
+            if key not in self._entries:
+                self._entries[key] = points
+                self._nbytes += points.nbytes
+            while self._nbytes > self.max_bytes and len(self._entries) > 1:
+                _, evicted = self._entries.popitem(last=False)
+                self._nbytes -= evicted.nbytes
+            return self._entries.get(key, points)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._nbytes = 0
+
+
+def density(x, y, bins=DENSITY_BINS, chunk_size=HISTOGRAM_CHUNK_SIZE):
+    '''Return the 2-dimensional histogram of the points (x, y) of [0, 1)^2 as an array of shape (bins, bins).
+
+    The result is the one of np.histogram2d(x, y, bins, range=[[0, 1], [0, 1]]), but since the cells are uniform,
+    the cell of each point is computed directly and the cells are counted with np.bincount, which is an order of
+    magnitude faster. The histogram is accumulated over chunks of chunk_size points, so that the temporary arrays
+    stay small for large point sets. The first index of the histogram corresponds to x.'''
+    counts = np.zeros(bins * bins, dtype=np.int64)
+    for start in range(0, len(x), chunk_size):
+        cell_x = np.minimum((x[start:start+chunk_size] * bins).astype(np.int64), bins - 1)
+        cell_y = np.minimum((y[start:start+chunk_size] * bins).astype(np.int64), bins - 1)
+        counts += np.bincount(cell_x * bins + cell_y, minlength=bins * bins)
+    return counts.reshape(bins, bins)
+
+
+class PlotEngine():
+    '''Draw the 2-dimensional projections of the points of a Result.
+
+    Arguments:
+        + result_obj: Result instance
+        + scatter_max_points: largest point set drawn as a scatter plot
+        + bins: number of bins of the density images along each axis'''
+
+    def __init__(self, result_obj, scatter_max_points=SCATTER_MAX_POINTS, bins=DENSITY_BINS):
+        self.result_obj = result_obj
+        self.cache = CoordinateCache(result_obj)
+        self.scatter_max_points = scatter_max_points
+        self.bins = bins
+
+    def projection(self, coord_x, coord_y, level=None):
+        '''Return the coordinates coord_x and coord_y (0-based) of the points of the given level.'''
+        return self.cache.get(coord_x, level), self.cache.get(coord_y, level)
+
+    def render(self, coord_x, coord_y, level=None):
+        '''Draw the projection on the coordinates coord_x and coord_y (0-based), and return it as a PNG image.
+
+        A Figure is used instead of pyplot, which is not thread-safe, so that the rendering can run in a worker thread.'''
+        pt_x, pt_y = self.projection(coord_x, coord_y, level)
+        fig = Figure(figsize=(8,8))
+        ax = fig.add_subplot(1, 1, 1)
+        ax.set_xlim(0, 1)
+        ax.set_ylim(0, 1)
+        if len(pt_x) <= self.scatter_max_points:
+            ax.scatter(pt_x, pt_y, s=0.8)
+        else:
+            counts = density(pt_x, pt_y, self.bins)
+            image = ax.imshow(counts.T, origin='lower', extent=[0, 1, 0, 1], interpolation='nearest', cmap='viridis')
+            fig.colorbar(image, ax=ax, fraction=0.046, pad=0.04, label='Points per cell')
+            ax.set_title('Density of the %i points (%i x %i cells)' % (len(pt_x), self.bins, self.bins))
+        buffer = io.BytesIO()
+        fig.savefig(buffer, format='png')
+        return buffer.getvalue()
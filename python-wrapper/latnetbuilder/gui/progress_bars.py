@@ -1,6 +1,7 @@
 import ipywidgets as widgets
 
 from .common import style_default, BaseGUIElement
+from .merit_chart import MeritChart
 
 def progress_bars():
     progress_bar_nets = widgets.FloatProgress(value=0., max=1., step=0.01, 
@@ -9,5 +10,9 @@ def progress_bars():
     progress_bar_dim = widgets.FloatProgress(value=0., max=1., step=0.01, 
         bar_style='info', description='Number of dim explored:', 
         layout=widgets.Layout(display='none'), style=style_default)
+    eta = widgets.Label(value='', layout=widgets.Layout(display='none'))     # throughput and estimated remaining time
+    merit_chart = MeritChart()      # best merit against time and nets explored
     return BaseGUIElement(progress_bar_dim=progress_bar_dim,
-                          progress_bar_nets=progress_bar_nets)
+                          progress_bar_nets=progress_bar_nets,
+                          eta=eta,
+                          merit_chart=merit_chart)
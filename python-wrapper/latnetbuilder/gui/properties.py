@@ -2,6 +2,7 @@ import ipywidgets as widgets
 import numpy as np
 
 from .common import style_default, parse_polynomial, INITIAL_DIM, BaseGUIElement
+from .weights import default_weights
 
 def change_modulus(change, gui):
     if change['name'] != 'value':
@@ -44,21 +45,9 @@ def change_interlacing(change, gui):
     else:
         gui.figure_of_merit.figure_type.options = [('Balpha,d_1', 'IAalpha'), ('Bd_2', 'IB'), ('Balpha,d_3', 'ICalpha')]    
         gui.figure_of_merit.figure_type.value = 'IAalpha'
-    update(gui.exploration_method.generating_vector.children[0], change['new']*gui.properties.dimension.value, '1', '100px')
-    update(gui.exploration_method.generating_vector_simple, change['new']*gui.properties.dimension.value, '1', '100px')
-
-def update(form, dim, defaut_value, width):
-    new_children = []
-    if len(form.children) < dim:
-        for k in range(len(form.children)):
-            new_children.append(form.children[k])
-        for k in range(dim-len(form.children)):
-            new_children.append(widgets.Text(
-                value=defaut_value, description='', layout=widgets.Layout(width=width)))
-    elif len(form.children) > dim:
-        for k in range(dim):
-            new_children.append(form.children[k])
-    form.children = new_children
+    dim = change['new'] * gui.properties.dimension.value
+    gui.exploration_method.generating_vector.children[0].resize(dim, lambda k: '1')
+    gui.exploration_method.generating_vector_simple.resize(dim, lambda k: '1')
 
 # callback for dimension change
 def change_dimension(change, gui):
@@ -71,22 +60,20 @@ def change_dimension(change, gui):
         weight_type = weight.children[0].children[0].value.split(' ')[1]
         if weight_type == 'Product':
             form = weight.children[1].children[0].children[1]
-            update(form, dim, '0.8', '50px')
+            form.resize(dim, default_weights['Product'])
         elif weight_type == 'Order-Dependent':
-            new_value = str(round(0.8**dim * (dim <= 3), 3))
             form = weight.children[1].children[0].children[1]
-            update(form, dim, new_value, '50px')
+            form.resize(dim, default_weights['Order-Dependent'])
         elif weight_type == 'POD':
             form = weight.children[1].children[0].children[1]
-            update(form, dim, '0.8', '50px')
-            new_value = str(round(0.8**dim * (dim <= 3), 3))
+            form.resize(dim, default_weights['Product'])
             form = weight.children[2].children[0].children[1]
-            update(form, dim, new_value, '50px')
+            form.resize(dim, default_weights['Order-Dependent'])
     gui.exploration_method.mixed_CBC_level.max = dim
 
     dim = change['new'] * gui.properties.interlacing.value
-    update(gui.exploration_method.generating_vector.children[0], dim, '1', '100px')
-    update(gui.exploration_method.generating_vector_simple, dim, '1', '100px')
+    gui.exploration_method.generating_vector.children[0].resize(dim, lambda k: '1')
+    gui.exploration_method.generating_vector_simple.resize(dim, lambda k: '1')
 
 
 def properties():
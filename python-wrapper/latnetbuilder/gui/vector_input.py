@@ -0,0 +1,48 @@
+"""Bulk-editable input of one value per coordinate (coordinate weights, order weights, generating vectors).
+
+The values are edited in a single text area, as a comma-separated list, instead of one Text widget per coordinate:
+when the dimension changes, the list is resized by keeping the current values and only adding or removing the values
+of the coordinates which changed, and a single string is synced with the front end. A configuration in dimension 1000
+thus stays responsive, where thousands of Text widgets had to be created and synced at each keystroke.
+"""
+
+import re
+
+import ipywidgets as widgets
+
+_separators = re.compile(r'[,\s]+')
+
+
+def split_values(string):
+    '''Return the list of the values of a string, separated by commas, spaces or newlines.'''
+    return [value for value in _separators.split(string) if value != '']
+
+
+class VectorInput(widgets.Textarea):
+    '''Text area holding one value per coordinate, separated by commas.
+
+    Arguments:
+        + values: initial list of values (strings)
+        + width: width of the text area
+        + rows: number of rows of the text area'''
+
+    def __init__(self, values, width='600px', rows=2, **kwargs):
+        super().__init__(value=', '.join(values), rows=rows, layout=widgets.Layout(width=width), **kwargs)
+
+    @property
+    def values(self):
+        '''List of the values (strings) of the coordinates.'''
+        return split_values(self.value)
+
+    def set_values(self, values):
+        '''Replace all the values. The front end is only synced if the text changes.'''
+        new_value = ', '.join(values)
+        if new_value != self.value:
+            self.value = new_value
+
+    def resize(self, dim, default):
+        '''Keep the values of the first dim coordinates, and add default(k) for the new coordinates k (0-based).'''
+        values = self.values
+        if len(values) == dim:
+            return
+        self.set_values(values[:dim] + [default(k) for k in range(len(values), dim)])
@@ -3,6 +3,7 @@ import numpy as np
 import numexpr as ne
 
 from .common import style_default, BaseGUIElement
+from .vector_input import VectorInput
 
 weight_math = widgets.HTMLMath(value='The weights are of the form: \\(\\gamma_u^q (u \\subseteq \\{1, ... s\\})\\). \
 You can specify below type of weights with their values (the actual weights are the sum of these).',
@@ -16,6 +17,9 @@ math_label = {'Order-Dependent': '$$\\gamma_u=\\Gamma_{|u|}$$',
             'Product':'$$\\gamma_u=\\prod_{j\\in u} \\gamma_j$$'}
 weights_index = {'Order-Dependent': 'k', 'Product': 'j'}
 placeholder_set_all = {'Order-Dependent': '0.8^k * (k <= 3)', 'Product': '0.8'}
+# default weight of the coordinate k (0-based), or of the order k+1
+default_weights = {'Order-Dependent': lambda k: str(round(0.8**(k+1) * (k <= 2), 3)),
+                   'Product': lambda k: '0.8'}
 
 
 
@@ -39,23 +43,15 @@ def set_all_weights(change, nb, gui, type_weights):
     form = weights.children[0].children[1]
     set_all = weights.children[1]
     if valid:
-        for k in range(len(form.children)):
-            try:
-                form.children[k].value = str(expr_evaluated[k])
-            except:
-                form.children[k].value = str(expr_evaluated)
+        form.set_values([str(value) for value in np.broadcast_to(expr_evaluated, coord.shape)])
         set_all.description = 'OR set all at once with (valid Python) expression: %s =' % (math_strings[type_weights])
     else:
         set_all.description = 'NOT VALID, please change expression: %s =' % (math_strings[type_weights])
 
 def create_elem_weights(type_weights, dimension_int, gui):
     weights_set_all_id = gui.weights.weights_set_all_id
-    if type_weights == 'Product':
-        value = ['0.8']*dimension_int
-    elif type_weights == 'Order-Dependent':
-        value = [str(round(0.8**(k+1) * (k <= 2), 3)) for k in range(dimension_int)]
-    form = widgets.HBox([widgets.Text(value=value[k], description='', layout=widgets.Layout(width='50px')) 
-                        for k in range(dimension_int)])
+    form = VectorInput([default_weights[type_weights](k) for k in range(dimension_int)],
+                       placeholder='One weight per %s, separated by commas' % ('coordinate' if type_weights == 'Product' else 'order'))
     set_all = widgets.Text(value='', placeholder=placeholder_set_all[type_weights],
                             description='OR set all at once with (valid Python) expression: %s =' %(math_strings[type_weights]),
                             disabled=False, layout=widgets.Layout(margin='0px 0px 0px 80px', width='550px'), style=style_default)
@@ -17,6 +17,7 @@ class Result:
         self.nb_rows = nb_rows
         self.matrices = matrices
         self.interlacing = interlacing
+        self.trace = None       # root Span of the search which produced the result (see the module tracing)
 
         if self.nb_cols == 0:   # ordinary set type
             self.base = base
@@ -58,16 +59,21 @@ class Result:
         return s1 + s2 + s3 + s4
 
 
-    def getPoints(self, coord, level=None):
+    def getPoints(self, coord, level=None, exact=False, dtype=None, out=None):
+        '''Return the coordinate coord of the points (of the given level for multilevel point sets).
+
+        If exact is True (or dtype is an unsigned integer type), the coordinates are returned as unsigned integers
+        scaled by the number of points for lattices, and by 2^(nb_rows * interlacing) for nets.
+        The coordinates can be computed in single precision (dtype=np.float32), and written in an existing array out.'''
         assert coord < self.dim and (level==None or self.max_level > 0)
 
-        if self.matrices == []:
+        if len(self.matrices) == 0:
             if level == None:
-                return generate_points_ordinary_lattice(self.gen_vector, self.nb_points, coord)
+                return generate_points_ordinary_lattice(self.gen_vector, self.nb_points, coord, exact=exact, dtype=dtype, out=out)
             else:
-                return generate_points_ordinary_lattice(self.gen_vector, self.base ** level, coord)
+                return generate_points_ordinary_lattice(self.gen_vector, self.base ** level, coord, exact=exact, dtype=dtype, out=out)
         else:
-            return generate_points_digital_net(self.matrices, self.interlacing, coord, level)
+            return generate_points_digital_net(self.matrices, self.interlacing, coord, level, exact=exact, dtype=dtype, out=out)
 
 
 
@@ -0,0 +1,168 @@
+"""Portfolio of exploration strategies run concurrently for the same search problem.
+
+The quality of the nets found by randomized constructions such as mixed-CBC varies a lot with the random stream and
+with the parameters of the exploration method. A portfolio runs several strategies (exploration method, seed, ...)
+of the same Search as concurrent C++ processes, and keeps the best result.
+
+Example:
+    strategies = [{'exploration_method': 'mixed-CBC:%i:%i' % (r, d), 'seed': seed}
+                  for r in [50, 200] for d in [2, 4] for seed in range(2)]
+    best, report = run_portfolio(search, strategies, deadline=600, target_merit=1e-3)
+"""
+
+import os
+import copy
+import time
+
+from .parse_output import parse_output
+from .tracing import tracer
+
+DEFAULT_OUTPUT_FOLDER = 'latnetbuilder_portfolio'
+
+
+class StrategyReport():
+    '''Outcome of one strategy of a portfolio.
+
+    Attributes:
+        + name: name of the strategy
+        + settings: dictionary of the Search attributes set by the strategy
+        + status: 'running', 'finished', 'failed' (the C++ process returned an error), 'cancelled' (another strategy
+        reached the target merit) or 'timeout' (the deadline was reached)
+        + merit: merit of the result, or None
+        + wall_time: wall time of the strategy in seconds
+        + result: Result instance, or None
+        + error: error output of the C++ process for a failed strategy'''
+
+    def __init__(self, name, settings):
+        self.name = name
+        self.settings = settings
+        self.status = 'running'
+        self.merit = None
+        self.wall_time = None
+        self.result = None
+        self.error = ''
+
+    def __repr__(self):
+        return '%s: %s, merit %s, %.2f seconds' % (self.name, self.status, str(self.merit), self.wall_time)
+
+
+def _strategy_settings(strategy):
+    '''Return the name and the Search attributes of a strategy given as a dictionary or as an exploration method.'''
+    if isinstance(strategy, str):
+        strategy = {'exploration_method': strategy}
+    settings = dict(strategy)
+    name = settings.pop('name', None)
+    if name is None:
+        name = ' '.join('%s=%s' % (key, str(value)) for key, value in sorted(settings.items()))
+    return name, settings
+
+
+def run_portfolio(search, strategies, deadline=None, target_merit=None, output_folder=None, max_workers=None, delete_files=True):
+    '''Run several exploration strategies of the same search concurrently, and return the best result and a report.
+
+    Arguments:
+        + search: SearchLattice or SearchNet instance describing the problem
+        + strategies: list of strategies. A strategy is either an exploration method (e.g. 'fast-CBC'), or a dictionary
+        of Search attributes overriding the ones of search (e.g. {'exploration_method': 'mixed-CBC:100:3', 'seed': 2}).
+        The optional key 'name' names the strategy in the report.
+        + deadline: if not None, shared time budget in seconds: the strategies still running at the deadline are killed
+        + target_merit: if not None, as soon as a strategy finishes with a merit not larger than target_merit, the other
+        strategies are cancelled
+        + output_folder: folder containing one output folder per strategy (strategy-<i>)
+        + max_workers: maximum number of C++ processes running at the same time (default: one per CPU); the other
+        strategies wait for a free slot, and are counted as 'timeout' if the deadline is reached first
+        + delete_files: if set to False, the C++ output files of the strategies are not deleted
+
+    Returns the Result instance of the best strategy (None if no strategy finished), and the list of the
+    StrategyReport instances, in the order of strategies.'''
+    if output_folder is None:
+        output_folder = DEFAULT_OUTPUT_FOLDER
+    if max_workers is None or max_workers == 0:
+        max_workers = os.cpu_count() or 1
+
+    pending = []
+    reports = []
+    for i, strategy in enumerate(strategies):
+        name, settings = _strategy_settings(strategy)
+        strategy_search = copy.copy(search)
+        strategy_search.my_output = None
+        for key, value in settings.items():
+            if not hasattr(strategy_search, key):
+                raise ValueError('unknown Search attribute %s in strategy %s' % (key, name))
+            setattr(strategy_search, key, value)
+        strategy_search._output_folder = os.path.join(output_folder, 'strategy-%i' % i)
+        report = StrategyReport(name, settings)
+        reports.append(report)
+        pending.append((strategy_search, report))
+
+    start_time = time.time()
+    running = []
+    stop_status = None
+    try:
+        while (len(pending) > 0 or len(running) > 0) and stop_status is None:
+            while len(pending) > 0 and len(running) < max_workers:
+                strategy_search, report = pending.pop(0)
+                running.append(_launch(strategy_search, report))
+
+            time.sleep(0.1)
+            for job in list(running):
+                strategy_search, report, process, started, stdout_filepath, stderr_filepath = job
+                if process.poll() is None:
+                    continue
+                running.remove(job)
+                report.wall_time = time.time() - started
+                _collect(strategy_search, report, process, stderr_filepath)
+                if delete_files:
+                    os.remove(stdout_filepath)
+                    os.remove(stderr_filepath)
+                if target_merit is not None and report.merit is not None and report.merit <= target_merit:
+                    stop_status = 'cancelled'
+
+            if stop_status is None and deadline is not None and time.time() - start_time > deadline:
+                stop_status = 'timeout'
+
+    finally:
+        for strategy_search, report, process, started, stdout_filepath, stderr_filepath in running:
+            strategy_search._kill_process(process)
+            process.wait()      # the files of the process are closed before they are deleted
+            report.status = stop_status if stop_status is not None else 'cancelled'
+            strategy_search._end_trace(strategy=report.name, status=report.status)
+            report.wall_time = time.time() - started
+            if delete_files:
+                for filepath in [stdout_filepath, stderr_filepath]:
+                    try:
+                        os.remove(filepath)
+                    except OSError:
+                        pass
+        for strategy_search, report in pending:
+            report.status = stop_status if stop_status is not None else 'cancelled'
+            report.wall_time = 0.
+
+    finished = [report for report in reports if report.status == 'finished']
+    if len(finished) == 0:
+        return None, reports
+    return min(finished, key=lambda report: report.merit).result, reports
+
+
+def _launch(search, report):
+    os.makedirs(search._output_folder, exist_ok=True)
+    stdout_filepath = os.path.join(search._output_folder, 'cpp_outfile.txt')
+    stderr_filepath = os.path.join(search._output_folder, 'cpp_errfile.txt')
+    with open(stdout_filepath, 'w') as stdout_file, open(stderr_filepath, 'w') as stderr_file:
+        process = search._launch_subprocess(stdout_file, stderr_file)
+    return (search, report, process, time.time(), stdout_filepath, stderr_filepath)
+
+
+def _collect(search, report, process, stderr_filepath):
+    if process.poll() == 0:
+        with tracer.span('parse', parent=search._trace):
+            with open(os.path.join(search._output_folder, 'outputMachine.txt')) as f:
+                report.result = parse_output(f.read())
+        report.result.trace = search._trace
+        report.merit = report.result.merit
+        report.status = 'finished'
+    else:
+        with open(stderr_filepath) as f:
+            report.error = f.read()
+        report.status = 'failed'
+    search._end_trace(returncode=process.returncode, strategy=report.name)
@@ -0,0 +1,217 @@
+"""Progress of a running search, parsed from the verbose output of LatNet Builder.
+
+Each line of the standard output is parsed into a ProgressEvent (or ignored if it does not describe progress).
+A ProgressTracker accumulates these events: it knows the current coordinate, the number of nets (or lattices)
+explored, the best merit, and estimates the throughput on a sliding time window to predict the remaining time.
+
+Example:
+    def print_progress(event, tracker):
+        print(event, tracker.summary())
+    search.execute(progress_callbacks=[print_progress])
+"""
+
+import re
+import time
+from collections import deque
+
+DIMENSION_STARTED = 'dimension_started'
+DIMENSION_FINISHED = 'dimension_finished'
+NETS_EXPLORED = 'nets_explored'
+BEST_MERIT = 'best_merit'
+
+_NUMBER = r'([-+]?(?:[0-9]*\.?[0-9]+(?:[eE][-+]?[0-9]+)?|inf|nan))'
+
+_PATTERNS = [
+    (DIMENSION_STARTED, re.compile(r'^Begin coordinate:? (\d+)/(\d+)')),
+    (DIMENSION_FINISHED, re.compile(r'^End coordinate: (\d+)/(\d+) - (\d+) .*partial merit value: ' + _NUMBER)),
+    (NETS_EXPLORED, re.compile(r'^Coordinate (\d+)/(\d+) - (?:net|lattice) (\d+)/(\d+)')),
+    (NETS_EXPLORED, re.compile(r'^(?:Net|Lattice) (\d+)/(\d+)\s*$')),
+    (BEST_MERIT, re.compile(r'^Current merit: ' + _NUMBER + r' \(best\)')),
+    (BEST_MERIT, re.compile(r'^Merit: ' + _NUMBER)),
+]
+
+
+class ProgressEvent():
+    '''Progress information contained in one line of the output of LatNet Builder.
+
+    Attributes (None when the line does not contain the information):
+        + kind: DIMENSION_STARTED, DIMENSION_FINISHED, NETS_EXPLORED or BEST_MERIT
+        + dimension: current coordinate (1-based), for CBC explorations
+        + total_dimension: dimension of the point set, for CBC explorations
+        + count: number of nets explored (for the current coordinate for CBC explorations)
+        + total: number of nets to explore (for the current coordinate for CBC explorations)
+        + merit: best merit (partial merit for DIMENSION_FINISHED)
+        + time: time at which the line was read'''
+
+    def __init__(self, kind, dimension=None, total_dimension=None, count=None, total=None, merit=None, time=None):
+        self.kind = kind
+        self.dimension = dimension
+        self.total_dimension = total_dimension
+        self.count = count
+        self.total = total
+        self.merit = merit
+        self.time = time
+
+    def __repr__(self):
+        fields = ['%s=%s' % (key, str(value)) for key, value in [('dimension', self.dimension), ('total_dimension', self.total_dimension),
+                  ('count', self.count), ('total', self.total), ('merit', self.merit)] if value is not None]
+        return '%s(%s)' % (self.kind, ', '.join(fields))
+
+
+def parse_progress_line(line, now=None):
+    '''Parse a line of the output of LatNet Builder. Returns a ProgressEvent, or None if the line is not a progress line.'''
+    line = line.strip()
+    for kind, pattern in _PATTERNS:
+        match = pattern.match(line)
+        if match is None:
+            continue
+        groups = match.groups()
+        if kind == DIMENSION_STARTED:
+            return ProgressEvent(kind, dimension=int(groups[0]), total_dimension=int(groups[1]), time=now)
+        elif kind == DIMENSION_FINISHED:
+            return ProgressEvent(kind, dimension=int(groups[0]), total_dimension=int(groups[1]), count=int(groups[2]),
+                                 merit=float(groups[3]), time=now)
+        elif kind == NETS_EXPLORED and len(groups) == 4:
+            return ProgressEvent(kind, dimension=int(groups[0]), total_dimension=int(groups[1]), count=int(groups[2]),
+                                 total=int(groups[3]), time=now)
+        elif kind == NETS_EXPLORED:
+            return ProgressEvent(kind, count=int(groups[0]), total=int(groups[1]), time=now)
+        else:
+            return ProgressEvent(kind, merit=float(groups[0]), time=now)
+    return None
+
+
+class ProgressTracker():
+    '''Accumulate the progress events of a search and estimate its throughput and remaining time.
+
+    Arguments:
+        + callbacks: list of functions called as callback(event, tracker) for each event
+        + window: length in seconds of the sliding window on which the throughput is estimated'''
+
+    def __init__(self, callbacks=None, window=10.):
+        self.callbacks = list(callbacks) if callbacks is not None else []
+        self.window = window
+        self.dimension = None
+        self.total_dimension = None
+        self.dimensions_finished = 0
+        self.count = 0
+        self.total = None
+        self.best_merit = None
+        self.explored_before = 0        # nets explored for the finished coordinates
+        self.start_time = None
+        self._samples = deque()         # (time, total number of nets explored)
+        self._pending = ''
+
+    def feed(self, data, now=None):
+        '''Feed a chunk of the output of LatNet Builder (possibly ending in the middle of a line).
+
+        Returns the list of the events parsed from the complete lines.'''
+        lines = (self._pending + data).split('\n')
+        self._pending = lines.pop()
+        return [event for event in [self.feed_line(line, now) for line in lines] if event is not None]
+
+    def feed_line(self, line, now=None):
+        '''Feed one complete line of output. Returns the corresponding event, or None.'''
+        if now is None:
+            now = time.time()
+        if self.start_time is None:
+            self.start_time = now
+        event = parse_progress_line(line, now)
+        if event is None:
+            return None
+        if event.total_dimension is not None:
+            self.total_dimension = event.total_dimension
+        if event.kind == DIMENSION_STARTED:
+            self.dimension = event.dimension
+            self.count = 0
+        elif event.kind == DIMENSION_FINISHED:
+            self.dimension = event.dimension
+            self.dimensions_finished = event.dimension
+            self.explored_before += event.count
+            self.count = 0
+            self.best_merit = event.merit
+        elif event.kind == NETS_EXPLORED:
+            if self.dimension is None:     # the coordinate is given by the begin/end lines, whose numbering is reliable
+                self.dimension = event.dimension
+            self.count = event.count
+            self.total = event.total
+        else:
+            self.best_merit = event.merit
+        self._add_sample(now)
+        for callback in self.callbacks:
+            callback(event, self)
+        return event
+
+    def _add_sample(self, now):
+        self._samples.append((now, self.explored()))
+        while len(self._samples) > 2 and now - self._samples[1][0] >= self.window:
+            self._samples.popleft()
+
+    def explored(self):
+        '''Return the total number of nets explored so far.'''
+        return self.explored_before + self.count
+
+    def throughput(self):
+        '''Return the number of nets explored per second on the sliding window, or None before two samples.'''
+        if len(self._samples) < 2:
+            return None
+        (t0, n0), (t1, n1) = self._samples[0], self._samples[-1]
+        if t1 <= t0:
+            return None
+        return (n1 - n0) / (t1 - t0)
+
+    def remaining(self):
+        '''Return an estimate of the number of nets still to explore, or None if it is unknown.
+
+        For CBC explorations, the coordinates still to explore are assumed to contain as many nets as the current one.'''
+        if self.total is None:
+            return None
+        if self.total_dimension is not None and self.dimensions_finished >= self.total_dimension:   # the search is over
+            return 0
+        remaining = max(self.total - self.count, 0)
+        if self.total_dimension is not None and self.dimension is not None:
+            remaining += max(self.total_dimension - max(self.dimension, self.dimensions_finished + 1), 0) * self.total
+        return remaining
+
+    def eta(self):
+        '''Return the estimated remaining time in seconds, or None if it cannot be estimated yet.'''
+        rate = self.throughput()
+        remaining = self.remaining()
+        if rate is None or remaining is None or rate <= 0:
+            return None
+        return remaining / rate
+
+    def dimension_fraction(self):
+        '''Return the fraction of the coordinates already constructed (CBC explorations).'''
+        if not self.total_dimension:
+            return 0.
+        return float(self.dimensions_finished) / self.total_dimension
+
+    def nets_fraction(self):
+        '''Return the fraction of the nets explored (for the current coordinate for CBC explorations).'''
+        if not self.total:
+            return 0.
+        return float(self.count) / self.total
+
+    def summary(self):
+        '''Return a one-line human-readable description of the throughput and of the remaining time.'''
+        rate = self.throughput()
+        eta = self.eta()
+        s = '%i explored' % self.explored()
+        if rate is not None:
+            s += ' - %.1f per second' % rate
+        if eta is not None:
+            s += ' - about %s remaining' % format_duration(eta)
+        if self.best_merit is not None:
+            s += ' - best merit: %s' % str(self.best_merit)
+        return s
+
+
+def format_duration(seconds):
+    '''Format a duration in seconds as e.g. 1h02m, 3m05s or 12s.'''
+    seconds = int(round(seconds))
+    if seconds >= 3600:
+        return '%ih%02im' % (seconds // 3600, (seconds % 3600) // 60)
+    if seconds >= 60:
+        return '%im%02is' % (seconds // 60, seconds % 60)
+    return '%is' % seconds
@@ -0,0 +1,150 @@
+"""Quality of the 2-dimensional projections of a point set.
+
+For digital nets, the quality of the projection on the coordinates (j, k) is its t-value. For ordinary lattices, it is
+the P_alpha projection term of {j, k}. Both are computed for all the pairs of coordinates at once: the t-values by a
+Gaussian elimination over GF(2) vectorized over the pairs (the rows of the generating matrices are packed into
+64-bit words), and the P_alpha terms by a product of matrices accumulated over blocks of points.
+"""
+
+import math
+
+import numpy as np
+
+PROJECTION_BLOCK_SIZE = 2**14
+'''int: number of lattice points processed at once by pairwise_p_alpha'''
+
+
+def _pack_rows(matrices, interlacing):
+    '''Pack the rows of the generating matrices of each coordinate into words, one word per row.
+
+    The rows of the interlaced components are interleaved as in generate_points._pack_columns, so that the rows of a
+    coordinate are the digits of its output, from the most significant one. The bit k of a word is the column k.
+
+    Returns a numpy array of shape (dim, nb_rows * interlacing) and dtype uint64.'''
+    matrices = np.asarray(matrices)
+    nb_components, nb_rows, nb_cols = matrices.shape
+    if nb_cols > 64:
+        raise ValueError('the t-values can be computed for at most 2^64 points, not 2^%i' % nb_cols)
+    dim = nb_components // interlacing
+    digits = np.mod(matrices, 2).reshape(dim, interlacing, nb_rows, nb_cols).transpose(0, 2, 1, 3).reshape(dim, nb_rows * interlacing, nb_cols)
+    weights = np.left_shift(np.uint64(1), np.arange(nb_cols, dtype=np.uint64))
+    return np.bitwise_or.reduce(np.where(digits == 1, weights, np.uint64(0)), axis=2)
+
+
+def _insert(basis, words, active, nb_cols):
+    '''Insert words into the GF(2) bases, vectorized over the pairs of coordinates.
+
+    basis has shape (nb_pairs, nb_cols): basis[p, b] is the vector of the basis p with leading bit b, or 0.
+    Only the pairs for which active is True are modified. Returns the mask of the pairs for which the word was
+    linearly independent of the basis (and was inserted).'''
+    words = words.copy()
+    inserted = np.zeros(len(words), dtype=bool)
+    pending = active & (words != 0)
+    one = np.uint64(1)
+    for b in range(nb_cols - 1, -1, -1):
+        has_bit = pending & (((words >> np.uint64(b)) & one) == one)
+        pivot = basis[:, b]
+        new = has_bit & (pivot == 0)
+        basis[new, b] = words[new]
+        inserted |= new
+        pending &= ~new
+        reduce = has_bit & ~new
+        words[reduce] ^= pivot[reduce]
+    return inserted
+
+
+def pairwise_t_values(matrices, interlacing=1):
+    '''Return the t-values of the 2-dimensional projections of a digital net in base 2, as a (dim, dim) array.
+
+    Arguments:
+        + matrices: generating matrices of the components, as an array of shape (dim * interlacing, nb_rows, nb_cols)
+        + interlacing: interlacing factor; the projections are the ones of the interlaced point set
+
+    The t-value of the projection (j, k) is m - q, where q is the largest integer such that for all d1 + d2 = q, the
+    first d1 rows of C_j and the first d2 rows of C_k are linearly independent. For each d1, the largest d2 is found
+    by inserting the rows of C_k one by one in the basis spanned by the first d1 rows of C_j.
+    The diagonal contains the t-values of the 1-dimensional projections.'''
+    rows = _pack_rows(matrices, interlacing)
+    dim, nb_digits = rows.shape
+    nb_cols = np.asarray(matrices).shape[2]
+    max_rows = min(nb_digits, nb_cols)
+    pair_j, pair_k = np.triu_indices(dim, 1)
+    nb_pairs = len(pair_j)
+
+    strength = np.full(nb_pairs, nb_cols, dtype=np.int64)
+    basis_j = np.zeros((nb_pairs, nb_cols), dtype=np.uint64)
+    independent_j = np.ones(nb_pairs, dtype=bool)
+    for d1 in range(max_rows + 1):
+        if d1 > 0:
+            independent_j &= _insert(basis_j, rows[pair_j, d1 - 1], independent_j, nb_cols)
+        # the first d1 rows of C_j are dependent: no q >= d1 is valid
+        strength = np.where(independent_j, strength, np.minimum(strength, d1 - 1))
+        basis = basis_j.copy()
+        alive = independent_j.copy()
+        d2 = np.zeros(nb_pairs, dtype=np.int64)
+        for r in range(min(nb_digits, nb_cols - d1)):
+            if not alive.any():
+                break
+            alive &= _insert(basis, rows[pair_k, r], alive, nb_cols)
+            d2 += alive
+        strength = np.where(independent_j, np.minimum(strength, d1 + d2), strength)
+
+    t_values = np.zeros((dim, dim), dtype=np.int64)
+    t_values[pair_j, pair_k] = nb_cols - strength
+    t_values[pair_k, pair_j] = nb_cols - strength
+    for j in range(dim):
+        basis = np.zeros((1, nb_cols), dtype=np.uint64)
+        alive = np.ones(1, dtype=bool)
+        d = 0
+        for r in range(max_rows):
+            alive &= _insert(basis, rows[j:j+1, r], alive, nb_cols)
+            d += int(alive[0])
+        t_values[j, j] = nb_cols - d
+    return t_values
+
+
+def _bernoulli_kernel(x, alpha):
+    '''Return the kernel -(-4 pi^2)^(alpha/2) B_alpha(x) / alpha! of the P_alpha criterion, for alpha in 2, 4, 6.'''
+    if alpha == 2:
+        bernoulli = x * x - x + 1. / 6
+    elif alpha == 4:
+        bernoulli = x * x * (x * (x - 2) + 1) - 1. / 30
+    elif alpha == 6:
+        bernoulli = x * x * (x * x * (x * (x - 3) + 2.5) - 0.5) + 1. / 42
+    else:
+        raise ValueError('alpha must be 2, 4 or 6, not %s' % str(alpha))
+    return -(-4 * math.pi**2)**(alpha // 2) / math.factorial(alpha) * bernoulli
+
+
+def pairwise_p_alpha(gen_vector, nb_points, alpha=2, block_size=PROJECTION_BLOCK_SIZE):
+    '''Return the P_alpha projection terms of the 2-dimensional projections of an ordinary lattice, as a (dim, dim) array.
+
+    The term of the projection (j, k) is (1/n) sum_i w(x_ij) w(x_ik), where w is the kernel of P_alpha, so that all the
+    terms are given by the product W W^T / n, with W the (dim, n) matrix of the kernel values. The product is accumulated
+    over blocks of block_size points. The diagonal contains the terms of the 1-dimensional projections.'''
+    gen_vector = np.asarray(gen_vector, dtype=np.uint64) % np.uint64(nb_points)
+    dim = len(gen_vector)
+    terms = np.zeros((dim, dim))
+    terms_1d = np.zeros(dim)
+    for start in range(0, nb_points, block_size):
+        indices = np.arange(start, min(start + block_size, nb_points), dtype=np.uint64)
+        x = (np.outer(gen_vector, indices) % np.uint64(nb_points)) / float(nb_points)
+        kernel = _bernoulli_kernel(x, alpha)
+        terms += kernel @ kernel.T
+        terms_1d += kernel.sum(axis=1)
+    np.fill_diagonal(terms, terms_1d)
+    return terms / nb_points
+
+
+def projection_quality(result_obj, level=None, alpha=2):
+    '''Return the quality of the 2-dimensional projections of a Result as a (dim, dim) array, and its name.
+
+    The quality is the t-value for digital nets (including polynomial lattices), and the P_alpha projection term
+    for ordinary lattices (of the given level for multilevel point sets).'''
+    if len(result_obj.matrices) == 0:
+        nb_points = result_obj.nb_points if level is None else result_obj.base ** level
+        return pairwise_p_alpha(result_obj.gen_vector, nb_points, alpha), 'P%i projection term' % alpha
+    matrices = np.asarray(result_obj.matrices)
+    if level is not None:
+        matrices = matrices[:, :, :level]
+    return pairwise_t_values(matrices, result_obj.interlacing), 't-value'
@@ -1,4 +1,5 @@
 import subprocess
+import signal
 import time
 import os
 import sys
@@ -6,15 +7,59 @@ import shutil
 import logging
 import traceback
 import tarfile
+import copy
 from IPython.display import display, FileLink
 import numpy as np
 
 from .parse_output import parse_output, Result
 from .gui.output import output, create_output
 from .gui.progress_bars import progress_bars
+from .progress import ProgressTracker
+from .tracing import tracer
+from .weights import Weights, ProductWeights, OrderDependentWeights, PODWeights, ProjectionDependentWeights
 from .generate_points import generate_points_digital_net, generate_points_ordinary_lattice
 
 DEFAULT_OUTPUT_FOLDER = 'latnetbuilder_results'
+SHARDED_EXPLORATION_METHODS = ['random', 'random-Korobov']
+'''list: exploration methods whose random samples can be split between shards. The CBC methods (random-CBC, mixed-CBC)
+cannot: k CBC constructions with r/k candidates per coordinate are a weaker search than one with r candidates.'''
+
+MAX_SHARDS = 256
+'''int: maximum number of shards of a search. The shard i of a search with seed s uses the random stream
+s * MAX_SHARDS + i of LatNet Builder (option --seed), whatever the number of shards: searches with different seeds never
+overlap, sharded or not. Selecting the stream k costs k jumps of the generator (LFSR258::selectStream), a few
+nanoseconds each, so the startup cost grows linearly with the seed (about a millisecond for seed 1000).'''
+
+
+def _quote_for_cmd(arg):
+    '''Quote an argument for the Windows shell if it contains spaces or special characters (e.g. the ^ of 2^10).'''
+    if arg == '' or any(c in arg for c in ' \t^&|<>()%!"'):
+        return '"' + arg.replace('"', '""') + '"'
+    return arg
+
+
+class MeritDistribution():
+    '''Merit values observed by a sharded random search (see Search.execute).
+
+    Attributes:
+        + shard_merits: numpy array of the best merit found by each shard
+        + sample_merits: numpy array of the merits of all the random samples, when the C++ output reports them
+        (net searches); empty otherwise
+        + best_shard: index of the shard which found the best merit
+        + results: list of the Result instances of the shards (None for a failed shard)'''
+
+    def __init__(self, shard_merits, sample_merits, results):
+        self.shard_merits = np.array(shard_merits)
+        self.sample_merits = np.array(sample_merits)
+        self.results = results
+        self.best_shard = int(np.argmin(self.shard_merits))
+
+    def __repr__(self):
+        s = "Shards: %i\nBest merit: %s (shard %i)\nShard merits: %s" % (len(self.shard_merits), str(self.shard_merits[self.best_shard]), self.best_shard, str(self.shard_merits))
+        if len(self.sample_merits) > 0:
+            s += "\nSamples: %i (min %s, median %s, max %s)" % (len(self.sample_merits), str(self.sample_merits.min()), str(np.median(self.sample_merits)), str(self.sample_merits.max()))
+        return s
+
 
 class Search():
     def __init__(self):
@@ -31,7 +76,22 @@ class Search():
         self.filters = []
         self.my_output = None
         self.set_type_name = ''
+        self.seed = 0
+        self._shard = 0
+        self._evaluation_file = None
         self._output_folder = DEFAULT_OUTPUT_FOLDER
+        self._trace = None
+
+    def __getstate__(self):
+        '''Return the parameters of the search, without the state of its last execution: the output widgets, the progress
+        tracker (whose callbacks are often lambda functions), the trace and the merit distribution. Pickled and copied
+        searches thus start afresh (see the module work_queue).'''
+        state = self.__dict__.copy()
+        state.pop('progress', None)
+        state.pop('merit_distribution', None)
+        state['my_output'] = None
+        state['_trace'] = None
+        return state
 
     def __repr__(self):
         return ("Construction method: %s\n" + \
@@ -51,11 +111,11 @@ class Search():
         '''Construct and return the command line to call LatNetBuilder as a list of strings'''
 
         # default value for modulus
-        if self.modulus == '""':
+        if self.modulus == '':
             if self.construction == 'polynomial' and self.multilevel == True:
-                modulus = '"01^10"'
+                modulus = '01^10'
             else:
-                modulus = '"2^10"'
+                modulus = '2^10'
         else:
             modulus = self.modulus
 
@@ -73,45 +133,179 @@ class Search():
                    '--interlacing', str(self.interlacing),
                    '--output-folder', self._output_folder
                    ]
-        command += ['--weights'] + self.weights
+        command += ['--weights'] + self._weights_arguments()
         if self.filters != []:
             command += ['--filters'] + self.filters
         if self.combiner != '':
             command += ['--combiner', self.combiner]
+        stream = self.random_stream()
+        if stream != 0:
+            command += ['--seed', str(stream)]
+        if self._evaluation_file is not None:
+            command += ['--evaluation-file', self._evaluation_file]
         return command
 
+    def random_stream(self):
+        '''Return the index of the random stream of LatNet Builder used by the search (see MAX_SHARDS).'''
+        stream = self.seed * MAX_SHARDS + self._shard
+        if self.seed < 0 or stream >= 2**32:
+            raise ValueError('the seed must be between 0 and %i, not %s' % (2**32 // MAX_SHARDS - 1, str(self.seed)))
+        return stream
+
+    def _weights_arguments(self):
+        '''Return the arguments of the --weights option: the weights strings are passed as is, and the Weights instances
+        with many values are written to the files weights-<k>.txt of the output folder (see the module weights).'''
+        arguments = []
+        for k, weights in enumerate(self.weights):
+            if isinstance(weights, Weights):
+                arguments.append(weights.argument(int(self.dimension), os.path.join(self._output_folder, 'weights-%i.txt' % k)))
+            else:
+                arguments.append(weights)
+        return arguments
+
+    def add_weights(self, weights):
+        '''Add weights to the search (the actual weights are the sum of all the weights added).
+
+        Arguments:
+            + weights: a weights string of the command line (e.g. 'product:0:0.8,0.5'), or an instance of one of the classes
+            ProductWeights, OrderDependentWeights, PODWeights and ProjectionDependentWeights of the module weights'''
+        self.weights.append(weights)
+
+    def add_product_weights(self, weights, default=0.):
+        '''Add product weights given as a numpy array or a function of the coordinates 1, ..., s (see ProductWeights).'''
+        self.add_weights(ProductWeights(weights, default))
+
+    def add_order_dependent_weights(self, weights, default=0.):
+        '''Add order-dependent weights given as a numpy array or a function of the orders 1, ..., s (see OrderDependentWeights).'''
+        self.add_weights(OrderDependentWeights(weights, default))
+
+    def add_POD_weights(self, product_weights, order_weights, product_default=0., order_default=0.):
+        '''Add POD weights, whose product and order-dependent parts are given as numpy arrays or functions (see PODWeights).'''
+        self.add_weights(PODWeights(ProductWeights(product_weights, product_default), OrderDependentWeights(order_weights, order_default)))
+
+    def add_projection_dependent_weights(self, projections, weights=None):
+        '''Add projection-dependent weights, given as a dictionary mapping the projections (tuples of 1-based coordinates)
+        to their weights, or as a list of projections and their weights (see ProjectionDependentWeights).'''
+        self.add_weights(ProjectionDependentWeights(projections, weights))
+
     def search_type(self):
         pass
 
+    def _format_candidate(self, candidate):
+        '''Format a candidate of evaluate_batch as the argument of the evaluation exploration method.'''
+        if isinstance(candidate, str):
+            return candidate
+        return '-'.join([x if isinstance(x, str) else str(int(x)) for x in candidate])
+
     def _launch_subprocess(self, stdout_file, stderr_file):
         '''Call the C++ process using the Python module subprocess.
+
+        On POSIX systems, the executable is launched directly from the argument list (no shell is involved, so the arguments
+        need no quoting), as the leader of a new process group, so that _kill_process also reaches its children.
+        On Windows, the command goes through the shell, which finds the batch files and scripts installed by the installers.
+
+        The launch starts the root span 'search' of the trace of the search (see the module tracing), which is ended by
+        _end_trace once the result is parsed and archived.
         
         This function is used by the GUI, but should NOT be called directly by the end user.'''
 
-        command = self.construct_command_line()
+        self._trace = tracer.start_span('search', set_type=self.set_type_name, construction=self.construction,
+                                        exploration_method=self.exploration_method, figure_of_merit=self.figure_of_merit,
+                                        dimension=self.dimension, output_folder=self._output_folder)
+        with tracer.span('command_line', parent=self._trace):
+            command = self.construct_command_line()
+        with tracer.span('spawn', parent=self._trace) as span:
+            if sys.platform.startswith('win'):
+                process = subprocess.Popen(' '.join([_quote_for_cmd(arg) for arg in command]), stdout=stdout_file, stderr=stderr_file,
+                                           shell=True, creationflags=subprocess.CREATE_NEW_PROCESS_GROUP)
+            else:
+                process = subprocess.Popen(command, stdout=stdout_file, stderr=stderr_file, start_new_session=True)
+            span.set_attribute('pid', process.pid)
+        return process
+
+    def _end_trace(self, **attributes):
+        '''End the root span of the trace started by _launch_subprocess (if it is still running), with the given attributes.'''
+        if self._trace is not None and self._trace.end_time is None:
+            for key, value in attributes.items():
+                if value is not None:
+                    self._trace.set_attribute(key, value)
+            tracer.end_span(self._trace)
+
+    def evaluate_batch(self, candidates, workers=1, output_folder=None, delete_files=True):
+        '''Evaluate the figure of merit of many candidates, and return their merits as a numpy array aligned with candidates.
+
+        The candidates are written to one input file per worker, and each worker is a single C++ process which evaluates all
+        its candidates in turn (see the --evaluation-file option of LatNet Builder), so that the startup and parsing costs
+        are paid once per worker instead of once per candidate.
+
+        Arguments:
+            + candidates: list of candidates, each given as a string in the format of the evaluation exploration method, or as:
+                - a generating vector (list of integers, or of polynomials as strings of coefficients) for lattices and polynomial nets,
+                - a list of direction numbers per coordinate for Sobol nets,
+                - a list of generating matrices (2-dimensional arrays of bits) for explicit nets
+            + workers: number of C++ processes running in parallel (0 means one process per CPU)
+            + output_folder: folder containing the output folder of each worker (batch-<i>)
+            + delete_files: if set to False, the input and output files of the workers are not deleted
+
+        The merit of a candidate which could not be evaluated (for instance because it is invalid) is NaN.'''
+        if output_folder is not None:
+            self._output_folder = output_folder
+        if workers == 0:
+            workers = os.cpu_count() or 1
+        lines = [self._format_candidate(candidate) for candidate in candidates]
+        chunks = [chunk for chunk in np.array_split(np.arange(len(lines)), max(1, min(workers, len(lines)))) if len(chunk) > 0]
+        merits = np.full(len(lines), np.nan)
+
+        jobs = []
+        try:
+            for i, chunk in enumerate(chunks):
+                search = copy.copy(self)
+                search.my_output = None
+                search.exploration_method = 'evaluation'
+                search._output_folder = os.path.join(self._output_folder, 'batch-%i' % i)
+                os.makedirs(search._output_folder, exist_ok=True)
+                search._evaluation_file = os.path.join(search._output_folder, 'candidates.txt')
+                with open(search._evaluation_file, 'w') as f:
+                    f.write('\n'.join([lines[k] for k in chunk]) + '\n')
+                stdout_filepath = os.path.join(search._output_folder, 'cpp_outfile.txt')
+                stderr_filepath = os.path.join(search._output_folder, 'cpp_errfile.txt')
+                with open(stdout_filepath, 'w') as stdout_file, open(stderr_filepath, 'w') as stderr_file:
+                    jobs.append((search, chunk, stderr_filepath, search._launch_subprocess(stdout_file, stderr_file)))
+
+            for search, chunk, stderr_filepath, process in jobs:
+                with tracer.span('run', parent=search._trace):
+                    process.wait()
+                merits_filepath = os.path.join(search._output_folder, 'merits.txt')
+                if os.path.exists(merits_filepath):
+                    with tracer.span('parse', parent=search._trace):
+                        with open(merits_filepath) as f:
+                            values = [float(line) for line in f.read().split()]
+                    merits[chunk[:len(values)]] = values
+                if process.returncode != 0:
+                    with open(stderr_filepath) as f:
+                        print('The evaluation of the candidates %i to %i failed: %s' % (chunk[0], chunk[-1], f.read()))
+        finally:
+            for search, chunk, stderr_filepath, process in jobs:
+                self._kill_process(process)
+                search._end_trace(returncode=process.returncode, candidates=len(chunk))
+                if delete_files:
+                    shutil.rmtree(search._output_folder, ignore_errors=True)
+        return merits
+
+    def _kill_process(self, process):
+        '''Kill a C++ process launched by _launch_subprocess, together with its process group on POSIX systems.'''
         if sys.platform.startswith('win'):
-            process = subprocess.Popen(command, stdout=stdout_file, stderr=stderr_file, shell=True)
+            if process.poll() is None:
+                # the shell is killed with its children
+                subprocess.run(['taskkill', '/F', '/T', '/PID', str(process.pid)], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
         else:
-            process = subprocess.Popen(['exec ' + ' '.join(command)], stdout=stdout_file, stderr=stderr_file, shell=True)
-        # The exec keyword is essential as it allows to kill the latnetbuilder process using process.kill()
-        # This syntax may not work without the exec keyword.
-        return process
+            try:
+                os.killpg(process.pid, signal.SIGKILL)
+            except (ProcessLookupError, PermissionError):     # the process group has already exited
+                pass
+        process.kill()
 
-    def _parse_progress(self, line):
-        '''Parse the progress information delivered by the C++ stdout. Useful for progress bars.'''
-        try_split = line.split('-')
-        if len(try_split) == 1:
-            current_nb_nets = int(line.split('/')[0].split(' ')[-1])
-            total_nb_nets = int(line.split('/')[1])
-            return (0, float(current_nb_nets) / total_nb_nets)
-        elif len(try_split) == 2:
-            current_nb_nets = int(try_split[1].split('/')[0].split(' ')[-1])
-            total_nb_nets = int(try_split[1].split('/')[1])
-            current_dim = int(try_split[0].split('/')[0].split(' ')[-1])
-            total_dim = int(try_split[0].split('/')[1])
-            return (float(current_dim) / total_dim, float(current_nb_nets) / total_nb_nets)
-
-    def execute(self, output_folder=None, delete_files=True, stdout_filename='cpp_outfile.txt', stderr_filename='cpp_errfile.txt', display_progress_bar=False):
+    def execute(self, output_folder=None, delete_files=True, stdout_filename='cpp_outfile.txt', stderr_filename='cpp_errfile.txt', display_progress_bar=False, shards=None, progress_callbacks=None, timeout=None):
         '''Call the C++ process and monitor it.
 
         Arguments (all optional):
@@ -121,11 +315,21 @@ class Search():
             + stdout_filename: name of the file which will contain the std output of the C++ executable
             + stdout_filename: name of the file which will contain the error output of the C++ executable
             + display_progress_bars: if set to True, ipywidgets progress bars are displayed (should be used only in the notebook)
+            + shards: for the exploration methods random and random-Korobov, number of C++ processes running in parallel
+            (0 means one process per CPU).
+            See _execute_sharded.
+            + progress_callbacks: list of functions called as callback(event, tracker) for each progress line of the C++ output,
+            where event is a ProgressEvent and tracker the ProgressTracker of the search (see the module progress)
+            + timeout: if not None, time in seconds after which the C++ process is killed
         
         This function should be used by the end user if he instanciates a Search object.'''
         
         if output_folder is not None:
             self._output_folder = output_folder
+
+        if shards is not None and shards != 1:
+            return self._execute_sharded(shards, delete_files, stdout_filename, stderr_filename, display_progress_bar, progress_callbacks,
+                                         timeout=timeout)
             
         try:
             if not os.path.exists(self._output_folder):
@@ -139,17 +343,127 @@ class Search():
             return
 
         process = self._launch_subprocess(stdout_file, stderr_file)
-        self._monitor_process(process, stdout_filepath, stderr_filepath, display_progress_bar=display_progress_bar, delete_files=delete_files)
+        self._monitor_process(process, stdout_filepath, stderr_filepath, display_progress_bar=display_progress_bar, delete_files=delete_files,
+                              progress_callbacks=progress_callbacks, timeout=timeout)
+
+    def _shard_searches(self, shards):
+        '''Split the random samples of the exploration method between shards, and return one Search instance per shard.
+
+        The shards use distinct random streams (see MAX_SHARDS) so that their samples do not overlap.'''
+        method = self.exploration_method.split(':')
+        if method[0] in ['random-CBC', 'mixed-CBC']:
+            raise ValueError('sharded searches do not support the CBC exploration method %s: each shard would run its own CBC '
+                             'construction with fewer candidates per coordinate, which is a weaker search. Run it without shards.'
+                             % self.exploration_method)
+        if method[0] not in SHARDED_EXPLORATION_METHODS or len(method) < 2:
+            raise ValueError('sharded searches require the exploration method random or random-Korobov, not %s' % self.exploration_method)
+        nb_samples = int(method[1])
+        if shards == 0:
+            shards = os.cpu_count() or 1
+        shards = max(1, min(shards, nb_samples, MAX_SHARDS))
+        searches = []
+        for i in range(shards):
+            search = copy.copy(self)
+            search.my_output = None
+            search.exploration_method = ':'.join([method[0], str(nb_samples // shards + (i < nb_samples % shards))] + method[2:])
+            search._shard = i
+            search._output_folder = os.path.join(self._output_folder, 'shard-%i' % i)
+            searches.append(search)
+        return searches
+
+    def _execute_sharded(self, shards, delete_files, stdout_filename, stderr_filename, display_progress_bar, progress_callbacks=None, timeout=None):
+        '''Run a random search as several C++ processes in parallel, and keep the best result.
+
+        Each shard writes in the subfolder shard-<i> of the output folder. The result of the shard with the minimum merit
+        is the result of the search, and the merit distribution of all the shards is returned as a MeritDistribution instance.
+        Each shard has its own ProgressTracker, passed to the progress callbacks. After the timeout, the shards which are
+        still running are killed, and the best result of the finished shards is kept.'''
+        searches = self._shard_searches(shards)
+        trackers = [ProgressTracker(progress_callbacks) for _ in searches]
+        processes = []
+        stdout_readers = []
+        try:
+            files = []
+            for search in searches:
+                os.makedirs(search._output_folder, exist_ok=True)
+                stdout_filepath = os.path.join(search._output_folder, stdout_filename)
+                stderr_filepath = os.path.join(search._output_folder, stderr_filename)
+                files.append((stdout_filepath, stderr_filepath))
+                with open(stdout_filepath, 'w') as stdout_file, open(stderr_filepath, 'w') as stderr_file:
+                    processes.append(search._launch_subprocess(stdout_file, stderr_file))
+                stdout_readers.append(open(stdout_filepath, 'r'))
 
-    def _monitor_process(self, process, stdout_filepath, stderr_filepath, gui=None, display_progress_bar=False, delete_files=True):
+            if display_progress_bar:
+                my_progress_bars = progress_bars()
+                my_progress_bars.progress_bar_nets.layout.display = 'flex'
+                display(my_progress_bars.progress_bar_nets)
+            start_time = time.time()
+            timed_out = False
+            while any(process.poll() is None for process in processes):
+                time.sleep(0.1)
+                if timeout is not None and time.time() - start_time > timeout:
+                    timed_out = True
+                    for process in processes:
+                        self._kill_process(process)
+                        process.wait()
+                for tracker, stdout_reader in zip(trackers, stdout_readers):
+                    tracker.feed(stdout_reader.read())
+                if display_progress_bar:
+                    progress = [tracker.dimension_fraction() if tracker.total_dimension else tracker.nets_fraction()
+                                for tracker in trackers]
+                    my_progress_bars.progress_bar_nets.value = sum(progress) / len(progress)
+            for tracker, stdout_reader in zip(trackers, stdout_readers):
+                tracker.feed(stdout_reader.read() + '\n')
+            if display_progress_bar:
+                my_progress_bars.progress_bar_nets.layout.display = 'none'
+            if timed_out:
+                print("The search was stopped after the timeout of %s seconds." % str(timeout))
+
+            results, shard_merits, sample_merits = [], [], []
+            for search, (stdout_filepath, stderr_filepath), process in zip(searches, files, processes):
+                result_obj = None
+                if process.poll() == 0:
+                    with tracer.span('parse', parent=search._trace):
+                        with open(os.path.join(search._output_folder, 'outputMachine.txt')) as f:
+                            result_obj = parse_output(f.read())
+                    result_obj.trace = search._trace
+                elif not timed_out:
+                    with open(stderr_filepath) as f:
+                        print('Shard %s failed: %s' % (search._output_folder, f.read()))
+                with open(stdout_filepath) as f:
+                    sample_merits += [float(line.split()[2]) for line in f if line.startswith('Current merit: ')]
+                results.append(result_obj)
+                shard_merits.append(result_obj.merit if result_obj is not None else np.inf)
+                if delete_files:
+                    os.remove(stdout_filepath)
+                    os.remove(stderr_filepath)
+        finally:
+            for search, process in zip(searches, processes):
+                self._kill_process(process)
+                search._end_trace(returncode=process.returncode)
+            for stdout_reader in stdout_readers:
+                stdout_reader.close()
+
+        distribution = MeritDistribution(shard_merits, sample_merits, results)
+        self.merit_distribution = distribution
+        self.my_output = output()
+        self.my_output.result_obj = results[distribution.best_shard]
+        if self.my_output.result_obj is not None:
+            print(self.my_output.result_obj)
+        return distribution
+
+    def _monitor_process(self, process, stdout_filepath, stderr_filepath, gui=None, display_progress_bar=False, delete_files=True, progress_callbacks=None, timeout=None, verbose=True):
         '''Monitor the C++ process.
         
         This function is called inside a thread by the GUI (with gui containing the gui object).
-        It is called outside of any thread by the execute method.
+        It is called outside of any thread by the execute method, and inside a thread by the jobs of the GUI
+        (with verbose set to False, so that nothing is printed).
         
         The function deals the monitoring both with and without a GUI interface. Thus it is a bit lenghty
-        because the same information has to be treated in two different ways.'''
+        because the same information has to be treated in two different ways.
+        The standard output is read incrementally, and parsed into progress events by a ProgressTracker.'''
 
+        stdout_reader = None
         try:
             if gui is not None:
                 abort = gui.button_box.abort
@@ -161,41 +475,68 @@ class Search():
                     my_progress_bars = progress_bars()
                     my_progress_bars.progress_bar_dim.layout.display = 'flex'
                     my_progress_bars.progress_bar_nets.layout.display = 'flex'
+                    my_progress_bars.eta.layout.display = 'flex'
                     display(my_progress_bars.progress_bar_nets)
                     display(my_progress_bars.progress_bar_dim)
+                    display(my_progress_bars.eta)
+                    display(my_progress_bars.merit_chart.main)
+
+            if display_progress_bar:
+                # the live chart of the best merit is fed by the progress events, and stays displayed after the search
+                merit_chart = my_progress_bars.merit_chart
+                merit_chart.reset()
+                merit_chart.main.layout.display = 'flex'
+                progress_callbacks = list(progress_callbacks if progress_callbacks is not None else []) + [merit_chart.record]
 
             self.my_output = output()
+            self.progress = ProgressTracker(progress_callbacks)
+            stdout_reader = open(stdout_filepath, 'r')
+            start_time = time.time()
+            timed_out = False
             
-            while process.poll() is None:   # while the process is not finished
-                time.sleep(0.1)
-                with open(stdout_filepath,'r') as f:
-                    data = f.read()
-                try:
-                    last_line = data.split('\n')[-2]    # read the before last line (the last line is always blank)
-                    prog_dimension, prog_net = self._parse_progress(last_line)
-                    if display_progress_bar:    # update progress bars
-                        my_progress_bars.progress_bar_nets.value = prog_net
-                        my_progress_bars.progress_bar_dim.value = prog_dimension
-                except:
-                    pass 
+            with tracer.span('run', parent=self._trace) as run_span:
+                polls = 0
+                while process.poll() is None:   # while the process is not finished
+                    time.sleep(0.1)
+                    polls += 1
+                    if timeout is not None and time.time() - start_time > timeout:
+                        timed_out = True
+                        self._kill_process(process)
+                        process.wait()
+                    events = self.progress.feed(stdout_reader.read())
+                    if len(events) > 0 and len(run_span.events) == 0:
+                        run_span.add_event('first_progress', kind=events[0].kind)
+                    if len(events) > 0 and display_progress_bar:    # update progress bars
+                        my_progress_bars.progress_bar_nets.value = self.progress.nets_fraction()
+                        my_progress_bars.progress_bar_dim.value = self.progress.dimension_fraction()
+                        my_progress_bars.eta.value = self.progress.summary()
+                self.progress.feed(stdout_reader.read() + '\n')
+                run_span.set_attribute('polls', polls)
+                run_span.set_attribute('returncode', process.returncode)
+                run_span.set_attribute('timed_out', timed_out)
             
             if display_progress_bar:
                 my_progress_bars.progress_bar_dim.layout.display = 'none'
                 my_progress_bars.progress_bar_nets.layout.display = 'none'
+                my_progress_bars.eta.layout.display = 'none'
+                merit_chart.draw(self.progress)
             if gui is not None:
                 abort.button_style = ''
                 abort.disabled = True
 
             if process.poll() == 0:     # the C++ process has finished normally
-                with open(os.path.join(self._output_folder, 'outputMachine.txt')) as f:
-                    file_output = f.read()
-                result_obj = parse_output(file_output)
+                with tracer.span('parse', parent=self._trace):
+                    with open(os.path.join(self._output_folder, 'outputMachine.txt')) as f:
+                        file_output = f.read()
+                    result_obj = parse_output(file_output)
+                result_obj.trace = self._trace
 
                 if gui is not None:
-                    gui.output.result_html.value = result_obj._repr_html_()
-                    gui.output.result_obj = result_obj
-                    create_output(gui.output)
-                else:
+                    with tracer.span('render', parent=self._trace):
+                        gui.output.result_html.value = result_obj._repr_html_()
+                        gui.output.result_obj = result_obj
+                        create_output(gui.output)
+                elif verbose:
                     print(result_obj)
                 
                 self.my_output.result_obj = result_obj
@@ -214,8 +555,10 @@ class Search():
                         else:
                             gui.output.result_html.value = '<span style="color:red"> The C++ process crashed without returning an error message (for example due to a segmentation fault).<br>Please contact the developers to report this error.</span>'
                 
-                else:
-                    if err_output == '':
+                elif verbose:
+                    if timed_out:
+                        print("The search was stopped after the timeout of %s seconds." % str(timeout))
+                    elif err_output == '':
                         print("The C++ process crashed without returning an error message (for example due to a segmentation fault). Please contact the developers to report this error.")
                     else:
                         print(err_output)
@@ -234,16 +577,19 @@ class Search():
                 g.write(traceback.format_exc())
             if gui is not None:
                 gui.output.result_html.value += '<span style="color:red"> An error happened in the Python interface. In result archive, see file: stderr.txt </span>'
-            else:
+            elif verbose:
                 print('An error happened in the Python interface. In result folder, see file: ' + error_file)
         
         finally:
-            process.kill()
+            self._kill_process(process)
+            if stdout_reader is not None:
+                stdout_reader.close()
             try:
                 if gui is not None:
-                    with tarfile.open('latnetbuilder-results.tar.gz', "w:gz") as tar:
-                        tar.add(self._output_folder, arcname=os.path.basename(self._output_folder))
-                    shutil.make_archive('latnetbuilder-results', 'zip', self._output_folder)
+                    with tracer.span('archive', parent=self._trace):
+                        with tarfile.open('latnetbuilder-results.tar.gz', "w:gz") as tar:
+                            tar.add(self._output_folder, arcname=os.path.basename(self._output_folder))
+                        shutil.make_archive('latnetbuilder-results', 'zip', self._output_folder)
                     gui.output.file_link.children[1].children[0].clear_output()
                     gui.output.file_link.children[1].children[1].clear_output()
                     with gui.output.file_link.children[1].children[0]:
@@ -253,6 +599,7 @@ class Search():
             
             except:
                 gui.output.result_html.value += '<span style="color:red"> An error happened while trying to create the result archives. Please check that you have write permissions in the folder where this notebook runs. </span>'
+            self._end_trace(returncode=process.returncode)
             
 
     def rich_output(self):
@@ -261,29 +608,42 @@ class Search():
             print("Run self.execute() before outputing")
         else:
             display(self.my_output.result_obj)
-            create_output(self.my_output)
+            with tracer.span('render', parent=self.my_output.result_obj.trace):
+                create_output(self.my_output)
             display(self.my_output.output)
 
 
-    def points(self, coordinate=None, level=None):
+    def points(self, coordinate=None, level=None, exact=False, dtype=None, out=None, workers=None, pool='thread'):
         '''Compute and return the QMC points of the Search result.
         
         The points are returned as a 2-dimensional numpy array, the first index corresponds to the index of the point,
-        and the second corresponds to the coordinate.'''
+        and the second corresponds to the coordinate.
+        If exact is True (or dtype is an unsigned integer type, e.g. np.uint32), the points are returned as unsigned integers
+        scaled by the number of points for lattices, and by 2^(nb_rows * interlacing) for nets.
+        The points can be computed in single precision (dtype=np.float32), and written in an existing array out.
+        For digital nets, the points can be computed in parallel by a pool of workers (see generate_points_digital_net).'''
 
         if self.my_output is None or self.my_output.result_obj is None:
             print("Run self.execute() before using points")
         else:
             result_obj = self.my_output.result_obj
             
-            if self.construction == 'ordinary':
-                if level == None:
-                    return generate_points_ordinary_lattice(result_obj.gen_vector, result_obj.nb_points, coordinate)
+            # the point generation may be repeated many times (e.g. in a reused out array): each one is the root of its
+            # own trace, linked to the search by attributes, so that the finished trace of the search does not grow
+            link = {} if result_obj.trace is None else {'search_trace_id': result_obj.trace.trace_id,
+                                                        'search_span_id': result_obj.trace.span_id}
+            with tracer.span('points', root=True, level=str(level), exact=exact, **link) as span:
+                if self.construction == 'ordinary':
+                    if level == None:
+                        points = generate_points_ordinary_lattice(result_obj.gen_vector, result_obj.nb_points, coordinate, exact=exact, dtype=dtype, out=out)
+                    else:
+                        points = generate_points_ordinary_lattice(result_obj.gen_vector, result_obj.base ** level, coordinate, exact=exact, dtype=dtype, out=out)
+                
                 else:
-                    return generate_points_ordinary_lattice(result_obj.gen_vector, result_obj.base ** level, coordinate)
-            
-            else:
-                return generate_points_digital_net(result_obj.matrices, result_obj.interlacing, coordinate=coordinate, level=level)
+                    points = generate_points_digital_net(result_obj.matrices, result_obj.interlacing, coordinate=coordinate, level=level,
+                                                         exact=exact, dtype=dtype, out=out, workers=workers, pool=pool)
+                span.set_attribute('nb_points', int(points.shape[0]))
+            return points
 
 
 class SearchLattice(Search):
@@ -311,4 +671,14 @@ class SearchNet(Search):
         return "Point Set Type: Net\n" + super(SearchNet, self).__repr__()
 
     def search_type(self):
-        return 'digital-' + self.construction
\ No newline at end of file
+        return 'digital-' + self.construction
+
+    def _format_candidate(self, candidate):
+        '''Format a candidate of evaluate_batch as a net description.'''
+        if isinstance(candidate, str):
+            return candidate
+        if self.construction == 'sobol':
+            return '-'.join([','.join([str(int(x)) for x in direction_numbers]) for direction_numbers in candidate])
+        if self.construction == 'explicit':
+            return '-'.join([','.join([''.join([str(int(bit) % 2) for bit in row]) for row in matrix]) for matrix in candidate])
+        return super(SearchNet, self)._format_candidate(candidate)
\ No newline at end of file
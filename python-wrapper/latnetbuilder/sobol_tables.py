@@ -0,0 +1,146 @@
+"""Indexed binary tables for the Sobol construction.
+
+The text files data/JoeKuoSobolNets.csv and data/primitive_polynomials.csv are compiled into
+binary files (same name, .bin extension) which are memory-mapped on first use. Accessing the data
+for a range of coordinates only touches the bytes of this range, so no dimension cap is needed.
+
+Binary layout (little-endian):
+    + JoeKuoSobolNets.bin: 8-byte magic, uint64 number of coordinates n, uint64 offsets[n+1], uint32 values[offsets[n]]
+    + primitive_polynomials.bin: 8-byte magic, uint64 number of polynomials n, uint32 table[n, 2] (degree, representation)
+
+Run `python -m latnetbuilder.sobol_tables` to recompile the binary files after modifying the csv files.
+"""
+
+import os
+import tempfile
+
+import numpy as np
+
+_DATA_DIR = os.path.join(os.path.dirname(os.path.realpath(__file__)), 'data')
+
+_JOE_KUO_MAGIC = b'LNBJK\x00\x00\x01'
+_PRIM_POLY_MAGIC = b'LNBPP\x00\x00\x01'
+_HEADER_SIZE = 16
+
+_tables = {}
+
+
+def _read_lines(csv_path):
+    with open(csv_path, 'rb') as f:
+        raw = f.read().decode('utf-8')
+    return [line.strip() for line in raw.splitlines() if len(line) > 0 and line[0].isdigit()]
+
+
+def _write_header(f, magic, count):
+    f.write(magic)
+    f.write(np.array([count], dtype='<u8').tobytes())
+
+
+def compile_joe_kuo(csv_path, bin_path):
+    '''Compile the Joe and Kuo direction numbers (one coordinate per line) into an indexed binary file.'''
+    lines = _read_lines(csv_path)
+    rows = [[int(x) for x in line.split(',')] for line in lines]
+    offsets = np.zeros(len(rows) + 1, dtype='<u8')
+    offsets[1:] = np.cumsum([len(row) for row in rows])
+    values = np.fromiter((x for row in rows for x in row), dtype='<u4', count=int(offsets[-1]))
+    with open(bin_path, 'wb') as f:
+        _write_header(f, _JOE_KUO_MAGIC, len(rows))
+        f.write(offsets.tobytes())
+        f.write(values.tobytes())
+
+
+def compile_primitive_polynomials(csv_path, bin_path):
+    '''Compile the primitive polynomials (degree,representation per line) into a binary file.'''
+    lines = _read_lines(csv_path)
+    table = np.array([[int(x) for x in line.split(',')[:2]] for line in lines], dtype='<u4').reshape(-1, 2)
+    with open(bin_path, 'wb') as f:
+        _write_header(f, _PRIM_POLY_MAGIC, len(table))
+        f.write(table.tobytes())
+
+
+_COMPILERS = {'JoeKuoSobolNets': (compile_joe_kuo, _JOE_KUO_MAGIC),
+              'primitive_polynomials': (compile_primitive_polynomials, _PRIM_POLY_MAGIC)}
+
+
+def _bin_path(name):
+    '''Return the path to the binary table, compiling it if it is missing.
+
+    If the data folder is read-only, the table is compiled in the temporary directory.'''
+    bin_path = os.path.join(_DATA_DIR, name + '.bin')
+    if os.path.exists(bin_path):
+        return bin_path
+    compiler = _COMPILERS[name][0]
+    csv_path = os.path.join(_DATA_DIR, name + '.csv')
+    try:
+        compiler(csv_path, bin_path)
+    except OSError:
+        bin_path = os.path.join(tempfile.gettempdir(), 'latnetbuilder-' + name + '.bin')
+        if not os.path.exists(bin_path):
+            compiler(csv_path, bin_path)
+    return bin_path
+
+
+def _open_table(name):
+    if name not in _tables:
+        path = _bin_path(name)
+        magic = _COMPILERS[name][1]
+        with open(path, 'rb') as f:
+            header = f.read(_HEADER_SIZE)
+        if header[:8] != magic:
+            raise ValueError('%s is not a valid LatNet Builder table' % path)
+        count = int(np.frombuffer(header[8:], dtype='<u8')[0])
+        if name == 'JoeKuoSobolNets':
+            offsets = np.memmap(path, dtype='<u8', mode='r', offset=_HEADER_SIZE, shape=(count + 1,))
+            values = np.memmap(path, dtype='<u4', mode='r', offset=_HEADER_SIZE + 8 * (count + 1), shape=(int(offsets[-1]),))
+            _tables[name] = (offsets, values)
+        else:
+            _tables[name] = np.memmap(path, dtype='<u4', mode='r', offset=_HEADER_SIZE, shape=(count, 2))
+    return _tables[name]
+
+
+def _check_range(start, stop, count):
+    if stop is None:
+        stop = count
+    if not 0 <= start <= stop <= count:
+        raise IndexError('range [%i, %i) out of bounds (%i entries available)' % (start, stop, count))
+    return stop
+
+
+def nb_joe_kuo_coordinates():
+    '''Return the number of coordinates for which Joe and Kuo direction numbers are available.'''
+    offsets, _ = _open_table('JoeKuoSobolNets')
+    return len(offsets) - 1
+
+
+def joe_kuo_direction_numbers(start=0, stop=None):
+    '''Return the Joe and Kuo direction numbers of coordinates start, ..., stop-1 (0-based).
+
+    The result is a list of 1-dimensional numpy arrays. The first coordinate has direction numbers [0].'''
+    offsets, values = _open_table('JoeKuoSobolNets')
+    stop = _check_range(start, stop, len(offsets) - 1)
+    if stop == start:
+        return []
+    bounds = np.array(offsets[start:stop+1], dtype=np.int64)
+    block = np.array(values[bounds[0]:bounds[-1]], dtype=np.int64)
+    return np.split(block, bounds[1:-1] - bounds[0])
+
+
+def primitive_polynomials(start=0, stop=None):
+    '''Return the primitive polynomials of indices start, ..., stop-1 (0-based).
+
+    The result is a numpy array of shape (stop-start, 2): the first column contains the degrees,
+    and the second column the representations of the polynomials.'''
+    table = _open_table('primitive_polynomials')
+    stop = _check_range(start, stop, len(table))
+    return np.array(table[start:stop], dtype=np.int64)
+
+
+def compile_all(data_dir=_DATA_DIR):
+    '''(Re)compile all the binary tables from the csv files of data_dir.'''
+    for name, (compiler, _) in _COMPILERS.items():
+        compiler(os.path.join(data_dir, name + '.csv'), os.path.join(data_dir, name + '.bin'))
+        _tables.pop(name, None)
+
+
+if __name__ == '__main__':
+    compile_all()
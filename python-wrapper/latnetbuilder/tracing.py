@@ -0,0 +1,236 @@
+"""Tracing spans for the lifecycle of a search.
+
+A span measures one step of a search (construction of the command line, launch of the C++ process, run, parsing of the
+result, rendering, archiving, point generation). Spans are opened with the context manager tracer.span and nested: the
+spans of a search form a tree whose root is the span 'search', which is carried by the Result instance (attribute trace).
+The spans 'points' of the point generations, which may be repeated many times, are the roots of their own traces, linked
+to the search by their attributes search_trace_id and search_span_id.
+
+When a tree of spans is finished, it is handed to the exporter of the tracer:
+    + NoopExporter (default): the spans are only kept in memory, in the Result instances
+    + JsonLinesExporter: one JSON object per span, one span per line
+    + OTLPJsonExporter: one OpenTelemetry (OTLP/JSON) export request per tree, one request per line, which can be read
+    by the OpenTelemetry collector (otlpjsonfile receiver) and forwarded to any OpenTelemetry backend
+
+Example:
+    from latnetbuilder import tracing
+    tracing.set_exporter(tracing.JsonLinesExporter('latnetbuilder-trace.jsonl'))
+    search.execute()
+    print(search.my_output.result_obj.trace.format_tree())
+"""
+
+import os
+import json
+import time
+import threading
+from contextlib import contextmanager
+
+
+class Span():
+    '''One timed step of a search.
+
+    Attributes:
+        + name: name of the step
+        + trace_id, span_id: hexadecimal identifiers (OpenTelemetry sizes: 16 and 8 bytes)
+        + parent: parent span, or None for the root span
+        + children: list of the child spans
+        + start_time, end_time: Unix times in nanoseconds (end_time is None while the span is running)
+        + attributes: dictionary of attributes (strings, numbers or booleans)
+        + events: list of (time in nanoseconds, name, attributes) tuples, for instants inside the span'''
+
+    def __init__(self, name, parent=None, attributes=None):
+        self.name = name
+        self.parent = parent
+        self.trace_id = parent.trace_id if parent is not None else os.urandom(16).hex()
+        self.span_id = os.urandom(8).hex()
+        self.children = []
+        self.start_time = time.time_ns()
+        self.end_time = None
+        self.attributes = dict(attributes) if attributes is not None else {}
+        self.events = []
+        if parent is not None:
+            parent.children.append(self)
+
+    def set_attribute(self, key, value):
+        self.attributes[key] = value
+
+    def add_event(self, name, **attributes):
+        '''Record an instant inside the span, e.g. the first progress line of the C++ process.'''
+        self.events.append((time.time_ns(), name, attributes))
+
+    def duration(self):
+        '''Return the duration of the span in seconds (up to now if the span is running).'''
+        end_time = self.end_time if self.end_time is not None else time.time_ns()
+        return (end_time - self.start_time) * 1e-9
+
+    def root(self):
+        span = self
+        while span.parent is not None:
+            span = span.parent
+        return span
+
+    def walk(self):
+        '''Return the list of the spans of the subtree rooted at this span, parents first.'''
+        spans = [self]
+        for child in self.children:
+            spans += child.walk()
+        return spans
+
+    def find(self, name):
+        '''Return the first span of the subtree with the given name, or None.'''
+        for span in self.walk():
+            if span.name == name:
+                return span
+        return None
+
+    def to_dict(self):
+        return {'name': self.name,
+                'trace_id': self.trace_id,
+                'span_id': self.span_id,
+                'parent_id': self.parent.span_id if self.parent is not None else None,
+                'start_time': self.start_time,
+                'end_time': self.end_time,
+                'duration': self.duration(),
+                'attributes': self.attributes,
+                'events': [{'time': t, 'name': name, 'attributes': attributes} for t, name, attributes in self.events]}
+
+    def format_tree(self, indent=0):
+        '''Return a human-readable description of the subtree, one span per line with its duration.'''
+        s = '%s%s: %.4f s' % ('    ' * indent, self.name, self.duration())
+        for t, name, attributes in self.events:
+            s += '\n%s- %s at +%.4f s' % ('    ' * (indent + 1), name, (t - self.start_time) * 1e-9)
+        for child in self.children:
+            s += '\n' + child.format_tree(indent + 1)
+        return s
+
+    def __repr__(self):
+        return 'Span(%s, %.4f s, %i children)' % (self.name, self.duration(), len(self.children))
+
+
+class NoopExporter():
+    '''Exporter which drops the spans.'''
+
+    def export(self, spans):
+        pass
+
+
+class JsonLinesExporter():
+    '''Exporter which appends one JSON object per span to a file.'''
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def export(self, spans):
+        with self._lock:
+            with open(self.path, 'a') as f:
+                for span in spans:
+                    f.write(json.dumps(span.to_dict(), default=str) + '\n')
+
+
+def _otlp_value(value):
+    if isinstance(value, bool):
+        return {'boolValue': value}
+    if isinstance(value, int):
+        return {'intValue': str(value)}
+    if isinstance(value, float):
+        return {'doubleValue': value}
+    return {'stringValue': str(value)}
+
+
+def _otlp_attributes(attributes):
+    return [{'key': key, 'value': _otlp_value(value)} for key, value in attributes.items()]
+
+
+class OTLPJsonExporter():
+    '''Exporter which appends OpenTelemetry export requests (OTLP/JSON encoding) to a file, one request per line.
+
+    The file can be ingested by the OpenTelemetry collector with the otlpjsonfile receiver.'''
+
+    def __init__(self, path, service_name='latnetbuilder'):
+        self.path = path
+        self.service_name = service_name
+        self._lock = threading.Lock()
+
+    def _otlp_span(self, span):
+        otlp_span = {'traceId': span.trace_id,
+                     'spanId': span.span_id,
+                     'name': span.name,
+                     'kind': 1,     # SPAN_KIND_INTERNAL
+                     'startTimeUnixNano': str(span.start_time),
+                     'endTimeUnixNano': str(span.end_time if span.end_time is not None else time.time_ns()),
+                     'attributes': _otlp_attributes(span.attributes),
+                     'events': [{'timeUnixNano': str(t), 'name': name, 'attributes': _otlp_attributes(attributes)}
+                                for t, name, attributes in span.events]}
+        if span.parent is not None:
+            otlp_span['parentSpanId'] = span.parent.span_id
+        return otlp_span
+
+    def export(self, spans):
+        from .__meta__ import __version__
+        request = {'resourceSpans': [{
+            'resource': {'attributes': _otlp_attributes({'service.name': self.service_name})},
+            'scopeSpans': [{'scope': {'name': 'latnetbuilder', 'version': __version__},
+                            'spans': [self._otlp_span(span) for span in spans]}]}]}
+        with self._lock:
+            with open(self.path, 'a') as f:
+                f.write(json.dumps(request) + '\n')
+
+
+class Tracer():
+    '''Factory of spans. The current span of each thread is the parent of the spans opened in this thread.'''
+
+    def __init__(self, exporter=None):
+        self.exporter = exporter if exporter is not None else NoopExporter()
+        self._local = threading.local()
+
+    def _stack(self):
+        if not hasattr(self._local, 'stack'):
+            self._local.stack = []
+        return self._local.stack
+
+    def current_span(self):
+        stack = self._stack()
+        return stack[-1] if len(stack) > 0 else None
+
+    def start_span(self, name, parent=None, root=False, **attributes):
+        '''Start and return a span, which must be ended with end_span. The parent defaults to the current span,
+        unless root is True: the span is then the root of a new trace.'''
+        if parent is None and not root:
+            parent = self.current_span()
+        return Span(name, parent, attributes)
+
+    def end_span(self, span):
+        '''End the span. A finished tree of spans is exported when its root ends; a span ending after its root
+        (e.g. the rendering of the output of a finished search) is exported on its own.'''
+        span.end_time = time.time_ns()
+        if span.parent is None:
+            self.exporter.export(span.walk())
+        elif span.root().end_time is not None:
+            self.exporter.export(span.walk())
+
+    @contextmanager
+    def span(self, name, parent=None, root=False, **attributes):
+        '''Context manager which opens a span as the current span of the thread, and ends it on exit.
+
+        If an exception is raised, it is recorded in the attribute error of the span.'''
+        span = self.start_span(name, parent, root, **attributes)
+        stack = self._stack()
+        stack.append(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.set_attribute('error', type(e).__name__ + ': ' + str(e))
+            raise
+        finally:
+            stack.remove(span)
+            self.end_span(span)
+
+
+tracer = Tracer()
+'''Tracer: the tracer used by the Search instances'''
+
+
+def set_exporter(exporter):
+    '''Set the exporter of the spans of all the searches (NoopExporter, JsonLinesExporter or OTLPJsonExporter).'''
+    tracer.exporter = exporter
@@ -0,0 +1,203 @@
+"""Weights of the figures of merit, given as numpy arrays or functions.
+
+The instances of the classes of this module can be added to the list weights of a Search, next to the weights strings
+of the command line (see Search.add_weights). When the command line is constructed, small weights are passed as
+strings, and large ones (e.g. product weights of thousands of coordinates produced by a model) are written to a file
+weights-<k>.txt of the output folder, passed to LatNet Builder as from-file:<path>. This avoids building huge strings
+and exceeding the length limits of the command line.
+
+The coordinates and the orders are 1-based, as on the command line. The weights of a function are evaluated on the
+numpy array of the coordinates (or orders) 1, ..., s when the command line is constructed.
+
+Projection-dependent weights are stored in a sparse, indexed form: the coordinates of all the projections are
+concatenated in one array, and the projection k is given by the coordinates indices[indptr[k]:indptr[k+1]] (as the
+rows of a sparse CSR matrix).
+
+Example:
+    search.add_weights(ProductWeights(lambda j: 0.9**j))
+    search.add_weights(ProjectionDependentWeights({(1, 2): 0.5, (1, 3): 0.25}))
+"""
+
+import os
+
+import numpy as np
+
+FILE_MIN_VALUES = 64
+'''int: weights with at least this number of values are written to a file instead of the command line'''
+
+
+def _evaluate(weights, size):
+    '''Return the weights of the indices 1, ..., size as a float array.
+
+    weights is a function vectorized over a numpy array of indices (e.g. lambda j: 0.9**j), or an array-like,
+    which is used as is (its length may differ from size: the missing weights are the default weight).'''
+    if callable(weights):
+        values = np.broadcast_to(np.asarray(weights(np.arange(1, size + 1)), dtype=np.float64), (size,))
+    else:
+        values = np.asarray(weights, dtype=np.float64)
+    if values.ndim != 1:
+        raise ValueError('the weights must be a 1-dimensional array, not an array of shape %s' % str(values.shape))
+    if not np.all(np.isfinite(values)) or np.any(values < 0):
+        raise ValueError('the weights must be finite and non-negative')
+    return values
+
+
+def _format(values):
+    return [repr(value) for value in values.tolist()]
+
+
+def _csv_chunks(values, per_chunk=8):
+    '''Yield the comma-separated list of the values in chunks of per_chunk values.'''
+    values = _format(values)
+    for start in range(0, len(values), per_chunk):
+        yield ','.join(values[start:start+per_chunk]) + (',' if start + per_chunk < len(values) else '')
+
+
+class Weights():
+    '''Base class of the weights. The subclasses define size and chunks.'''
+
+    def size(self, dimension):
+        '''Return the number of values of the weights in the given dimension.'''
+        raise NotImplementedError
+
+    def chunks(self, dimension):
+        '''Yield the chunks of the weights string in the given dimension. The chunks are written on separate lines
+        of the weights files.'''
+        raise NotImplementedError
+
+    def weights_string(self, dimension):
+        '''Return the weights string of the command line in the given dimension.'''
+        return ''.join(self.chunks(dimension))
+
+    def write(self, path, dimension):
+        '''Write the weights in the given dimension to the file path, in the format of from-file.'''
+        with open(path, 'w') as f:
+            f.write('# %s\n' % repr(self))
+            for chunk in self.chunks(dimension):
+                f.write(chunk)
+                f.write('\n')
+
+    def argument(self, dimension, path):
+        '''Return the argument of the --weights option in the given dimension: the weights string, or from-file:path
+        after writing the weights to path if there are at least FILE_MIN_VALUES values.'''
+        if self.size(dimension) < FILE_MIN_VALUES:
+            return self.weights_string(dimension)
+        folder = os.path.dirname(path)
+        if folder != '' and not os.path.exists(folder):
+            os.makedirs(folder)
+        self.write(path, dimension)
+        return 'from-file:' + path
+
+
+class ProductWeights(Weights):
+    '''Product weights: the weight of a projection is the product of the weights of its coordinates.
+
+    Arguments:
+        + weights: weights of the coordinates 1, 2, ..., as an array-like or a function of the numpy array of the coordinates
+        + default: weight of the coordinates which are not given'''
+
+    def __init__(self, weights, default=0.):
+        self.weights = weights
+        self.default = float(default)
+
+    def __repr__(self):
+        return 'ProductWeights(%s, default=%s)' % ('function' if callable(self.weights) else '%i values' % len(self.weights), repr(self.default))
+
+    def size(self, dimension):
+        return len(_evaluate(self.weights, dimension))
+
+    def chunks(self, dimension):
+        yield 'product:%r:' % self.default
+        yield from _csv_chunks(_evaluate(self.weights, dimension))
+
+
+class OrderDependentWeights(Weights):
+    '''Order-dependent weights: the weight of a projection only depends on its number of coordinates (its order).
+
+    Arguments:
+        + weights: weights of the orders 1, 2, ..., as an array-like or a function of the numpy array of the orders
+        + default: weight of the orders which are not given'''
+
+    def __init__(self, weights, default=0.):
+        self.weights = weights
+        self.default = float(default)
+
+    def __repr__(self):
+        return 'OrderDependentWeights(%s, default=%s)' % ('function' if callable(self.weights) else '%i values' % len(self.weights), repr(self.default))
+
+    def size(self, dimension):
+        return len(_evaluate(self.weights, dimension))
+
+    def chunks(self, dimension):
+        yield 'order-dependent:%r:' % self.default
+        yield from _csv_chunks(_evaluate(self.weights, dimension))
+
+
+class PODWeights(Weights):
+    '''Product and order-dependent weights: the weight of a projection is the product of the weight of its order and
+    of the weights of its coordinates.
+
+    Arguments:
+        + product_weights: ProductWeights of the coordinates
+        + order_weights: OrderDependentWeights of the orders'''
+
+    def __init__(self, product_weights, order_weights):
+        self.product_weights = product_weights
+        self.order_weights = order_weights
+
+    def __repr__(self):
+        return 'PODWeights(%s, %s)' % (repr(self.product_weights), repr(self.order_weights))
+
+    def size(self, dimension):
+        return self.product_weights.size(dimension) + self.order_weights.size(dimension)
+
+    def chunks(self, dimension):
+        # the order-dependent weights come first on the command line
+        yield 'POD:%r:' % self.order_weights.default
+        yield from _csv_chunks(_evaluate(self.order_weights.weights, dimension))
+        yield ':%r:' % self.product_weights.default
+        yield from _csv_chunks(_evaluate(self.product_weights.weights, dimension))
+
+
+class ProjectionDependentWeights(Weights):
+    '''Projection-dependent weights, stored in a sparse indexed form: the projections which are not given have a weight 0.
+
+    Arguments:
+        + projections: dictionary mapping the projections (tuples of coordinates) to their weights, or list of projections
+        + weights: if projections is a list, weights of the projections, as an array-like or a function of a projection
+
+    Attributes:
+        + indptr, indices: the coordinates of the projection k are indices[indptr[k]:indptr[k+1]]
+        + values: weights of the projections'''
+
+    def __init__(self, projections, weights=None):
+        if isinstance(projections, dict):
+            projections, weights = list(projections.keys()), list(projections.values())
+        elif callable(weights):
+            weights = [weights(tuple(projection)) for projection in projections]
+        lengths = np.array([len(projection) for projection in projections], dtype=np.int64)
+        self.indptr = np.concatenate([[0], np.cumsum(lengths)])
+        self.indices = np.array([coordinate for projection in projections for coordinate in projection], dtype=np.int64)
+        self.values = _evaluate(weights, len(projections))
+        if len(self.values) != len(projections):
+            raise ValueError('%i weights are given for %i projections' % (len(self.values), len(projections)))
+        if np.any(self.indices < 1):
+            raise ValueError('the coordinates of the projections are 1-based')
+
+    def __repr__(self):
+        return 'ProjectionDependentWeights(%i projections)' % len(self.values)
+
+    def projection(self, k):
+        '''Return the coordinates of the projection k as a numpy array.'''
+        return self.indices[self.indptr[k]:self.indptr[k+1]]
+
+    def size(self, dimension):
+        return len(self.values)
+
+    def chunks(self, dimension):
+        yield 'projection-dependent:'
+        values = _format(self.values)
+        indices = self.indices.tolist()
+        indptr = self.indptr.tolist()
+        for k in range(len(values)):
+            yield '%s%s:%s' % (':' if k > 0 else '', ','.join(map(str, indices[indptr[k]:indptr[k+1]])), values[k])
@@ -0,0 +1,261 @@
+"""Local distributed work queue for LatNet Builder searches.
+
+A Coordinator holds the queue of submitted searches and listens on a socket. Worker daemons, started on the same
+machine or on other nodes with access to the LatNet Builder executable, connect to the coordinator, pull
+serialized Search instances, execute them and push back the (pickled) Result instances with timing records.
+
+Example:
+    authkey = os.urandom(32).hex().encode()     # random key, given to the workers
+    coordinator = Coordinator(('10.0.0.1', 6000), authkey=authkey)     # internal interface of the cluster
+    job_id = coordinator.submit(search)
+    # on each node: python -m latnetbuilder.work_queue 10.0.0.1:6000 <authkey>
+    result, timing = coordinator.result(job_id)
+
+Security: the coordinator and the workers exchange pickled objects, and unpickle the data they receive from the
+network, which can run arbitrary code. Anyone who can connect to the coordinator and knows the authentication key
+can thus run code on the coordinator (and a fake coordinator on the workers). Only listen on localhost or on an
+internal interface reachable by trusted nodes, and use a random key (e.g. os.urandom(32)), never the default one.
+
+The jobs are dispatched with (start-time) weighted fair queueing between flows: by default, lattice searches and
+net searches are two different flows, so that one huge net search cannot starve hundreds of small lattice searches.
+"""
+
+import os
+import sys
+import copy
+import time
+import pickle
+import shutil
+import socket
+import tempfile
+import threading
+import traceback
+from collections import deque
+from multiprocessing.connection import Listener, Client
+
+
+class Job():
+    '''A search submitted to the coordinator, together with its scheduling parameters and timing records.'''
+
+    def __init__(self, job_id, search, flow, weight, cost):
+        self.job_id = job_id
+        self.search = search
+        self.search_bytes = pickle.dumps(search)
+        self.flow = flow
+        self.weight = weight
+        self.cost = cost
+        self.result = None
+        self.error = None
+        self.timing = {'submitted': time.time()}
+        self.done = threading.Event()
+
+
+class FairQueue():
+    '''Start-time weighted fair queue.
+
+    Each flow has its own FIFO queue. A job receives the start tag max(V, F_flow), where V is the virtual time
+    (start tag of the last dispatched job) and F_flow the finish tag of the previous job of the same flow,
+    and the finish tag start + cost / weight. The job with the smallest start tag is dispatched first.'''
+
+    def __init__(self):
+        self.flows = {}
+        self.last_finish = {}
+        self.virtual_time = 0.
+
+    def push(self, job):
+        start = max(self.virtual_time, self.last_finish.get(job.flow, 0.))
+        self.last_finish[job.flow] = start + float(job.cost) / job.weight
+        self.flows.setdefault(job.flow, deque()).append((start, job))
+
+    def push_front(self, job):
+        '''Put back a job whose worker was lost: it is dispatched again as soon as possible.'''
+        self.flows.setdefault(job.flow, deque()).appendleft((self.virtual_time, job))
+
+    def pop(self):
+        candidates = [(queue[0][0], flow) for flow, queue in self.flows.items() if len(queue) > 0]
+        if len(candidates) == 0:
+            return None
+        start, flow = min(candidates)
+        self.virtual_time = max(self.virtual_time, start)
+        return self.flows[flow].popleft()[1]
+
+    def __len__(self):
+        return sum(len(queue) for queue in self.flows.values())
+
+
+class Coordinator():
+    '''Coordinator of the work queue.
+
+    Arguments:
+        + address: address to listen on, either a (host, port) tuple (port 0 picks a free port) or, on POSIX, the path
+        to a Unix socket. The actual address is available as the attribute address.
+        + authkey: bytes shared with the workers to authenticate the connections. The default key is only suitable for
+        the default address on localhost (see the security note of the module).'''
+
+    def __init__(self, address=('localhost', 0), authkey=b'latnetbuilder'):
+        self._listener = Listener(address, authkey=authkey)
+        self.address = self._listener.address
+        self.authkey = authkey
+        self.jobs = {}
+        self._queue = FairQueue()
+        self._condition = threading.Condition()
+        self._next_id = 0
+        self._closed = False
+        self._accept_thread = threading.Thread(target=self._accept, daemon=True)
+        self._accept_thread.start()
+
+    def submit(self, search, flow=None, weight=1., cost=1.):
+        '''Submit a search and return its job id.
+
+        Arguments:
+            + flow: name of the flow of the job, for fair scheduling (default: the set type of the search)
+            + weight: weight of the job in its flow; flows with larger weights get a larger share of the workers
+            + cost: estimated cost of the job, in arbitrary units
+
+        The search is serialized at once, so that a search which cannot be pickled (e.g. with weights given by a lambda
+        function) raises an error here instead of failing on the worker. The state of a previous execution of the search
+        is not serialized (see Search.__getstate__).'''
+        search = copy.copy(search)
+        if flow is None:
+            flow = search.set_type_name
+        with self._condition:
+            job = Job(self._next_id, search, flow, weight, cost)
+            self._next_id += 1
+            self.jobs[job.job_id] = job
+            self._queue.push(job)
+            self._condition.notify_all()
+        return job.job_id
+
+    def result(self, job_id, timeout=None):
+        '''Wait for the job to finish and return its Result instance (or None if the search failed) and its timing records.'''
+        job = self.jobs[job_id]
+        if not job.done.wait(timeout):
+            raise TimeoutError('job %i is not finished' % job_id)
+        return job.result, job.timing
+
+    def results(self, timeout=None):
+        '''Wait for all the submitted jobs and return a dictionary job id -> (Result, timing).'''
+        return {job_id: self.result(job_id, timeout) for job_id in list(self.jobs.keys())}
+
+    def close(self):
+        '''Stop dispatching jobs: the workers exit after their current job.'''
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+        self._listener.close()
+
+    def _accept(self):
+        while True:
+            try:
+                connection = self._listener.accept()
+            except (OSError, EOFError):
+                if self._closed:
+                    return
+                continue
+            threading.Thread(target=self._serve, args=(connection,), daemon=True).start()
+
+    def _next_job(self):
+        with self._condition:
+            while len(self._queue) == 0 and not self._closed:
+                self._condition.wait()
+            if self._closed:
+                return None
+            return self._queue.pop()
+
+    def _serve(self, connection):
+        '''Serve one worker: send it a job, wait for its result, and repeat.'''
+        job = None
+        try:
+            worker_name = connection.recv()
+            while True:
+                job = self._next_job()
+                if job is None:
+                    connection.send(None)
+                    return
+                job.timing['dispatched'] = time.time()
+                job.timing['worker'] = worker_name
+                try:
+                    connection.send((job.job_id, job.search_bytes))
+                except (OSError, EOFError):
+                    raise
+                except Exception:   # the job cannot be sent: it fails, and the worker gets the next one
+                    self._fail(job)
+                    job = None
+                    continue
+                job_id, result_bytes, error, timing = connection.recv()
+                job.result = pickle.loads(result_bytes) if result_bytes is not None else None
+                job.error = error
+                job.timing.update(timing)
+                job.timing['received'] = time.time()
+                job.done.set()
+                job = None
+        except (OSError, EOFError):
+            if job is not None:     # the worker was lost: the job is dispatched again
+                with self._condition:
+                    self._queue.push_front(job)
+                    self._condition.notify_all()
+        except Exception:
+            if job is not None:
+                self._fail(job)
+        finally:
+            connection.close()
+
+    def _fail(self, job):
+        '''Mark the job as failed with the current exception, and wake up its waiters.'''
+        job.error = traceback.format_exc()
+        job.timing['received'] = time.time()
+        job.done.set()
+
+
+def _run_job(search, work_dir):
+    '''Execute the search in a fresh output folder and return the pickled result and the error message.'''
+    output_folder = tempfile.mkdtemp(dir=work_dir)
+    try:
+        search.execute(output_folder=output_folder)
+        if search.my_output is not None and search.my_output.result_obj is not None:
+            return pickle.dumps(search.my_output.result_obj), None
+        error_file = os.path.join(output_folder, 'cpp_errfile.txt')
+        if os.path.exists(error_file):
+            with open(error_file) as f:
+                return None, f.read()
+        return None, 'The search failed.'
+    except Exception:
+        return None, traceback.format_exc()
+    finally:
+        shutil.rmtree(output_folder, ignore_errors=True)
+
+
+def run_worker(address, authkey=b'latnetbuilder', name=None, work_dir=None):
+    '''Worker daemon: pull jobs from the coordinator at address and execute them until the coordinator closes.'''
+    if name is None:
+        name = '%s:%i' % (socket.gethostname(), os.getpid())
+    connection = Client(address, authkey=authkey)
+    try:
+        connection.send(name)
+        while True:
+            message = connection.recv()
+            if message is None:
+                return
+            job_id, search_bytes = message
+            search = pickle.loads(search_bytes)
+            started = time.time()
+            result_bytes, error = _run_job(search, work_dir)
+            finished = time.time()
+            connection.send((job_id, result_bytes, error, {'started': started, 'finished': finished, 'wall_time': finished - started}))
+    except EOFError:
+        return
+    finally:
+        connection.close()
+
+
+if __name__ == '__main__':
+    if len(sys.argv) < 2:
+        print('usage: python -m latnetbuilder.work_queue HOST:PORT|SOCKET_PATH [AUTHKEY]')
+        sys.exit(1)
+    if ':' in sys.argv[1]:
+        host, port = sys.argv[1].rsplit(':', 1)
+        worker_address = (host, int(port))
+    else:
+        worker_address = sys.argv[1]
+    worker_authkey = sys.argv[2].encode() if len(sys.argv) > 2 else b'latnetbuilder'
+    run_worker(worker_address, worker_authkey)
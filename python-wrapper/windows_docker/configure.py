@@ -43,10 +43,15 @@ else:
     else:
         path_docker_machine = 'docker-machine'
 
+pool_size = ''
+while not pool_size.isdigit():
+    pool_size = input('How many Docker containers should be kept warm between two searches (0 to start a new container for each search)? ')
+
 with open(os.path.join(os.path.dirname(os.path.realpath(__file__)), 'config.txt'), 'w') as f:
     if path_docker:
         f.write('docker: docker for windows\n')
         f.write('"' + path_docker + '"')
     else:
         f.write('docker: docker toolbox\n')
-        f.write('"' + path_docker_machine + '"')
\ No newline at end of file
+        f.write('"' + path_docker_machine + '"')
+    f.write('\npool: ' + pool_size)
@@ -1,48 +1,143 @@
 import subprocess
 import os
 import sys
+import io
 import time
-import tempfile
+import shutil
+import uuid
+import queue
+import threading
 import tarfile
 import atexit
 
-def main():
-    dir_path = os.path.dirname(os.path.realpath(__file__))
-    try:
-        with open(os.path.join(dir_path, 'config.txt'), 'r') as f:
-            config = f.readlines()
-        config = [x.strip() for x in config]
-    except:
-        print('LatNet Builder was not configured. Run "latnetbuilder_configure".')
-        return
+IMAGE = 'umontrealsimul/latnetbuilder:light'
+POOL_LABEL = 'latnetbuilder.pool'
+POOL_DIR = os.path.join(os.path.expanduser('~'), '.latnetbuilder', 'pool')   # shared volume of the warm containers
+POOL_MOUNT = '/pool'
+DEFAULT_IDLE_TIMEOUT = 600  # seconds
+IDLE_POLL_INTERVAL = 10     # seconds between two checks of an idle container on its own idle time
+STREAM_BUFFER_SIZE = 1000   # max number of output lines waiting to be printed
+WEIGHTS_FILE_PREFIX = 'from-file:'
+WEIGHTS_DIR = '/tmp/latnetbuilder_weights'   # folder of the weights files in a new container
 
-    if 'docker: docker toolbox' in config:
-        res = subprocess.run(config[1] + ' status latnetbuilder', stdout=subprocess.PIPE).stdout.decode('utf-8')
-        if 'Stopped' in res:
-            subprocess.run(config[1] + ' start latnetbuilder')
-        elif not 'Running' in res:
-            subprocess.run(config[1] + ' rm latnetbuilder -y')
-            subprocess.run(config[1] + ' create latnetbuilder')
-            subprocess.run(config[1] + ' start latnetbuilder')
-
-        res = subprocess.run(config[1] + ' env latnetbuilder', stdout=subprocess.PIPE).stdout.decode('utf-8')
-        docker_host = res.split('DOCKER_HOST=')[1].split('\n')[0]
-        os.environ["DOCKER_HOST"] = docker_host
-        docker_tls_verify = res.split('DOCKER_TLS_VERIFY=')[1].split('\n')[0]
-        os.environ["DOCKER_TLS_VERIFY"] = docker_tls_verify
-        docker_cert_path = res.split('DOCKER_CERT_PATH=')[1].split('\n')[0]
-        os.environ["DOCKER_CERT_PATH"] = docker_cert_path
+def read_config(dir_path):
+    '''Read the configuration written by configure.py.
 
-    import docker
-    args = sys.argv[1:]
-    client = docker.from_env()
+    The first two lines describe the Docker distribution. The optional following lines have the form "key: value";
+    the recognized keys are "pool" (number of warm containers, 0 to disable the pool) and "idle-timeout"
+    (number of seconds after which an unused warm container stops). "latnetbuilder --stop-pool" removes the warm containers.'''
+    with open(os.path.join(dir_path, 'config.txt'), 'r') as f:
+        config = f.readlines()
+    config = [x.strip() for x in config]
+    options = {}
+    for line in config[2:]:
+        if ':' in line:
+            key, value = line.split(':', 1)
+            options[key.strip()] = value.strip()
+    return config, options
 
-    if '--output-folder' in args:
-        folder_path = args[args.index('--output-folder') + 1]
-        head, tail = os.path.split(folder_path)
-        args[args.index('--output-folder') + 1] = tail
+def setup_docker_toolbox(config):
+    res = subprocess.run(config[1] + ' status latnetbuilder', stdout=subprocess.PIPE).stdout.decode('utf-8')
+    if 'Stopped' in res:
+        subprocess.run(config[1] + ' start latnetbuilder')
+    elif not 'Running' in res:
+        subprocess.run(config[1] + ' rm latnetbuilder -y')
+        subprocess.run(config[1] + ' create latnetbuilder')
+        subprocess.run(config[1] + ' start latnetbuilder')
+
+    res = subprocess.run(config[1] + ' env latnetbuilder', stdout=subprocess.PIPE).stdout.decode('utf-8')
+    docker_host = res.split('DOCKER_HOST=')[1].split('\n')[0]
+    os.environ["DOCKER_HOST"] = docker_host
+    docker_tls_verify = res.split('DOCKER_TLS_VERIFY=')[1].split('\n')[0]
+    os.environ["DOCKER_TLS_VERIFY"] = docker_tls_verify
+    docker_cert_path = res.split('DOCKER_CERT_PATH=')[1].split('\n')[0]
+    os.environ["DOCKER_CERT_PATH"] = docker_cert_path
+
+def docker_host_path(path, is_toolbox):
+    '''Convert a host path to the syntax expected by the Docker daemon for bind mounts.
+
+    The Docker Toolbox VM shares C:\\Users as /c/Users.'''
+    if not is_toolbox:
+        return path
+    drive, rest = os.path.splitdrive(os.path.abspath(path))
+    return '/' + drive.rstrip(':').lower() + rest.replace('\\', '/')
+
+class ChunkReader(io.RawIOBase):
+    '''Read-only file object over an iterator of byte chunks, used to extract a tar archive while it is downloaded.'''
+
+    def __init__(self, chunks):
+        self.chunks = iter(chunks)
+        self.pending = b''
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        while not self.pending:
+            try:
+                self.pending = next(self.chunks)
+            except StopIteration:
+                return 0
+        size = min(len(buffer), len(self.pending))
+        buffer[:size] = self.pending[:size]
+        self.pending = self.pending[size:]
+        return size
+
+def stream_logs(container):
+    '''Print the standard and error outputs of the container while it runs.
+
+    Each channel is read by its own thread, and the lines are handed to the main thread through a bounded queue,
+    so that the two channels interleave and the memory stays bounded for verbose runs.
+    Returns True if the container wrote on its error output.'''
+    lines = queue.Queue(maxsize=STREAM_BUFFER_SIZE)
 
-    container = client.containers.run('umontrealsimul/latnetbuilder:light', 'latnetbuilder ' + ' '.join(args), detach=True)
+    def read_channel(is_stderr):
+        try:
+            for line in container.logs(stream=True, follow=True, stdout=not is_stderr, stderr=is_stderr):
+                lines.put((is_stderr, line))
+        finally:
+            lines.put((is_stderr, None))
+
+    for is_stderr in [False, True]:
+        threading.Thread(target=read_channel, args=(is_stderr,), daemon=True).start()
+
+    is_error = False
+    nb_open_channels = 2
+    while nb_open_channels > 0:
+        is_stderr, line = lines.get()
+        if line is None:
+            nb_open_channels -= 1
+        elif is_stderr:
+            print(line.strip().decode("utf-8"), file=sys.stderr)
+            is_error = True
+        else:
+            print(line.strip().decode("utf-8"))
+    return is_error
+
+def weights_files(args):
+    '''Return the list of the (index in args, host path) of the weights files passed as from-file:<path>.
+
+    These files do not exist in the containers: they are copied there, and the arguments are rewritten.'''
+    return [(k, arg[len(WEIGHTS_FILE_PREFIX):]) for k, arg in enumerate(args) if arg.startswith(WEIGHTS_FILE_PREFIX)]
+
+def weights_archive(files):
+    '''Return a tar archive containing the weights files, named <index in args>.txt in the folder WEIGHTS_DIR.'''
+    data = io.BytesIO()
+    with tarfile.open(mode='w', fileobj=data) as tar:
+        for k, path in files:
+            tar.add(path, arcname=os.path.basename(WEIGHTS_DIR) + '/%i.txt' % k)
+    return data.getvalue()
+
+def run_in_new_container(client, args, head, tail):
+    '''Run LatNet Builder in a brand new container, and remove it afterwards.'''
+    import docker
+    files = weights_files(args)
+    for k, _ in files:
+        args[k] = WEIGHTS_FILE_PREFIX + WEIGHTS_DIR + '/%i.txt' % k
+    container = client.containers.create(IMAGE, ['latnetbuilder'] + args)
+    if files:
+        container.put_archive(os.path.dirname(WEIGHTS_DIR), weights_archive(files))
+    container.start()
     name = container.name
 
     def stop_container():
@@ -52,27 +147,14 @@ def main():
             pass
     atexit.register(stop_container)
 
-    for line in container.logs(stream=True, stdout=True, stderr=False):
-        print(line.strip().decode("utf-8"))
-    
-    is_error = False
-    for line in container.logs(stream=True, stdout=False, stderr=True):
-        print(line.strip().decode("utf-8"), file=sys.stderr)
-        is_error = True
-    if is_error:
+    if stream_logs(container):
         exit(1)
 
     try:
-        if '--output-folder' in sys.argv:
-            with tempfile.NamedTemporaryFile() as tmp:
-                (data, _) = container.get_archive(tail)
-                for chunck in data:
-                    tmp.write(chunck)
-
-                tmp.seek(0)
-                with tarfile.open(mode='r', fileobj=tmp) as tar:
-                    tar.extractall(path=head)
-                    tar.close()
+        if tail is not None:
+            (data, _) = container.get_archive(tail)
+            with tarfile.open(mode='r|', fileobj=io.BufferedReader(ChunkReader(data))) as tar:
+                tar.extractall(path=head)
     except:
         print('Impossible to write to the output folder.')
 
@@ -82,6 +164,201 @@ def main():
         print('The Docker container %s may not have been removed and/or killed correctly. Please try docker kill %s && docker rm %s' % (name, name, name))
 
 
+class ContainerPool():
+    '''Pool of long-lived containers, in which the searches are run with docker exec.
+
+    The state of the pool is shared between the invocations of this script through files in POOL_DIR:
+    <name>.lock exists while a container is running a search, and <name>.last is touched after each search.
+    POOL_DIR is mounted in every container, and the output folders are written in it.'''
+
+    def __init__(self, client, size, idle_timeout, is_toolbox):
+        self.client = client
+        self.size = size
+        self.idle_timeout = idle_timeout
+        self.is_toolbox = is_toolbox
+        os.makedirs(os.path.join(POOL_DIR, 'runs'), exist_ok=True)
+
+    def _path(self, container, suffix):
+        return os.path.join(POOL_DIR, container.name + suffix)
+
+    def containers(self):
+        return self.client.containers.list(all=True, filters={'label': POOL_LABEL})
+
+    def _idle_command(self, name):
+        '''Return the command of an idle container: it exits (and the container stops) once it has not been locked nor
+        used for idle_timeout seconds, so that the warm containers do not outlive the searches.'''
+        lock = POOL_MOUNT + '/' + name + '.lock'
+        last = POOL_MOUNT + '/' + name + '.last'
+        loop = 'while [ -e %s ] || [ $(( $(date +%%s) - $(stat -c %%Y %s 2>/dev/null || echo 0) )) -lt %i ]; do sleep %i; done' \
+            % (lock, last, int(self.idle_timeout), IDLE_POLL_INTERVAL)
+        return ['sh', '-c', loop]
+
+    def _idle_time(self, container):
+        try:
+            return time.time() - os.path.getmtime(self._path(container, '.last'))
+        except OSError:
+            return float('inf')
+
+    def create(self, locked=False):
+        '''Start a new idle container, which keeps running until it is evicted or idle for idle_timeout seconds.
+
+        If locked is True, the container is locked before it starts, so that no other invocation can acquire it.'''
+        name = 'latnetbuilder-pool-' + uuid.uuid4().hex[:12]
+        # the files are written before the start: the container checks them, and other invocations list it at once
+        if locked:
+            with open(os.path.join(POOL_DIR, name + '.lock'), 'w'):
+                pass
+        with open(os.path.join(POOL_DIR, name + '.last'), 'w'):
+            pass
+        try:
+            return self.client.containers.run(IMAGE, self._idle_command(name), name=name, detach=True, labels={POOL_LABEL: '1'},
+                            volumes={docker_host_path(POOL_DIR, self.is_toolbox): {'bind': POOL_MOUNT, 'mode': 'rw'}})
+        except Exception:
+            for suffix in ['.lock', '.last']:
+                try:
+                    os.remove(os.path.join(POOL_DIR, name + suffix))
+                except OSError:
+                    pass
+            raise
+
+    def remove(self, container):
+        try:
+            container.remove(force=True)
+        except Exception:
+            pass
+        for suffix in ['.lock', '.last']:
+            try:
+                os.remove(self._path(container, suffix))
+            except OSError:
+                pass
+
+    def acquire(self):
+        '''Lock and return an idle running container, or a new container if there is none.
+
+        The containers about to stop by themselves (see _idle_command) are not used. The containers which are not running
+        are left to evict_and_refill: another invocation may be starting them.'''
+        for container in self.containers():
+            if container.status != 'running':
+                continue
+            if self._idle_time(container) > self.idle_timeout - min(2 * IDLE_POLL_INTERVAL, self.idle_timeout / 2):
+                continue
+            try:
+                fd = os.open(self._path(container, '.lock'), os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            except OSError:     # the container is busy
+                continue
+            os.close(fd)
+            return container
+        return self.create(locked=True)
+
+    def release(self, container):
+        with open(self._path(container, '.last'), 'w'):
+            pass
+        try:
+            os.remove(self._path(container, '.lock'))
+        except OSError:
+            pass
+
+    def stop(self):
+        '''Remove all the containers of the pool.'''
+        for container in self.containers():
+            self.remove(container)
+
+    def evict_and_refill(self):
+        '''Remove the stopped containers and the ones idle for more than idle_timeout seconds, then start containers until
+        size are running (or starting).'''
+        containers = self.containers()
+        for container in list(containers):
+            if os.path.exists(self._path(container, '.lock')):
+                continue
+            if container.status in ['exited', 'dead'] or self._idle_time(container) > self.idle_timeout:
+                self.remove(container)
+                containers.remove(container)
+        for _ in range(self.size - len(containers)):
+            self.create()
+
+    def run(self, args, head, tail):
+        '''Run LatNet Builder with docker exec inside a warm container.
+
+        The output folder is written in the shared volume, then moved to its destination.'''
+        container = self.acquire()
+        finished = []
+
+        def remove_if_interrupted():
+            # an interrupted exec cannot be stopped alone: the whole container is removed
+            if not finished:
+                self.remove(container)
+        atexit.register(remove_if_interrupted)
+
+        run_id = uuid.uuid4().hex
+        run_dir = os.path.join(POOL_DIR, 'runs', run_id)
+        os.makedirs(run_dir)
+        for k, path in weights_files(args):
+            shutil.copyfile(path, os.path.join(run_dir, 'weights-arg-%i.txt' % k))
+            args[k] = WEIGHTS_FILE_PREFIX + POOL_MOUNT + '/runs/' + run_id + '/weights-arg-%i.txt' % k
+        if tail is not None:
+            args[args.index('--output-folder') + 1] = POOL_MOUNT + '/runs/' + run_id + '/' + tail
+
+        api = self.client.api
+        exec_id = api.exec_create(container.id, ['latnetbuilder'] + args)['Id']
+        is_error = False
+        for stdout, stderr in api.exec_start(exec_id, stream=True, demux=True):
+            if stdout:
+                sys.stdout.write(stdout.decode('utf-8'))
+            if stderr:
+                sys.stderr.write(stderr.decode('utf-8'))
+                is_error = True
+        exit_code = api.exec_inspect(exec_id)['ExitCode']
+        finished.append(True)
+        self.release(container)
+
+        try:
+            if tail is not None and os.path.isdir(os.path.join(run_dir, tail)):
+                destination = os.path.join(head, tail)
+                shutil.rmtree(destination, ignore_errors=True)
+                shutil.move(os.path.join(run_dir, tail), destination)
+        except Exception:
+            print('Impossible to write to the output folder.')
+        shutil.rmtree(run_dir, ignore_errors=True)
+
+        self.evict_and_refill()
+        if is_error or exit_code != 0:
+            exit(1)
+
+
+def main():
+    dir_path = os.path.dirname(os.path.realpath(__file__))
+    try:
+        config, options = read_config(dir_path)
+    except:
+        print('LatNet Builder was not configured. Run "latnetbuilder_configure".')
+        return
+
+    is_toolbox = 'docker: docker toolbox' in config
+    if is_toolbox:
+        setup_docker_toolbox(config)
+
+    import docker
+    args = sys.argv[1:]
+    client = docker.from_env()
+
+    if args == ['--stop-pool']:
+        ContainerPool(client, 0, 0, is_toolbox).stop()
+        return
+
+    head, tail = None, None
+    if '--output-folder' in args:
+        folder_path = args[args.index('--output-folder') + 1]
+        head, tail = os.path.split(folder_path)
+        args[args.index('--output-folder') + 1] = tail
+
+    pool_size = int(options.get('pool', 0))
+    if pool_size > 0:
+        pool = ContainerPool(client, pool_size, float(options.get('idle-timeout', DEFAULT_IDLE_TIMEOUT)), is_toolbox)
+        pool.run(args, head, tail)
+    else:
+        run_in_new_container(client, args, head, tail)
+
+
 if __name__=='__main__':
     try:
         main()
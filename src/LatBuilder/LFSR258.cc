@@ -27,6 +27,18 @@ const LFSR258::seed_type LFSR258::default_seed = {{
    std::numeric_limits<result_type>::max() / 54321
 }};
 
+LFSR258::seed_type LFSR258::s_streamSeed = LFSR258::default_seed;
+
+void LFSR258::selectStream(unsigned int stream)
+{
+   LFSR258 gen(default_seed);
+   for (unsigned int i = 0; i < stream; i++)
+      gen.jump();
+   if (stream > 0)
+      gen();   // the state right after a jump differs from the state reached by iterating, but the next one is identical
+   s_streamSeed = gen.seed();
+}
+
 auto LFSR258::operator()() -> result_type
 {
    result_type b;
@@ -24,7 +24,9 @@
 
 #include "latticetester/Coordinates.h"
 
+#include <cctype>
 #include <cmath>
+#include <fstream>
 
 namespace LatBuilder { namespace Parser {
 
@@ -34,15 +36,23 @@ Weights::parseProjectionDependent(const std::string& arg, Real powerScale)
    auto ka = splitPair<>(arg, ':');
    if (ka.first != "projection-dependent") return nullptr;
    auto w = new LatticeTester::ProjectionDependentWeights;
-   std::string rest = ka.second;
-   while (!rest.empty()) {
-      auto s1 = splitPair<>(rest, ':');
-      auto s2 = splitPair<LatticeTester::Weight, std::string>(s1.second, ':');
-      auto p = splitCSV<uInteger>(s1.first);
+   const std::string& rest = ka.second;
+   // scan the <proj>:<weight> pairs in place (copying the rest of the string at each
+   // pair would be quadratic in the number of projections)
+   std::string::size_type pos = 0;
+   while (pos < rest.size()) {
+      auto sep = rest.find(':', pos);
+      if (sep == std::string::npos)
+         throw BadWeights("missing weight for projection " + rest.substr(pos));
+      auto end = rest.find(':', sep + 1);
+      if (end == std::string::npos)
+         end = rest.size();
+      auto p = splitCSV<uInteger>(rest.substr(pos, sep - pos));
       for (auto& pi : p) pi--;
-      rest = s2.second;
+      auto weight = splitPair<LatticeTester::Weight>(rest.substr(sep + 1, end - sep - 1), ':').first;
       LatticeTester::Coordinates proj(p.begin(), p.end());
-      w->setWeight(std::move(proj), std::pow(s2.first, powerScale));
+      w->setWeight(std::move(proj), std::pow(weight, powerScale));
+      pos = end + 1;
    }
    return std::unique_ptr<LatticeTester::Weights>(w);
 }
@@ -95,9 +105,33 @@ Weights::parsePOD(const std::string& arg, Real powerScale)
    return std::unique_ptr<LatticeTester::Weights>(w);
 }
 
+std::unique_ptr<LatticeTester::Weights>
+Weights::parseFromFile(const std::string& arg, Real powerScale)
+{
+   auto ka = splitPair<>(arg, ':');
+   if (ka.first != "from-file") return nullptr;
+   std::ifstream is(ka.second.c_str());
+   if (not is.is_open()) throw ParserError("cannot open weights file " + ka.second);
+   std::string content;
+   std::string line;
+   while (std::getline(is, line)) {
+      auto comment = line.find('#');
+      if (comment != std::string::npos)
+         line.erase(comment);
+      for (const char c : line)
+         if (not std::isspace(static_cast<unsigned char>(c)))
+            content.push_back(c);
+   }
+   if (splitPair<>(content, ':').first == "from-file")
+      throw BadWeights("the weights file " + ka.second + " cannot refer to another weights file");
+   return parse(content, powerScale);
+}
+
 std::unique_ptr<LatticeTester::Weights> 
 Weights::parse(const std::string& arg, Real powerScale)
 {
+   if (auto p = parseFromFile(arg, powerScale))
+      return p;
    if (auto p = parseProjectionDependent(arg, powerScale))
       return p;
    if (auto p = parsePOD(arg, powerScale))
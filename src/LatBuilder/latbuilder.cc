@@ -19,11 +19,14 @@
 #include "latbuilder/Parser/CommandLine.h"   
 #include "latbuilder/TextStream.h"
 #include "latbuilder/Types.h"
+#include "latbuilder/LFSR258.h"
 
 #include "netbuilder/DigitalNet.h"
 #include "netbuilder/Types.h"
 
 #include <fstream>
+#include <algorithm>
+#include <cctype>
 #include <chrono>
 #include <boost/filesystem.hpp>
 
@@ -127,6 +130,8 @@ makeOptionsDescription()
     "  POD:<default>:<order-1-weight>,...,<order-s-weight>:<default>:<coord1-weight>[,...]\n"
     "  projection-dependent:<proj-1>:<weight-1>[:<proj-2>:<weight-2>[:...]]\n"
     "    where <proj-n> is a comma-separated list of coordinates\n"
+    "  from-file:\"<file>\"\n"
+    "    <file> contains one of the above specifications, in which whitespace is ignored and # starts a comment\n"
     "  file:\"<file>\"\n"
     "    line format in <file>:\n"
     "      <i1>,<i2>,...: <weight>\n"
@@ -154,13 +159,20 @@ makeOptionsDescription()
    ("repeat,r", po::value<unsigned int>()->default_value(1),
     "(optional) number of times the exploration must be executed\n"
    "(can be useful to obtain different results from random exploration)\n")
+   ("seed", po::value<unsigned int>()->default_value(0),
+    "(optional) index of the random stream used by the random explorations;\n"
+   "searches executed with different seeds explore non-overlapping random samples\n")
    ("verbose,v", po::value<int>()->default_value(0),
    "specify the verbosity of the program;\n"
    "ranges between 0 (default) and 3\n")
     ("output-folder,o", po::value<std::string>(),
     "(optional) path to the folder for the outputs of LatNeBuilder. The contents of the folder may be overwritten. If the folder does not exist, it is created. If no path is provided, no output folder is created.")
    ("merit-digits-displayed", po::value<unsigned int>()->default_value(0),
-    "(optional) number of significant figures to use when displaying merit values\n");
+    "(optional) number of significant figures to use when displaying merit values\n")
+   ("evaluation-file", po::value<std::string>(),
+    "(optional) path to a file containing one generating vector per line (see evaluation:<a1>,...,<as>); "
+    "the figure of merit of each lattice is evaluated in turn, and the merit values are written, one per line and in the same order, "
+    "to the file merits.txt of the output folder. The exploration method is ignored.\n");
 
    return desc;
 }
@@ -212,12 +224,58 @@ std::string helper(const SizeParam<LatticeType::ORDINARY, EmbeddingType::UNILEVE
   return "0  // Base\n0  // Maximum level\n";
 }
 
+/**
+ * Reads the candidates of a batch evaluation: one generating vector per line (empty lines are skipped).
+ */
+std::vector<std::string> readCandidates(const std::string& evaluationFile)
+{
+   std::ifstream inFile(evaluationFile);
+   if (!inFile)
+      throw std::runtime_error("cannot open the evaluation file " + evaluationFile);
+   std::vector<std::string> candidates;
+   std::string line;
+   while (std::getline(inFile, line)) {
+      line.erase(std::remove_if(line.begin(), line.end(), ::isspace), line.end());
+      if (!line.empty())
+         candidates.push_back(line);
+   }
+   return candidates;
+}
+
+/**
+ * Evaluates the figure of merit of all the candidates of the evaluation file in a single process,
+ * and writes the merit values, one per line, to merits.txt in the output folder.
+ */
+template <LatticeType LR, EmbeddingType ET>
+void executeBatchEvaluation(Parser::CommandLine<LR, ET> cmd, const std::string& evaluationFile, std::string outputFolder)
+{
+   auto candidates = readCandidates(evaluationFile);
+   std::ofstream meritsFile;
+   if (outputFolder != ""){
+      meritsFile.open(outputFolder + "/merits.txt");
+      meritsFile.precision(std::numeric_limits<Real>::max_digits10);
+   }
+   for (unsigned int i = 0; i < candidates.size(); i++) {
+      cmd.construction = "evaluation:" + candidates[i];
+      auto search = cmd.parse();
+      search->execute();
+      if (outputFolder != "")
+         meritsFile << search->bestMeritValue() << std::endl;
+      std::cout << "Lattice " << i+1 << "/" << candidates.size() << std::endl;
+   }
+}
+
 template <EmbeddingType ET>
-void executeOrdinary(const Parser::CommandLine<LatticeType::ORDINARY, ET>& cmd, int verbose, unsigned int repeat, std::string outputFolder)
+void executeOrdinary(const Parser::CommandLine<LatticeType::ORDINARY, ET>& cmd, int verbose, unsigned int repeat, std::string outputFolder, std::string evaluationFile = "")
 {
    const LatticeType LR = LatticeType::ORDINARY ;
    using namespace std::chrono;
 
+   if (evaluationFile != ""){
+      executeBatchEvaluation<LR, ET>(cmd, evaluationFile, outputFolder);
+      return;
+   }
+
    auto search = cmd.parse();
 
    const std::string separator = "====================\n";
@@ -293,11 +351,16 @@ void executeOrdinary(const Parser::CommandLine<LatticeType::ORDINARY, ET>& cmd,
 
 
 template <EmbeddingType ET>
-void executePolynomial(const Parser::CommandLine<LatticeType::POLYNOMIAL, ET>& cmd, int verbose, unsigned int repeat, std::string outputFolder)
+void executePolynomial(const Parser::CommandLine<LatticeType::POLYNOMIAL, ET>& cmd, int verbose, unsigned int repeat, std::string outputFolder, std::string evaluationFile = "")
 {
    const LatticeType LR = LatticeType::POLYNOMIAL ;
    using namespace std::chrono;
 
+   if (evaluationFile != ""){
+      executeBatchEvaluation<LR, ET>(cmd, evaluationFile, outputFolder);
+      return;
+   }
+
    auto search = cmd.parse();
    
    unsigned int interlacingFactor = 1;
@@ -393,6 +456,8 @@ int main(int argc, const char *argv[])
         
         auto repeat = opt["repeat"].as<unsigned int>();
 
+        LatBuilder::LFSR258::selectStream(opt["seed"].as<unsigned int>());
+
         std::string outputFolder = "";
         if (opt.count("output-folder") >= 1){
           outputFolder = opt["output-folder"].as<std::string>();
@@ -403,6 +468,10 @@ int main(int argc, const char *argv[])
         // global variable
         merit_digits_displayed = opt["merit-digits-displayed"].as<unsigned int>();
 
+        std::string evaluationFile = "";
+        if (opt.count("evaluation-file") >= 1)
+          evaluationFile = opt["evaluation-file"].as<std::string>();
+
        LatBuilder::LatticeType lattice = Parser::LatticeParser::parse(opt["construction"].as<std::string>());
 
        if(lattice == LatticeType::ORDINARY){
@@ -454,11 +523,11 @@ int main(int argc, const char *argv[])
 
             if (latType == EmbeddingType::UNILEVEL){
 
-               executeOrdinary<EmbeddingType::UNILEVEL> (cmd, verbose, repeat, outputFolder);
+               executeOrdinary<EmbeddingType::UNILEVEL> (cmd, verbose, repeat, outputFolder, evaluationFile);
                
              }
             else{
-               executeOrdinary<EmbeddingType::MULTILEVEL> (cmd, verbose, repeat, outputFolder);
+               executeOrdinary<EmbeddingType::MULTILEVEL> (cmd, verbose, repeat, outputFolder, evaluationFile);
                
              }
       }
@@ -503,11 +572,11 @@ int main(int argc, const char *argv[])
             EmbeddingType latType = Parser::EmbeddingType::parse(opt["multilevel"].as<std::string>());
 
             if (latType == EmbeddingType::UNILEVEL){
-               executePolynomial< EmbeddingType::UNILEVEL> (cmd, verbose, repeat, outputFolder);
+               executePolynomial< EmbeddingType::UNILEVEL> (cmd, verbose, repeat, outputFolder, evaluationFile);
                
              }
             else{
-               executePolynomial<EmbeddingType::MULTILEVEL> (cmd, verbose, repeat, outputFolder);
+               executePolynomial<EmbeddingType::MULTILEVEL> (cmd, verbose, repeat, outputFolder, evaluationFile);
                
              }
       }
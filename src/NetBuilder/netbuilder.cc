@@ -22,6 +22,8 @@
 #include <boost/lexical_cast.hpp>
 #include <iostream>
 #include <limits>
+#include <algorithm>
+#include <cctype>
 
 #include "netbuilder/Types.h"
 #include "netbuilder/Parser/CommandLine.h"
@@ -31,6 +33,7 @@
 
 #include "latbuilder/Parser/Common.h"
 #include "latbuilder/SizeParam.h"
+#include "latbuilder/LFSR258.h"
 
 // using namespace LatBuilder;
 // using TextStream::operator<<;
@@ -68,6 +71,26 @@ void TaskOutput(const Task::Task &task, std::string outputFolder, unsigned int i
   }
 }
 
+/**
+ * Reads the candidates of a batch evaluation: one net description per line (empty lines are skipped).
+ */
+std::vector<std::string> readCandidates(const std::string& evaluationFile)
+{
+  std::ifstream inFile(evaluationFile);
+  if (!inFile){
+    throw std::runtime_error("cannot open the evaluation file " + evaluationFile);
+  }
+  std::vector<std::string> candidates;
+  std::string line;
+  while (std::getline(inFile, line)){
+    line.erase(std::remove_if(line.begin(), line.end(), ::isspace), line.end());
+    if (!line.empty()){
+      candidates.push_back(line);
+    }
+  }
+  return candidates;
+}
+
 boost::program_options::options_description
 makeOptionsDescription()
 {
@@ -129,6 +152,8 @@ makeOptionsDescription()
     "  POD:<default>:<order-1-weight>,...,<order-s-weight>:<default>:<coord1-weight>[,...]\n"
     "  projection-dependent:<proj-1>:<weight-1>[:<proj-2>:<weight-2>[:...]]\n"
     "    where <proj-n> is a comma-separated list of coordinates\n"
+    "  from-file:\"<file>\"\n"
+    "    <file> contains one of the above specifications, in which whitespace is ignored and # starts a comment\n"
     "  file:\"<file>\"\n"
     "    line format in <file>:\n"
     "      <i1>,<i2>,...: <weight>\n"
@@ -149,13 +174,20 @@ makeOptionsDescription()
    ("repeat,r", po::value<unsigned int>()->default_value(1),
     "(optional) number of times the construction must be executed\n"
    "(can be useful to obtain different results from random constructions)\n")
+    ("seed", po::value<unsigned int>()->default_value(0),
+    "(optional) index of the random stream used by the random explorations;\n"
+   "searches executed with different seeds explore non-overlapping random samples\n")
     ("verbose,v", po::value<std::string>()->default_value("0"),
    "specify the verbosity of the program;\n"
    "ranges between 0 (default) and 3\n")
     ("output-folder,o", po::value<std::string>(),
     "(optional) path to the folder for the outputs of LatNeBuilder. The contents of the folder may be overwritten. If the folder does not exist, it is created. If no path is provided, no output folder is created.")
     ("merit-digits-displayed", po::value<unsigned int>()->default_value(0),
-    "(optional) number of significant figures to use when displaying merit values\n");
+    "(optional) number of significant figures to use when displaying merit values\n")
+    ("evaluation-file", po::value<std::string>(),
+    "(optional) path to a file containing one net description per line (see evaluation:<net_description>); "
+    "the figure of merit of each net is evaluated in turn, and the merit values are written, one per line and in the same order, "
+    "to the file merits.txt of the output folder. The exploration method is ignored.\n");
 
    return desc;
 }
@@ -195,7 +227,7 @@ parse(int argc, const char* argv[])
 NetBuilder::Parser::CommandLine<NetBuilder::NetConstruction::net_construction, NetBuilder::EmbeddingType::point_set_type> cmd;\
 \
 cmd.s_verbose = opt["verbose"].as<std::string>();\
-cmd.s_explorationMethod = opt["exploration-method"].as<std::string>();\
+cmd.s_explorationMethod = explorationMethod;\
 cmd.s_size = opt["size-parameter"].as<std::string>();\
 cmd.s_dimension = opt["dimension"].as<std::string>();\
 cmd.s_figure = opt["figure-of-merit"].as<std::string>();\
@@ -239,6 +271,8 @@ int main(int argc, const char *argv[])
 
         auto repeat = opt["repeat"].as<unsigned int>();
 
+        LatBuilder::LFSR258::selectStream(opt["seed"].as<unsigned int>());
+
         std::string outputFolder = "";
         if (opt.count("output-folder") >= 1){
           outputFolder = opt["output-folder"].as<std::string>();
@@ -269,6 +303,9 @@ int main(int argc, const char *argv[])
         std::chrono::time_point<std::chrono::high_resolution_clock> t0, t1;
         unsigned int interlacingFactor = 0;
       
+        std::string explorationMethod = opt["exploration-method"].as<std::string>();
+
+        auto buildTask = [&](){
         std::unique_ptr<NetBuilder::Task::Task> task;
 
         if(netConstruction == NetBuilder::NetConstruction::SOBOL && embeddingType == NetBuilder::EmbeddingType::UNILEVEL){
@@ -286,6 +323,30 @@ int main(int argc, const char *argv[])
        if(netConstruction == NetBuilder::NetConstruction::EXPLICIT && embeddingType == NetBuilder::EmbeddingType::MULTILEVEL){
           BUILD_TASK(EXPLICIT, MULTILEVEL)
        }
+       return task;
+        };
+
+        if (opt.count("evaluation-file") >= 1){
+          // batch evaluation: a single process evaluates all the candidates
+          auto candidates = readCandidates(opt["evaluation-file"].as<std::string>());
+          std::ofstream meritsFile;
+          if (outputFolder != ""){
+            meritsFile.open(outputFolder + "/merits.txt");
+            meritsFile.precision(std::numeric_limits<Real>::max_digits10);
+          }
+          for (unsigned int i = 0; i < candidates.size(); i++){
+            explorationMethod = "evaluation:" + candidates[i];
+            auto task = buildTask();
+            task->execute();
+            if (outputFolder != ""){
+              meritsFile << task->outputMeritValue() << std::endl;
+            }
+            std::cout << "Net " << i+1 << "/" << candidates.size() << std::endl;
+          }
+          return 0;
+        }
+
+        std::unique_ptr<NetBuilder::Task::Task> task = buildTask();
 
       for (unsigned i=0; i<repeat; i++){
         if (i == 0){